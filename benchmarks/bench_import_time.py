@@ -0,0 +1,117 @@
+"""
+Measures the startup cost of the entry points with `python -X importtime`: the time to reach
+`python -m src --help` and to import the main modules, and which heavy packages each one loads.
+Saves metrics/import_times.json and exits with status 1 when `--help` takes longer than the
+target or an entry point imports a package it should only load on use.
+
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --repeat 10 --target-ms 300
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import subprocess
+import sys, pathlib
+import time
+
+ROOT_DIR = pathlib.Path(__file__).resolve().parents[1]
+
+RESULTS_PATH = ROOT_DIR / "metrics" / "import_times.json"
+
+# Wall time (interpreter start included) allowed to reach `python -m src --help`
+TARGET_HELP_MS = 300
+
+# Loaded only by the functions that use them (src.core.lazy)
+DEFERRED = ("shap", "xgboost", "matplotlib", "seaborn")
+
+# Entry point: (interpreter arguments, top-level packages it must not import)
+TARGETS = {
+    "python -m src --help": (["-m", "src", "--help"], ("pandas", "numpy", "sklearn", "scipy") + DEFERRED),
+    "import src": (["-c", "import src"], ("pandas", "numpy") + DEFERRED),
+    "import src.core.tracing": (["-c", "import src.core.tracing"], ("pandas", "numpy", "pyarrow") + DEFERRED),
+    "import src.cleaning": (["-c", "import src.cleaning"], DEFERRED),
+    "import src.optimization": (["-c", "import src.optimization"], DEFERRED),
+    "import src.interpretability": (["-c", "import src.interpretability"], DEFERRED),
+    "import src.utils.eda_report": (["-c", "import src.utils.eda_report"], DEFERRED),
+    "import scripts.run_task_4": (["-c", "import scripts.run_task_4"], DEFERRED),
+}
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def parse_importtime(stderr):
+    """{module: (self_us, cumulative_us, depth)} from the `-X importtime` report."""
+    modules = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules[name] = (int(self_us), int(cumulative_us), len(indent) // 2)
+    return modules
+
+
+def measure(args, repeat):
+    """Best wall and import time over repeat runs, the top-level imports and the packages loaded."""
+    wall_ms, import_ms, modules = [], [], {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=ROOT_DIR,
+                             capture_output=True, text=True, check=True)
+        wall_ms.append((time.perf_counter() - start) * 1000)
+        modules = parse_importtime(run.stderr)
+        import_ms.append(sum(cumulative for _, cumulative, depth in modules.values() if depth == 0) / 1000)
+    top_level = sorted(((name, cumulative / 1000) for name, (_, cumulative, depth) in modules.items() if depth == 0),
+                       key=lambda item: item[1], reverse=True)
+    return {
+        "wall_ms": round(min(wall_ms), 1),
+        "import_ms": round(min(import_ms), 1),
+        "modules": len(modules),
+        "slowest": {name: round(ms, 1) for name, ms in top_level[:5]},
+        "packages": sorted({name.split(".")[0] for name in modules}),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="runs per entry point; the fastest is kept")
+    parser.add_argument("--target-ms", type=float, default=TARGET_HELP_MS)
+    parser.add_argument("--output", type=pathlib.Path, default=RESULTS_PATH)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results, failures = {}, []
+    print(f"{'entry point':<32}{'wall (ms)':>10}{'imports (ms)':>14}{'modules':>9}")
+    for name, (target_args, forbidden) in TARGETS.items():
+        stats = measure(target_args, args.repeat)
+        results[name] = {key: value for key, value in stats.items() if key != "packages"}
+        loaded = sorted(set(forbidden) & set(stats["packages"]))
+        results[name]["loaded_too_early"] = loaded
+        print(f"{name:<32}{stats['wall_ms']:>10.1f}{stats['import_ms']:>14.1f}{stats['modules']:>9}")
+        if loaded:
+            failures.append(f"{name} imports {', '.join(loaded)}")
+
+    help_ms = results["python -m src --help"]["wall_ms"]
+    if help_ms > args.target_ms:
+        failures.append(f"python -m src --help took {help_ms:.0f} ms (target {args.target_ms:.0f} ms)")
+
+    report = {"environment": {"python": platform.python_version(), "platform": platform.platform(),
+                              "cpu_count": os.cpu_count(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")},
+              "target_help_ms": args.target_ms, "results": results}
+    args.output.parent.mkdir(exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=4))
+    print(f"✅ Results saved to {args.output}")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        return 1
+    print(f"✅ --help in {help_ms:.0f} ms; no entry point imports {', '.join(DEFERRED)} before use.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
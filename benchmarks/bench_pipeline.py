@@ -0,0 +1,244 @@
+"""
+Times and memory-profiles every stage of the cleaning-to-pricing pipeline on synthetic extracts,
+saves the results to metrics/benchmark_results.json and compares them with the stored baseline
+(metrics/benchmark_baseline.json). Exits with status 1 when a stage regresses past the threshold.
+
+    python benchmarks/bench_pipeline.py --sizes 10000 100000 1000000 5000000
+    python benchmarks/bench_pipeline.py --sizes 10000 100000 --update-baseline
+    python benchmarks/bench_pipeline.py --repeat 5                  # best of 5 runs per stage
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import sys, pathlib
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+ROOT_DIR = pathlib.Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from benchmarks.synthetic import write_raw_file
+from src.cleaning import clean_and_impute
+from src.core.tracing import MemorySampler
+from src.evaluation import evaluate_classification, evaluate_regression
+from src.models import classification_models, fit_model, regression_models
+from src.optimization import price_portfolio
+from src.preprocessing import build_feature_matrix, prepare_classification_data, prepare_severity_data
+from src.utils.eda_cleaning_and_imputation_functions import preprocess_data
+from src.utils.hypothesis_testing import batch_t_tests, compute_claim_metrics
+
+RESULTS_PATH = ROOT_DIR / "metrics" / "benchmark_results.json"
+BASELINE_PATH = ROOT_DIR / "metrics" / "benchmark_baseline.json"
+
+# Same high-cardinality exclusions as scripts/run_task_4.py
+HIGH_CARD_COLS = ["PolicyID", "PolicyCode", "PostalCode", "Model", "make"]
+
+# A stage regresses when it is this much slower (or larger) than the baseline...
+DEFAULT_THRESHOLD = 0.25
+MEMORY_THRESHOLD = 0.5
+# ...and the difference is above the noise floor: at least MIN_TIME_DELTA_S / MIN_MEMORY_DELTA_MB,
+# or NOISE_FACTOR times the spread between the stage's repeated runs when that is larger (peak
+# memory is a resident-set increase, which varies with how much freed heap a stage reuses)
+MIN_TIME_DELTA_S = 0.15
+MIN_MEMORY_DELTA_MB = 16
+NOISE_FACTOR = 2
+
+# Each stage is timed as the best of this many runs
+DEFAULT_REPEAT = 3
+
+# Timings only compare between runs on matching environments
+ENVIRONMENT_KEYS = ("python", "system", "machine", "cpu_count")
+
+
+def measure(func, *args, repeat=1, setup=None):
+    """
+    Runs func repeat times (stdout and warnings silenced) and returns the last result with the
+    best time and peak memory and their spread over the runs: {time_s, time_spread_s,
+    peak_memory_mb, peak_memory_spread_mb}. setup, if given, builds fresh (untimed) arguments
+    for each run, for stages that modify their input.
+    """
+    times, peaks = [], []
+    for _ in range(repeat):
+        call_args = setup() if setup is not None else args
+        gc.collect()
+        with MemorySampler() as memory, contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            start = time.perf_counter()
+            result = func(*call_args)
+            times.append(time.perf_counter() - start)
+        peaks.append(memory.peak_mb)
+    peaks = [peak for peak in peaks if peak is not None]
+    return result, {"time_s": round(min(times), 4), "time_spread_s": round(max(times) - min(times), 4),
+                    "peak_memory_mb": round(min(peaks), 1) if peaks else None,
+                    "peak_memory_spread_mb": round(max(peaks) - min(peaks), 1) if peaks else None}
+
+
+def calibrate(repeat=5):
+    """
+    Best time of a fixed CPU workload (a NumPy sort and a Python loop). Stage times are compared
+    relative to it, so a machine that is slower for the whole run (shared or throttled CPU) does
+    not read as a regression.
+    """
+    data = np.random.default_rng(0).random(1_000_000)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        np.sort(data)
+        sum(i * i for i in range(300_000))
+        times.append(time.perf_counter() - start)
+    return {"time_s": round(min(times), 4), "time_spread_s": round(max(times) - min(times), 4),
+            "peak_memory_mb": None, "peak_memory_spread_mb": None}
+
+
+def train_fast_models(X_cls, y_cls, X_sev, y_sev):
+    reg = {name: fit_model(model, X_sev, y_sev) for name, model in regression_models("fast").items()}
+    cls = {name: fit_model(model, X_cls, y_cls) for name, model in classification_models("fast").items()}
+    return reg, cls
+
+
+def run_pipeline(n_rows, workdir, max_train_rows=50_000, repeat=DEFAULT_REPEAT):
+    """
+    Runs every stage on a synthetic extract of n_rows rows, each repeat times. Models (fast
+    profile) are fitted on at most max_train_rows rows so the larger sizes stay practical;
+    evaluation, pricing and the hypothesis tests use all rows.
+    Returns {stage: {time_s, peak_memory_mb, their spreads, rows}}.
+    """
+    raw_file = write_raw_file(n_rows, workdir / f"raw_{n_rows}.csv")
+    stats = {"calibration": calibrate()}
+    measure_stage = lambda func, *args, **kwargs: measure(func, *args, repeat=repeat, **kwargs)
+
+    processed, stats["preprocess_data"] = measure_stage(preprocess_data, raw_file, workdir / f"clean_{n_rows}.parquet")
+    hypothesis_frame = processed[["Province", "PostalCode", "Gender", "PolicyCode", "TotalPremium", "TotalClaims"]].copy()
+    # clean_and_impute fills its input in place, so every run gets a fresh copy
+    df_clean, stats["clean_and_impute"] = measure_stage(clean_and_impute, setup=lambda: (processed.copy(),))
+    (X, encoder), stats["encode"] = measure_stage(build_feature_matrix, df_clean, HIGH_CARD_COLS)
+
+    X_train_cls, X_test_cls, y_train_cls, y_test_cls = prepare_classification_data(df_clean, X)
+    (X_train_sev, X_test_sev, y_train_sev, y_test_sev), _ = prepare_severity_data(df_clean, X)
+    (reg_models, cls_models), stats["train"] = measure_stage(
+        train_fast_models, X_train_cls[:max_train_rows], y_train_cls[:max_train_rows],
+        X_train_sev[:max_train_rows], y_train_sev[:max_train_rows])
+    _, stats["evaluate"] = measure_stage(lambda: (evaluate_regression(reg_models, X_test_sev, y_test_sev),
+                                            evaluate_classification(cls_models, X_test_cls, y_test_cls)))
+    _, stats["pricing"] = measure_stage(price_portfolio, df_clean.loc[y_test_cls.index], encoder,
+                                  cls_models["XGBoost"], reg_models["RandomForest"])
+
+    _, stats["hypothesis_tests"] = measure_stage(lambda: [
+        batch_t_tests(compute_claim_metrics(hypothesis_frame), ["Province", "PostalCode", "Gender"],
+                      ["ClaimFrequency", "Margin"], mode=mode)
+        for mode in ("pairs", "one_vs_rest")
+    ])
+    for stage in stats.values():
+        stage["rows"] = n_rows
+    return stats
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD, memory_threshold=MEMORY_THRESHOLD):
+    """
+    Lists the (size, stage, metric) measurements that are more than threshold (memory_threshold
+    for peak memory) above the baseline and above the noise floor (scaled up by the spread of the
+    stage's repeated runs on either side). Baseline times are scaled by the ratio of the two
+    runs' calibration times when both have one. Sizes and stages missing from either side are
+    skipped.
+    """
+    regressions = []
+    for size, stages in results.items():
+        calibration, reference_calibration = stages.get("calibration"), baseline.get(size, {}).get("calibration")
+        speed = calibration["time_s"] / reference_calibration["time_s"] if calibration and reference_calibration else 1.0
+        for stage, stats in stages.items():
+            reference = baseline.get(size, {}).get(stage)
+            if reference is None or stage == "calibration":
+                continue
+            spread = lambda key: max(stats.get(key) or 0, reference.get(key) or 0)
+            limits = {"time_s": (threshold, max(MIN_TIME_DELTA_S, NOISE_FACTOR * spread("time_spread_s")), speed),
+                      "peak_memory_mb": (memory_threshold,
+                                         max(MIN_MEMORY_DELTA_MB, NOISE_FACTOR * spread("peak_memory_spread_mb")), 1.0)}
+            for metric, (limit, floor, scale) in limits.items():
+                current, expected = stats.get(metric), reference.get(metric)
+                if current is None or expected is None:
+                    continue
+                expected = round(expected * scale, 4)
+                if current > expected * (1 + limit) and current - expected > floor:
+                    regressions.append((size, stage, metric, expected, current))
+    return regressions
+
+
+def environment():
+    return {"python": ".".join(platform.python_version_tuple()[:2]), "system": platform.system(),
+            "machine": platform.machine(), "cpu_count": os.cpu_count(), "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def environment_differences(current, recorded):
+    """The ENVIRONMENT_KEYS on which the baseline's environment differs from this one."""
+    return {key: (recorded.get(key), current[key]) for key in ENVIRONMENT_KEYS if recorded.get(key) != current[key]}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--max-train-rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="runs per stage; the fastest is kept")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown that counts as a regression")
+    parser.add_argument("--memory-threshold", type=float, default=MEMORY_THRESHOLD,
+                        help="relative peak memory growth that counts as a regression")
+    parser.add_argument("--output", type=pathlib.Path, default=RESULTS_PATH)
+    parser.add_argument("--baseline", type=pathlib.Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="save these results as the new baseline")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = {}
+    print(f"{'rows':>10}  {'stage':<18}{'time (s)':>10}{'peak (MB)':>11}")
+    with tempfile.TemporaryDirectory(prefix="bench_") as tmp:
+        for n_rows in args.sizes:
+            results[str(n_rows)] = run_pipeline(n_rows, pathlib.Path(tmp), args.max_train_rows, args.repeat)
+            for stage, stats in results[str(n_rows)].items():
+                memory = stats["peak_memory_mb"]
+                print(f"{n_rows:>10}  {stage:<18}{stats['time_s']:>10.3f}{memory if memory is not None else float('nan'):>11.1f}")
+
+    report = {"environment": environment(), "max_train_rows": args.max_train_rows, "repeat": args.repeat,
+              "results": results}
+    args.output.parent.mkdir(exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=4))
+    print(f"✅ Results saved to {args.output}")
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=4))
+        print(f"✅ Baseline updated: {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"⚠️ No baseline at {args.baseline}; run with --update-baseline to create one.")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    differences = environment_differences(report["environment"], baseline.get("environment", {}))
+    if differences:
+        # Timings from another machine or interpreter say nothing about this change
+        print("⚠️ The baseline was recorded on a different environment ("
+              + ", ".join(f"{key}: {recorded} → {current}" for key, (recorded, current) in differences.items())
+              + "); comparison skipped. Run `make bench-baseline` on this machine to gate against it.")
+        return 0
+    regressions = compare(results, baseline["results"], args.threshold, args.memory_threshold)
+    for size, stage, metric, expected, current in regressions:
+        print(f"❌ {stage} @ {size} rows: {metric} {expected:g} → {current:g} "
+              f"(+{(current / expected - 1) * 100 if expected else float('inf'):.0f}%)")
+    if regressions:
+        return 1
+    print(f"✅ No stage regressed by more than {args.threshold:.0%} (time) / {args.memory_threshold:.0%} (memory) "
+          "against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+Benchmarks the batched pricing engine (src.optimization.price_portfolio) in policies per minute.
+
+    python benchmarks/bench_pricing.py --sizes 100000 1000000 --batch-size 100000
+"""
+import argparse
+import sys, pathlib
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from xgboost import XGBClassifier
+
+ROOT_DIR = pathlib.Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from src.optimization import DEFAULT_BATCH_SIZE, price_portfolio
+from src.preprocessing import FeatureEncoder
+
+# Throughput the engine should sustain on one node
+TARGET_POLICIES_PER_MINUTE = 1_000_000
+
+
+def make_policies(n_rows, seed=42):
+    """A synthetic portfolio with the kinds of columns the real feature matrix uses."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'PolicyID': np.arange(n_rows, dtype='int32'),
+        'Province': pd.Categorical(rng.choice(['Gauteng', 'Western Cape', 'KwaZulu-Natal', 'Limpopo'], n_rows)),
+        'VehicleType': pd.Categorical(rng.choice(['Passenger Vehicle', 'Medium Commercial', 'Heavy Commercial'], n_rows)),
+        'CoverType': pd.Categorical(rng.choice([f'Cover {i}' for i in range(20)], n_rows)),
+        'Gender': pd.Categorical(rng.choice(['Male', 'Female', None], n_rows)),
+        'RegistrationYear': rng.integers(1990, 2015, n_rows).astype('float32'),
+        'kilowatts': rng.normal(90, 25, n_rows).astype('float32'),
+        'SumInsured': rng.gamma(2.0, 50_000.0, n_rows),
+        'TotalPremium': rng.gamma(2.0, 40.0, n_rows),
+        'TotalClaims': np.where(rng.random(n_rows) < 0.1, rng.gamma(1.5, 5000.0, n_rows), 0.0),
+    })
+
+
+def fit_models(train):
+    encoder = FeatureEncoder(exclude=['PolicyID', 'TotalClaims']).fit(train)
+    X = encoder.transform(train)
+    has_claim = train['TotalClaims'] > 0
+    frequency = XGBClassifier(n_estimators=100, eval_metric='logloss', random_state=42).fit(X, has_claim)
+    severity = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1).fit(
+        X[has_claim.to_numpy()], train.loc[has_claim, 'TotalClaims']
+    )
+    return encoder, frequency, severity
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    encoder, frequency, severity = fit_models(make_policies(20_000, seed=0))
+    print(f"{'rows':>10}{'mode':>10}{'time (s)':>11}{'policies/min':>15}{'target':>9}")
+    for n_rows in args.sizes:
+        policies = make_policies(n_rows)
+        with tempfile.TemporaryDirectory() as tmp:
+            modes = [("memory", None), ("parquet", pathlib.Path(tmp) / "premiums.parquet")]
+            for mode, output_path in modes:
+                start = time.perf_counter()
+                price_portfolio(policies, encoder, frequency, severity, output_path=output_path,
+                                batch_size=args.batch_size, expense_ratio=0.15, profit_margin=0.05)
+                elapsed = time.perf_counter() - start
+                rate = n_rows / elapsed * 60
+                status = "✅" if rate >= TARGET_POLICIES_PER_MINUTE else "❌"
+                print(f"{n_rows:>10}{mode:>10}{elapsed:>11.2f}{rate:>15,.0f}{status:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Synthetic raw extracts with the column schema of the real insurance data (src/schema.py RAW_DTYPES),
+for benchmarks at sizes the sample data does not reach.
+"""
+import numpy as np
+import pandas as pd
+
+from src.schema import RAW_DTYPES
+
+MONTHS = pd.date_range('2013-10-01', '2015-08-01', freq='MS').strftime('%Y-%m-%d %H:%M:%S').tolist()
+PROVINCES = ['Gauteng', 'Western Cape', 'KwaZulu-Natal', 'North West', 'Mpumalanga',
+             'Eastern Cape', 'Limpopo', 'Free State', 'Northern Cape']
+MAKES = ['TOYOTA', 'MERCEDES-BENZ', 'VOLKSWAGEN', 'NISSAN', 'FORD', 'AUDI', 'BMW', 'HYUNDAI',
+         'ISUZU', 'MAHINDRA', 'IVECO', 'SUZUKI', 'RENAULT', 'HONDA', 'KIA', 'OPEL']
+
+
+def make_raw_frame(n_rows, seed=42):
+    """
+    A raw extract of n_rows rows with the real column names, dtypes and kinds of values:
+    placeholder strings, missing values, zero and negative premiums, sparse claims and
+    high-cardinality PolicyID / PostalCode / Model columns.
+    """
+    rng = np.random.default_rng(seed)
+
+    def choice(values, p=None):
+        return np.asarray(values, dtype=object)[rng.choice(len(values), n_rows, p=p)]
+
+    def with_missing(values, rate):
+        values = values.astype(object) if values.dtype != object else values
+        values[rng.random(n_rows) < rate] = np.nan
+        return values
+
+    premium = np.round(rng.gamma(2.0, 40.0, n_rows), 4)
+    premium[rng.random(n_rows) < 0.05] = 0.0
+    premium[rng.random(n_rows) < 0.01] *= -1
+    claims = np.where(rng.random(n_rows) < 0.03, np.round(rng.gamma(1.5, 15_000.0, n_rows), 2), 0.0)
+    models = np.array([f'{make} MODEL {i}' for make in MAKES for i in range(25)], dtype=object)
+    model_makes = np.repeat(np.array(MAKES, dtype=object), 25)
+    model_codes = rng.choice(len(models), n_rows)
+    postal_codes = rng.integers(1, 9_999, 900)
+
+    df = pd.DataFrame({
+        'UnderwrittenCoverID': np.arange(n_rows) + 1,
+        'PolicyID': rng.integers(1, max(n_rows // 3, 2), n_rows),
+        'TransactionMonth': choice(MONTHS),
+        'IsVATRegistered': rng.random(n_rows) < 0.01,
+        'Citizenship': choice(['  ', 'ZA', 'AF', 'ZW'], p=[0.9, 0.08, 0.01, 0.01]),
+        'LegalType': choice(['Individual', 'Close Corporation', 'Private company', 'Partnership'], p=[0.9, 0.05, 0.04, 0.01]),
+        'Title': with_missing(choice(['Mr', 'Mrs', 'Ms', 'Miss', 'Dr'], p=[0.9, 0.05, 0.03, 0.015, 0.005]), 0.01),
+        'Language': 'English',
+        'Bank': with_missing(choice(['First National Bank', 'Standard Bank', 'ABSA Bank', 'Nedbank', 'Capitec Bank']), 0.15),
+        'AccountType': with_missing(choice(['Current account', 'Savings account', 'Transmission account']), 0.05),
+        'MaritalStatus': with_missing(choice(['Single', 'Married', 'Not specified'], p=[0.4, 0.3, 0.3]), 0.01),
+        'Gender': with_missing(choice(['Male', 'Female', 'Not specified'], p=[0.45, 0.05, 0.5]), 0.01),
+        'Country': 'South Africa',
+        'Province': choice(PROVINCES, p=[0.39, 0.17, 0.17, 0.14, 0.05, 0.03, 0.02, 0.02, 0.01]),
+        'PostalCode': postal_codes[rng.zipf(1.3, n_rows) % len(postal_codes)],
+        'MainCrestaZone': choice(['Rand East', 'Cape Town', 'Durban', 'Pretoria']),
+        'SubCrestaZone': choice(['Rand East', 'Cape Town', 'Durban', 'Pretoria', 'North']),
+        'ItemType': 'Mobility - Motor',
+        'mmcode': with_missing((44_069_150 + model_codes * 1_000).astype('float64'), 0.001),
+        'VehicleType': with_missing(choice(['Passenger Vehicle', 'Medium Commercial', 'Heavy Commercial',
+                                            'Light Commercial', 'Bus'], p=[0.94, 0.04, 0.01, 0.005, 0.005]), 0.001),
+        'RegistrationYear': rng.integers(1987, 2016, n_rows),
+        'make': with_missing(model_makes[model_codes], 0.001),
+        'Model': models[model_codes],
+        'Cylinders': with_missing(choice([4.0, 6.0, 8.0], p=[0.9, 0.08, 0.02]), 0.001),
+        'cubiccapacity': with_missing(choice([1390.0, 1600.0, 2000.0, 2694.0, 3000.0]), 0.001),
+        'kilowatts': with_missing(choice([55.0, 75.0, 90.0, 111.0, 130.0]), 0.001),
+        'bodytype': with_missing(choice(['B/S', 'S/D', 'H/B', 'D/C', 'S/C']), 0.001),
+        'NumberOfDoors': with_missing(choice([2.0, 4.0, 5.0], p=[0.1, 0.7, 0.2]), 0.001),
+        'VehicleIntroDate': with_missing(choice([f'{m}/{y}' for y in range(1990, 2015) for m in (1, 6)]), 0.001),
+        'CustomValueEstimate': with_missing(np.round(rng.gamma(2.0, 60_000.0, n_rows), -2), 0.78),
+        'AlarmImmobiliser': choice(['Yes', 'No'], p=[0.99, 0.01]),
+        'TrackingDevice': choice(['Yes', 'No']),
+        'CapitalOutstanding': with_missing(choice(['0', '119300', '250000', '']), 0.001),
+        'NewVehicle': with_missing(choice(['More than 6 months', 'Less than 6 months']), 0.15),
+        'WrittenOff': with_missing(choice(['Yes', 'No'], p=[0.01, 0.99]), 0.64),
+        'Rebuilt': with_missing(choice(['Yes', 'No'], p=[0.01, 0.99]), 0.64),
+        'Converted': with_missing(choice(['Yes', 'No'], p=[0.01, 0.99]), 0.64),
+        'CrossBorder': with_missing(choice(['Yes', 'No'], p=[0.01, 0.99]), 0.99),
+        'NumberOfVehiclesInFleet': np.nan,
+        'SumInsured': np.round(rng.gamma(1.2, 200_000.0, n_rows), 2),
+        'TermFrequency': choice(['Monthly', 'Annual'], p=[0.99, 0.01]),
+        'CalculatedPremiumPerTerm': np.round(rng.gamma(2.0, 60.0, n_rows), 4),
+        'ExcessSelected': choice(['Mobility - Windscreen', 'No excess', 'Mobility - Metered Taxis - R2000']),
+        'CoverCategory': choice(['Windscreen', 'Own damage', 'Passenger Liability', 'Third Party', 'Signage and Vehicle Wraps']),
+        'CoverType': choice(['Windscreen', 'Own Damage', 'Passenger Liability', 'Third Party', 'Emergency Charges',
+                             'Keys and Alarms', 'Cleaning and Removal of Accident Debris']),
+        'CoverGroup': choice(['Comprehensive - Taxi', 'Motor Comprehensive']),
+        'Section': choice(['Motor Comprehensive', 'Optional Extended Covers', 'Taxi']),
+        'Product': choice(['Mobility Commercial Cover: Monthly', 'Mobility Metered Taxis: Monthly']),
+        'StatutoryClass': 'Commercial',
+        'StatutoryRiskType': 'IFRS Constant',
+        'TotalPremium': premium,
+        'TotalClaims': claims,
+    })
+    return df[list(RAW_DTYPES)]
+
+
+def write_raw_file(n_rows, path, seed=42, chunk_rows=1_000_000):
+    """
+    Writes a synthetic pipe-delimited extract in chunks (each with its own seed), so 5M-row
+    files are generated without holding the full frame.
+    """
+    for i, start in enumerate(range(0, n_rows, chunk_rows)):
+        chunk = make_raw_frame(min(chunk_rows, n_rows - start), seed=seed + i)
+        chunk['UnderwrittenCoverID'] += start
+        chunk.to_csv(path, sep='|', index=False, mode='a' if i else 'w', header=i == 0)
+    return path
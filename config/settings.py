@@ -4,12 +4,18 @@ Configuration settings for the application.
 
 """
 import os
-from dotenv import load_dotenv
-# Load environment variables from .env file
-load_dotenv()
 # Define the base directory of the application
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # Define the path to the .env file
 ENV_FILE = os.path.join(BASE_DIR, '.env')
 
 
+def load_env(env_file=ENV_FILE):
+    """
+    Loads environment variables from the .env file, if there is one. Called by entry points
+    (e.g. `python -m src`) rather than on import, so importing the settings has no side effects.
+    """
+    if not os.path.exists(env_file):
+        return False
+    from dotenv import load_dotenv
+    return load_dotenv(env_file)
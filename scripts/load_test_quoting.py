@@ -0,0 +1,120 @@
+"""
+Load test for the quoting service: concurrent keep-alive clients send policies sampled from the
+processed dataset to POST /quote and report p50/p99 latency and throughput.
+
+    python -m src.services.quoting &                      # or pass --serve
+    python scripts/load_test_quoting.py --concurrency 8 --requests 2000
+"""
+import argparse
+import http.client
+import json
+import subprocess
+import sys, pathlib
+import threading
+import time
+import urllib.parse
+
+import numpy as np
+
+ROOT_DIR = pathlib.Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from src.data_loader import load_processed
+
+# Latency target per quote
+P99_TARGET_MS = 20
+
+
+def sample_policies(n, seed=42):
+    df = load_processed()
+    sample = df.sample(min(n, len(df)), random_state=seed).drop(columns=["TotalClaims", "LossRatio"])
+    return json.loads(sample.to_json(orient="records"))
+
+
+def wait_until_ready(host, port, timeout=60):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        conn = http.client.HTTPConnection(host, port, timeout=1)
+        try:
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return
+        except (OSError, http.client.HTTPException):
+            pass
+        finally:
+            conn.close()
+        time.sleep(0.2)
+    raise TimeoutError(f"quoting service on {host}:{port} did not become ready")
+
+
+def run_client(host, port, bodies, latencies, errors):
+    conn = http.client.HTTPConnection(host, port)
+    for body in bodies:
+        start = time.perf_counter()
+        try:
+            conn.request("POST", "/quote", body, {"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException) as exc:
+            errors.append(type(exc).__name__)
+            conn.close()
+            continue
+        latencies.append(time.perf_counter() - start)
+        if response.status != 200:
+            errors.append(response.status)
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the quoting service on localhost.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=2000, help="total number of requests")
+    parser.add_argument("--policies-per-request", type=int, default=1)
+    parser.add_argument("--serve", action="store_true", help="start the service for the duration of the test")
+    args = parser.parse_args()
+
+    url = urllib.parse.urlparse(args.url)
+    host, port = url.hostname, url.port or 80
+    server = None
+    if args.serve:
+        server = subprocess.Popen([sys.executable, "-m", "src.services.quoting", "--host", host, "--port", str(port)],
+                                  cwd=ROOT_DIR)
+    try:
+        wait_until_ready(host, port)
+        policies = sample_policies(1000)
+        bodies = [
+            json.dumps([policies[(i * args.policies_per_request + j) % len(policies)]
+                        for j in range(args.policies_per_request)])
+            for i in range(args.requests)
+        ]
+        # Warm up the connection pool and the models
+        run_client(host, port, bodies[:20], [], [])
+
+        latencies, errors = [], []
+        clients = [
+            threading.Thread(target=run_client, args=(host, port, bodies[i::args.concurrency], latencies, errors))
+            for i in range(args.concurrency)
+        ]
+        start = time.perf_counter()
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    latencies_ms = np.array(latencies) * 1000
+    p50, p99 = np.percentile(latencies_ms, [50, 99])
+    n_quotes = len(latencies) * args.policies_per_request
+    print(f"📊 {len(latencies)} requests ({n_quotes} quotes), concurrency {args.concurrency}, {len(errors)} errors")
+    print(f"⏱️ p50 {p50:.2f} ms, p99 {p99:.2f} ms, max {latencies_ms.max():.2f} ms")
+    print(f"🚀 {len(latencies) / elapsed:,.0f} requests/s, {n_quotes / elapsed:,.0f} quotes/s")
+    print(f"{'✅' if p99 < P99_TARGET_MS else '❌'} p99 target: < {P99_TARGET_MS} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Prices a portfolio with the models saved by run_task_4.py (models/): the training imputer
+fills the gaps, both models score each batch and the premiums are streamed to Parquet.
+
+    python scripts/price_policies.py                                  # the processed Parquet store
+    python scripts/price_policies.py --input policies.csv --output reports/premiums.parquet
+"""
+import argparse
+import sys, pathlib
+ROOT_DIR = pathlib.Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+import joblib
+import pandas as pd
+
+from src.data_loader import (PROCESSED_PARQUET_PATH, MODELS_DIR, ENCODER_FILE, FREQUENCY_MODEL_FILE, IMPUTER_FILE,
+                             SEVERITY_MODEL_FILE, iter_processed)
+from src.imputation import load_imputer
+from src.optimization import DEFAULT_BATCH_SIZE, price_portfolio
+from src.preprocessing import FeatureEncoder
+from src.schema import apply_schema
+
+OUTPUT_PATH = ROOT_DIR / "reports" / "premiums.parquet"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Price policies with the saved frequency/severity models.")
+    parser.add_argument("--input", type=pathlib.Path, default=PROCESSED_PARQUET_PATH,
+                        help="Parquet dataset or file, or a CSV with the processed columns")
+    parser.add_argument("--output", type=pathlib.Path, default=OUTPUT_PATH)
+    parser.add_argument("--models-dir", type=pathlib.Path, default=MODELS_DIR)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--loading-factor", type=float, default=1.2)
+    parser.add_argument("--expense-ratio", type=float, default=0.0)
+    parser.add_argument("--profit-margin", type=float, default=0.0)
+    return parser.parse_args()
+
+
+def read_policies(path, batch_size):
+    # CSV rows are cast to the compact schema the encoder was fitted on
+    if path.suffix == ".csv":
+        return (apply_schema(chunk) for chunk in pd.read_csv(path, chunksize=batch_size))
+    return iter_processed(path, batch_size=batch_size)
+
+
+def main(args):
+    imputer_path = args.models_dir / IMPUTER_FILE
+    imputer = load_imputer(imputer_path) if imputer_path.exists() else None
+    n_rows = price_portfolio(
+        read_policies(args.input, args.batch_size),
+        FeatureEncoder.load(args.models_dir / ENCODER_FILE),
+        joblib.load(args.models_dir / FREQUENCY_MODEL_FILE),
+        joblib.load(args.models_dir / SEVERITY_MODEL_FILE),
+        output_path=args.output, batch_size=args.batch_size, imputer=imputer,
+        loading_factor=args.loading_factor, expense_ratio=args.expense_ratio, profit_margin=args.profit_margin,
+    )
+    print(f"✅ Priced {n_rows:,} policies -> {args.output}")
+
+
+if __name__ == "__main__":
+    main(parse_args())
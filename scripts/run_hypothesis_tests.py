@@ -5,12 +5,15 @@ ROOT_DIR = pathlib.Path(__file__).resolve().parents[1]
 SRC_DIR = ROOT_DIR
 sys.path.append(str(SRC_DIR))
 
-from src.utils.hypothesis_testing import compute_claim_metrics, t_test_groups, chi_squared_test
+from src.data_loader import load_processed
+from src.policy_aggregates import load_policy_aggregates
+from src.utils.hypothesis_testing import compute_claim_metrics, t_test_groups, chi_squared_test, batch_t_tests
 
-df = pd.read_csv("data/processed/insurance_data_cleaned.csv")
+# Only the grouping columns, the policy code and the claim/premium totals are needed here
+df = load_processed(columns=['Province', 'PostalCode', 'Gender', 'PolicyCode', 'TotalPremium', 'TotalClaims'])
 
-# Compute risk and margin metrics
-df = compute_claim_metrics(df)
+# Compute risk and margin metrics, reusing the per-policy aggregates cached by the cleaning stage
+df = compute_claim_metrics(df, policy_aggregates=load_policy_aggregates())
 
 results = []
 
@@ -37,4 +40,14 @@ with open("metrics/hypothesis_test_results.json", "w") as f:
     print("Saving results to metrics/hypothesis_test_results.json ...")
     json.dump(results, f, indent=4, default=convert_numpy)
 
-print("✅ Hypothesis testing completed. Results saved to metrics/hypothesis_test_results.json.")
\ No newline at end of file
+print("✅ Hypothesis testing completed. Results saved to metrics/hypothesis_test_results.json.")
+
+# Batch engine: every pair of groups, and every group against the rest, with FDR/Bonferroni correction
+batch = pd.concat([
+    batch_t_tests(df, ['Province', 'PostalCode', 'Gender'], ['ClaimFrequency', 'Margin'], mode=mode)
+    for mode in ('pairs', 'one_vs_rest')
+], ignore_index=True)
+batch[['group_a', 'group_b']] = batch[['group_a', 'group_b']].astype(str)
+batch.to_parquet("metrics/hypothesis_batch_results.parquet", index=False)
+print(f"✅ {len(batch)} batch t-tests saved to metrics/hypothesis_batch_results.parquet "
+      f"({int(batch['significant'].sum())} significant after FDR correction).")
\ No newline at end of file
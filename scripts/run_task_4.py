@@ -1,112 +1,274 @@
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+import argparse
+import joblib
+import json
 import sys, pathlib
 ROOT_DIR = pathlib.Path(__file__).resolve().parents[1]
 SRC_DIR = ROOT_DIR
 sys.path.append(str(SRC_DIR))
 
-from src.cleaning import clean_and_impute
-from src.preprocessing import prepare_severity_data, prepare_classification_data
-from src.models import train_regression_models, train_classification_models
-from src.evaluation import evaluate_regression, evaluate_classification
-from src.optimization import compute_optimized_premium
-from src.interpretability import explain_model_with_shap
-
-#
-DATA_PATH = "data/processed/insurance_data_cleaned.csv"
-df = pd.read_csv(DATA_PATH)
-
-
-df_clean = clean_and_impute(df)
-
-
-high_card_cols = ["PolicyID", "PostalCode", "Model", "make"]
-
-
-
-(X_train_sev, X_test_sev, y_train_sev, y_test_sev), df_sev = prepare_severity_data(df_clean, high_card_cols)
-
-
-X_train_cls, X_test_cls, y_train_cls, y_test_cls = prepare_classification_data(df_clean, high_card_cols)
-
-
-reg_models = train_regression_models(X_train_sev, y_train_sev)
-cls_models = train_classification_models(X_train_cls, y_train_cls)
-
-
-reg_results = evaluate_regression(reg_models, X_test_sev, y_test_sev)
-cls_results = evaluate_classification(cls_models, X_test_cls, y_test_cls)
-
-
-
-n_samples = min(X_test_cls.shape[0], X_test_sev.shape[0])
-X_cls_aligned = X_test_cls[:n_samples]
-X_sev_aligned = X_test_sev[:n_samples]
-
-
-p_claim = cls_models["XGBoost"].predict_proba(X_cls_aligned)[:, 1]
-expected_claim = reg_models["RandomForest"].predict(X_sev_aligned)
-
-
-optimized_premium = compute_optimized_premium(p_claim, expected_claim, loading_factor=1.2)
-
-
-plt.figure(figsize=(8, 4))
-plt.hist(optimized_premium, bins=40, color='dodgerblue', edgecolor='black')
-plt.title("📈 Risk-Based Premium Distribution")
-plt.xlabel("Estimated Premium (Rand)")
-plt.ylabel("Number of Policies")
-plt.grid(True)
-plt.tight_layout()
-plt.show()
-
-
-print("🔹 Regression Model Results:")
-for name, res in reg_results.items():
-    print(f"{name} → RMSE: {res['RMSE']:.2f}, R²: {res['R2']:.3f}")
-
-print("\n🔸 Classification Model Results:")
-for name, res in cls_results.items():
-    print(f"{name} → Accuracy: {res['Accuracy']:.3f}, F1: {res['F1']:.3f}")
-
-
-
-print("\n🧠 SHAP Summary: Claim Severity (RandomForest)")
-X_sample_reg = X_train_sev[:500]
-explain_model_with_shap(reg_models["RandomForest"], X_sample_reg)
-
-
-print("\n🧠 SHAP Summary: Claim Probability (XGBoost)")
-X_sample_cls = X_train_cls[:500]
-explain_model_with_shap(cls_models["XGBoost"], X_sample_cls)
-
-
-import numpy as np
-
-
-cls_df = pd.DataFrame(cls_results).T.reset_index().rename(columns={"index": "Model"})
-cls_df[["Accuracy", "F1"]] = cls_df[["Accuracy", "F1"]].astype(float)
-
-cls_df.plot(x="Model", y=["Accuracy", "F1"], kind="bar", figsize=(8, 4), colormap="viridis")
-plt.title("🔸 Classification Model Comparison")
-plt.ylabel("Score")
-plt.xticks(rotation=0)
-plt.grid(True, axis='y')
-plt.tight_layout()
-plt.show()
-
-
-reg_df = pd.DataFrame(reg_results).T.reset_index().rename(columns={"index": "Model"})
-
-fig, ax = plt.subplots(1, 2, figsize=(12, 4))
-reg_df.plot(x="Model", y="RMSE", kind="bar", ax=ax[0], color='salmon', legend=False)
-reg_df.plot(x="Model", y="R2", kind="bar", ax=ax[1], color='seagreen', legend=False)
-
-ax[0].set_title("RMSE Comparison (Lower is Better)")
-ax[1].set_title("R² Comparison (Higher is Better)")
-for a in ax:
-    a.set_xlabel("Model")
-    a.grid(True, axis='y')
-
-plt.tight_layout()
-plt.show()
\ No newline at end of file
+from src.core.lazy import lazy_import
+from src.core.tracing import format_trace_summary, is_enabled, read_trace, trace_file, traced
+from src.core.artifacts import DEFAULT_MAX_BYTES, ArtifactStore, data_fingerprint, stage_key
+# Fitted artifacts (imputer, encoder, models) are saved to MODELS_DIR for scoring and the quoting service
+from src.data_loader import (PROCESSED_PARQUET_PATH, MODELS_DIR, ENCODER_FILE, FREQUENCY_MODEL_FILE, IMPUTER_FILE,
+                             SEVERITY_MODEL_FILE, SEVERITY_DISTRIBUTION_FILE, load_processed)
+from src.cleaning import CLEAN_STRATEGIES, fit_clean_and_impute
+from src.imputation import save_imputer
+from src.preprocessing import build_feature_matrix, prepare_severity_data, prepare_classification_data
+from src.models import PROFILES, regression_models, classification_models, train_model_suites
+from src.evaluation import (DEFAULT_BOOTSTRAP, evaluate_regression, evaluate_classification,
+                            evaluate_regression_batches, evaluate_classification_batches)
+from src.optimization import price_portfolio
+from src.simulation import fit_severity_distribution, save_severity_distribution
+from src.interpretability import FIGURES_DIR, SHAP_MODES, explain_model, plot_shap_summary
+
+# Plotting and the external-memory XGBoost path load on first use (src.interpretability defers shap too)
+plt = lazy_import("matplotlib.pyplot")
+out_of_core = lazy_import("src.out_of_core")
+
+high_card_cols = ["PolicyID", "PolicyCode", "PostalCode", "Model", "make"]
+
+# Scores tracked by the DVC train stage
+MODEL_METRICS_PATH = ROOT_DIR / "metrics" / "model_metrics.json"
+
+# Actual-vs-expected ratios are reported per value of this column
+SEGMENT_COL = "Province"
+
+
+def _scalars(res):
+    # Scalar metrics of a result; the decile and actual-vs-expected tables are printed instead
+    return {key: float(value) for key, value in res.items() if not isinstance(value, pd.DataFrame)}
+
+
+def save_model_metrics(reg_results, cls_results, profile):
+    metrics = {"profile": profile, "regression": {}, "classification": {}}
+    for suite, results in (("regression", reg_results), ("classification", cls_results)):
+        for name, res in results.items():
+            metrics[suite][name] = _scalars(res)
+    MODEL_METRICS_PATH.parent.mkdir(exist_ok=True)
+    with open(MODEL_METRICS_PATH, "w") as f:
+        json.dump(metrics, f, indent=4)
+
+
+def _with_ci(res, metric, fmt):
+    value = format(res[metric], fmt)
+    if f"{metric}_ci_low" not in res:
+        return value
+    return f"{value} [{format(res[f'{metric}_ci_low'], fmt)}, {format(res[f'{metric}_ci_high'], fmt)}]"
+
+
+def print_results(reg_results, cls_results, label, frequency_model="XGBoost"):
+    print(f"🔹 Regression Model Results ({label}):")
+    for name, res in reg_results.items():
+        print(f"{name} → RMSE: {_with_ci(res, 'RMSE', '.2f')}, R²: {_with_ci(res, 'R2', '.3f')}, "
+              f"Gini: {_with_ci(res, 'Gini', '.3f')}, fit: {res['FitTime']:.1f}s, size: {res['ModelSizeMB']:.1f} MB")
+
+    print(f"\n🔸 Classification Model Results ({label}):")
+    for name, res in cls_results.items():
+        print(f"{name} → Accuracy: {_with_ci(res, 'Accuracy', '.3f')}, F1: {_with_ci(res, 'F1', '.3f')}, "
+              f"AUC: {_with_ci(res, 'AUC', '.3f')}, top-decile lift: {_with_ci(res, 'TopDecileLift', '.2f')}, "
+              f"fit: {res['FitTime']:.1f}s, size: {res['ModelSizeMB']:.1f} MB")
+
+    res = cls_results[frequency_model]
+    print(f"\n📊 {frequency_model} claim rate by predicted decile:")
+    print(res["Deciles"].to_string())
+    if "ActualVsExpected" in res:
+        print(f"\n📊 {frequency_model} actual vs expected claims by {SEGMENT_COL}:")
+        print(res["ActualVsExpected"].to_string())
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train and compare the claim models.")
+    parser.add_argument("--profile", choices=PROFILES, default="default",
+                        help="'fast' uses hist XGBoost with early stopping, capped forests and HistGradientBoosting")
+    parser.add_argument("--shap-samples", type=int, default=50_000, help="policies explained per model")
+    parser.add_argument("--shap-mode", choices=SHAP_MODES, default="approx",
+                        help="'exact' TreeSHAP is slow on deep forests; 'approx' scales to large samples")
+    parser.add_argument("--no-cache", action="store_true", help="recompute every stage, ignoring the artifact store")
+    parser.add_argument("--cache-size-gb", type=float, default=DEFAULT_MAX_BYTES / 1024 ** 3,
+                        help="artifact store size before least recently used entries are evicted")
+    parser.add_argument("--out-of-core", action="store_true",
+                        help="stream batches of the processed data (SGD and external-memory XGBoost) "
+                             "instead of building the feature matrix in memory")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="rows per batch with --out-of-core (default: src.out_of_core.BATCH_SIZE)")
+    parser.add_argument("--bootstrap", type=int, default=DEFAULT_BOOTSTRAP,
+                        help="bootstrap replicates for the metric confidence intervals (0 to skip)")
+    return parser.parse_args()
+
+
+@traced(name="run_task_4")
+def main(profile="default", use_cache=True, cache_size_gb=DEFAULT_MAX_BYTES / 1024 ** 3,
+         shap_samples=50_000, shap_mode="approx", n_bootstrap=DEFAULT_BOOTSTRAP):
+    MODELS_DIR.mkdir(exist_ok=True)
+    store = ArtifactStore(max_bytes=int(cache_size_gb * 1024 ** 3))
+
+    def cached(key, compute):
+        if use_cache:
+            # One lookup: a separate `key in store` check could race with LRU eviction
+            missed = []
+            value = store.cached(key, lambda: missed.append(key) or compute())
+            if not missed:
+                print(f"♻️ {key.split('-')[0]}: loaded from the artifact store")
+            return value
+        return store.put(key, compute())
+
+    # Each stage is keyed by its inputs and its code (STAGE_MODULES); unchanged stages load from the store
+    clean_key = stage_key("clean", data_fingerprint(PROCESSED_PARQUET_PATH), CLEAN_STRATEGIES)
+    df_clean, imputer = cached(clean_key, lambda: fit_clean_and_impute(load_processed()))
+    save_imputer(imputer, MODELS_DIR / IMPUTER_FILE)
+
+
+    # Encode once; both tasks select their rows from the same sparse matrix
+    features_key = stage_key("features", clean_key, high_card_cols)
+    X, encoder = cached(features_key, lambda: build_feature_matrix(df_clean, high_card_cols))
+    encoder.save(MODELS_DIR / ENCODER_FILE)
+
+
+    (X_train_sev, X_test_sev, y_train_sev, y_test_sev), sev_mask = prepare_severity_data(df_clean, X)
+
+
+    X_train_cls, X_test_cls, y_train_cls, y_test_cls = prepare_classification_data(df_clean, X)
+
+
+    # Fit both suites concurrently; cores are split between the six models
+    suites = {
+        "regression": (regression_models(profile), X_train_sev, y_train_sev),
+        "classification": (classification_models(profile), X_train_cls, y_train_cls),
+    }
+    models_key = stage_key("models", features_key, {suite: models for suite, (models, _, _) in suites.items()})
+    fitted, fit_stats = cached(models_key, lambda: train_model_suites(suites))
+    reg_models, cls_models = fitted["regression"], fitted["classification"]
+    # The quoting service (src/services/quoting.py) serves these two models
+    joblib.dump(cls_models["XGBoost"], MODELS_DIR / FREQUENCY_MODEL_FILE)
+    joblib.dump(reg_models["RandomForest"], MODELS_DIR / SEVERITY_MODEL_FILE)
+    # Spread of the held-out claims around the severity predictions, for the loss simulation
+    save_severity_distribution(fit_severity_distribution(y_test_sev, reg_models["RandomForest"].predict(X_test_sev)),
+                               MODELS_DIR / SEVERITY_DISTRIBUTION_FILE)
+
+    print("⏱️ Training time / peak memory:")
+    for suite, suite_stats in fit_stats.items():
+        for name, stats in suite_stats.items():
+            print(f"{suite}/{name} → {stats['fit_time_s']:.1f}s, "
+                  f"peak {stats.get('peak_memory_mb', float('nan')):.0f} MB (+{stats.get('fit_memory_mb', float('nan')):.0f} MB in fit)")
+
+
+    segments = lambda y_test: df_clean.loc[y_test.index, SEGMENT_COL].to_numpy()
+    evaluation_key = stage_key("evaluation", models_key, {"bootstrap": n_bootstrap, "segment": SEGMENT_COL})
+    reg_results, cls_results = cached(evaluation_key, lambda: (
+        evaluate_regression(reg_models, X_test_sev, y_test_sev, fit_stats["regression"],
+                            segments(y_test_sev), n_bootstrap),
+        evaluate_classification(cls_models, X_test_cls, y_test_cls, fit_stats["classification"],
+                                segments(y_test_cls), n_bootstrap),
+    ))
+    save_model_metrics(reg_results, cls_results, profile)
+
+
+
+    # Price the held-out policies: both models score the same rows, batch by batch
+    test_policies = df_clean.loc[y_test_cls.index]
+    premiums = price_portfolio(test_policies, encoder, cls_models["XGBoost"], reg_models["RandomForest"],
+                               loading_factor=1.2)
+
+
+    plt.figure(figsize=(8, 4))
+    plt.hist(premiums["OptimizedPremium"], bins=40, color='dodgerblue', edgecolor='black')
+    plt.title("📈 Risk-Based Premium Distribution")
+    plt.xlabel("Estimated Premium (Rand)")
+    plt.ylabel("Number of Policies")
+    plt.grid(True)
+    plt.tight_layout()
+    plt.show()
+
+
+    print_results(reg_results, cls_results, f"{profile} profile")
+
+
+
+    # SHAP values over a (claim-stratified) sample, persisted in the store next to the models
+    explanations = [
+        ("Claim Severity", "RandomForest", reg_models, X_train_sev, None, "shap_severity_randomforest.png"),
+        ("Claim Probability", "XGBoost", cls_models, X_train_cls, y_train_cls, "shap_claim_probability_xgboost.png"),
+    ]
+    for title, name, models, X_train, strata, figure in explanations:
+        explanation = explain_model(models[name], X_train, encoder.feature_names_, strata=strata,
+                                    n_samples=shap_samples, mode=shap_mode, store=store,
+                                    model_key=f"{models_key}:{title}:{name}")
+        print(f"\n🧠 SHAP Summary: {title} ({name}, {len(explanation['rows'])} policies, {shap_mode})")
+        print(explanation["importance"].head(10).to_string())
+        plot_shap_summary(explanation["shap_values"], X_train[explanation["rows"]],
+                          feature_names=encoder.feature_names_, output_path=FIGURES_DIR / figure)
+
+
+    cls_df = pd.DataFrame({name: _scalars(res) for name, res in cls_results.items()}).T.reset_index().rename(columns={"index": "Model"})
+    cls_df[["Accuracy", "F1"]] = cls_df[["Accuracy", "F1"]].astype(float)
+
+    cls_df.plot(x="Model", y=["Accuracy", "F1"], kind="bar", figsize=(8, 4), colormap="viridis")
+    plt.title("🔸 Classification Model Comparison")
+    plt.ylabel("Score")
+    plt.xticks(rotation=0)
+    plt.grid(True, axis='y')
+    plt.tight_layout()
+    plt.show()
+
+
+    reg_df = pd.DataFrame({name: _scalars(res) for name, res in reg_results.items()}).T.reset_index().rename(columns={"index": "Model"})
+
+    fig, ax = plt.subplots(1, 2, figsize=(12, 4))
+    reg_df.plot(x="Model", y="RMSE", kind="bar", ax=ax[0], color='salmon', legend=False)
+    reg_df.plot(x="Model", y="R2", kind="bar", ax=ax[1], color='seagreen', legend=False)
+
+    ax[0].set_title("RMSE Comparison (Lower is Better)")
+    ax[1].set_title("R² Comparison (Higher is Better)")
+    for a in ax:
+        a.set_xlabel("Model")
+        a.grid(True, axis='y')
+
+    plt.tight_layout()
+    plt.show()
+
+
+@traced(name="run_task_4_out_of_core")
+def main_out_of_core(batch_size=None, n_bootstrap=DEFAULT_BOOTSTRAP):
+    """
+    Trains and evaluates from batches of the processed data, so memory stays bounded by the
+    batch size rather than the dataset. SHAP and the comparison plots need the in-memory mode.
+    """
+    MODELS_DIR.mkdir(exist_ok=True)
+    batch_size = batch_size or out_of_core.BATCH_SIZE
+    encoder, reg_models, cls_models, fit_stats = out_of_core.train_out_of_core(PROCESSED_PARQUET_PATH, high_card_cols,
+                                                                               batch_size)
+    encoder.save(MODELS_DIR / ENCODER_FILE)
+    # Replaces the in-memory run's imputer: these models were trained with the encoder's medians
+    save_imputer(out_of_core.training_imputer(encoder), MODELS_DIR / IMPUTER_FILE)
+    joblib.dump(cls_models["XGBoost"], MODELS_DIR / FREQUENCY_MODEL_FILE)
+    joblib.dump(reg_models["XGBoost"], MODELS_DIR / SEVERITY_MODEL_FILE)
+
+    test_batches = lambda task: out_of_core.iter_training_batches(encoder, task, "test", PROCESSED_PARQUET_PATH, batch_size,
+                                                      segment_col=SEGMENT_COL)
+    # Spread of the held-out claims around the saved severity model's predictions, for the loss simulation
+    y_sev, pred_sev = zip(*((y, reg_models["XGBoost"].predict(X)) for X, y, _ in test_batches("severity")))
+    save_severity_distribution(fit_severity_distribution(np.concatenate(y_sev), np.concatenate(pred_sev)),
+                               MODELS_DIR / SEVERITY_DISTRIBUTION_FILE)
+    reg_results = evaluate_regression_batches(reg_models, test_batches("severity"), fit_stats["regression"],
+                                              n_bootstrap=n_bootstrap)
+    cls_results = evaluate_classification_batches(cls_models, test_batches("classification"),
+                                                  fit_stats["classification"], n_bootstrap=n_bootstrap)
+    save_model_metrics(reg_results, cls_results, "out-of-core")
+    print_results(reg_results, cls_results, "out-of-core")
+
+
+# The guard is required: the training pool spawns worker processes that re-import this module
+if __name__ == "__main__":
+    args = parse_args()
+    if args.out_of_core:
+        main_out_of_core(args.batch_size, args.bootstrap)
+    else:
+        main(args.profile, use_cache=not args.no_cache, cache_size_gb=args.cache_size_gb,
+             shap_samples=args.shap_samples, shap_mode=args.shap_mode, n_bootstrap=args.bootstrap)
+    # PIPELINE_TRACE=1 records per-stage time and memory (see src/core/tracing.py)
+    if is_enabled():
+        print(f"🧭 Stage trace: {trace_file()}")
+        print(format_trace_summary(read_trace()))
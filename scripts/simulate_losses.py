@@ -0,0 +1,67 @@
+"""
+Monte Carlo portfolio losses from the models saved by run_task_4.py (models/): every policy
+claims with its predicted probability and a claim costs a draw around its predicted severity.
+Saves the VaR / TVaR table per segment and, optionally, the simulated losses per scenario.
+
+    python scripts/simulate_losses.py                                 # 100,000 scenarios per Province
+    python scripts/simulate_losses.py --scenarios 500000 --segment VehicleType --losses-output reports/losses.parquet
+"""
+import argparse
+import sys, pathlib
+ROOT_DIR = pathlib.Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+import joblib
+
+from src.data_loader import (PROCESSED_PARQUET_PATH, MODELS_DIR, ENCODER_FILE, FREQUENCY_MODEL_FILE, IMPUTER_FILE,
+                             SEVERITY_MODEL_FILE, SEVERITY_DISTRIBUTION_FILE)
+from src.imputation import load_imputer
+from src.optimization import DEFAULT_BATCH_SIZE
+from src.preprocessing import FeatureEncoder
+from src.simulation import DEFAULT_SCENARIOS, SCENARIO_BLOCK, load_severity_distribution, simulate_portfolio
+from scripts.price_policies import read_policies
+
+OUTPUT_PATH = ROOT_DIR / "reports" / "loss_risk_measures.csv"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Simulate portfolio losses with the saved frequency/severity models.")
+    parser.add_argument("--input", type=pathlib.Path, default=PROCESSED_PARQUET_PATH,
+                        help="Parquet dataset or file, or a CSV with the processed columns")
+    parser.add_argument("--output", type=pathlib.Path, default=OUTPUT_PATH, help="VaR / TVaR table (CSV)")
+    parser.add_argument("--losses-output", type=pathlib.Path, default=None,
+                        help="also save the losses per scenario and segment (Parquet)")
+    parser.add_argument("--models-dir", type=pathlib.Path, default=MODELS_DIR)
+    parser.add_argument("--segment", default="Province", help="column to aggregate losses by")
+    parser.add_argument("--scenarios", type=int, default=DEFAULT_SCENARIOS)
+    parser.add_argument("--block-size", type=int, default=SCENARIO_BLOCK, help="scenarios per worker task")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+def main(args):
+    imputer_path = args.models_dir / IMPUTER_FILE
+    imputer = load_imputer(imputer_path) if imputer_path.exists() else None
+    distribution = load_severity_distribution(args.models_dir / SEVERITY_DISTRIBUTION_FILE)
+    losses, measures = simulate_portfolio(
+        read_policies(args.input, args.batch_size),
+        FeatureEncoder.load(args.models_dir / ENCODER_FILE),
+        joblib.load(args.models_dir / FREQUENCY_MODEL_FILE),
+        joblib.load(args.models_dir / SEVERITY_MODEL_FILE),
+        distribution, segment_col=args.segment, n_scenarios=args.scenarios, block_size=args.block_size,
+        imputer=imputer, batch_size=args.batch_size, n_jobs=args.n_jobs, random_state=args.seed,
+    )
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    measures.to_csv(args.output)
+    if args.losses_output:
+        args.losses_output.parent.mkdir(parents=True, exist_ok=True)
+        losses.to_parquet(args.losses_output)
+    print(measures.round(0).to_string())
+    print(f"✅ {args.scenarios:,} scenarios, risk measures -> {args.output}")
+
+
+# The guard is required: simulation blocks run in worker processes that re-import this module
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,71 @@
+"""
+Successive-halving hyperparameter search for the frequency (claim or not) and severity (claim
+amount) models: RandomForest, XGBoost and the linear baselines. Trials are logged to
+reports/tuning/<task>_trials.jsonl, so an interrupted search resumes where it stopped; the best
+configurations go to reports/tuning/best_params.json, used by `run_task_4.py --profile tuned`.
+
+    python scripts/tune_models.py --task frequency --candidates 27 --min-rows 20000
+    python scripts/tune_models.py --task severity --models XGBoost RandomForest
+"""
+import argparse
+import sys, pathlib
+ROOT_DIR = pathlib.Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from src.core.artifacts import ArtifactStore, data_fingerprint, stage_key
+from src.data_loader import PROCESSED_PARQUET_PATH, load_processed
+from src.cleaning import CLEAN_STRATEGIES, fit_clean_and_impute
+from src.preprocessing import build_feature_matrix, prepare_classification_data, prepare_severity_data
+from src.tuning import ETA, MIN_ROWS, TASKS, TUNING_DIR, best_params, save_best_params, successive_halving
+
+# Same high-cardinality exclusions as scripts/run_task_4.py
+high_card_cols = ["PolicyID", "PolicyCode", "PostalCode", "Model", "make"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Tune the claim models with successive halving.")
+    parser.add_argument("--task", choices=TASKS + ("both",), default="both")
+    parser.add_argument("--models", nargs="+", help="model names to tune (default: all of the task)")
+    parser.add_argument("--candidates", type=int, default=9, help="configurations sampled per model")
+    parser.add_argument("--min-rows", type=int, default=MIN_ROWS, help="training rows of the first rung")
+    parser.add_argument("--eta", type=int, default=ETA, help="row growth and 1 / survival rate per rung")
+    parser.add_argument("--n-jobs", type=int, default=None, help="trial processes (default: all cores)")
+    parser.add_argument("--fresh", action="store_true", help="discard the trial log instead of resuming")
+    return parser.parse_args()
+
+
+def main(args):
+    # Cleaning and encoding load from the artifact store when run_task_4.py already computed them
+    store = ArtifactStore()
+    clean_key = stage_key("clean", data_fingerprint(PROCESSED_PARQUET_PATH), CLEAN_STRATEGIES)
+    df_clean, _ = store.get(clean_key) if clean_key in store else store.put(clean_key, fit_clean_and_impute(load_processed()))
+    features_key = stage_key("features", clean_key, high_card_cols)
+    X, encoder = (store.get(features_key) if features_key in store
+                  else store.put(features_key, build_feature_matrix(df_clean, high_card_cols)))
+
+    # Only the training split is searched; the test split stays untouched for run_task_4.py
+    (X_train_sev, _, y_train_sev, _), _ = prepare_severity_data(df_clean, X)
+    X_train_cls, _, y_train_cls, _ = prepare_classification_data(df_clean, X)
+    data = {"frequency": (X_train_cls, y_train_cls), "severity": (X_train_sev, y_train_sev)}
+
+    for task in (TASKS if args.task == "both" else (args.task,)):
+        log_path = TUNING_DIR / f"{task}_trials.jsonl"
+        if args.fresh:
+            log_path.unlink(missing_ok=True)
+        X_task, y_task = data[task]
+        print(f"🔎 Tuning {task} on {X_task.shape[0]:,} rows (log: {log_path})")
+        leaderboard = successive_halving(task, X_task, y_task, n_candidates=args.candidates, min_rows=args.min_rows,
+                                         eta=args.eta, models=args.models, n_jobs=args.n_jobs, log_path=log_path,
+                                         data_key=features_key)
+        metric = "AUC" if task == "frequency" else "-RMSE"
+        print(leaderboard[["model", "n_rows", "score", "fit_time_s", "peak_memory_mb"]]
+              .rename(columns={"score": metric}).head(15).to_string())
+        best = best_params(leaderboard)
+        print(f"✅ Best {task} params saved to {save_best_params(task, best)}")
+        for name, params in best.items():
+            print(f"   {name}: {params}")
+
+
+# The guard is required: the trial pool spawns worker processes that re-import this module
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,22 @@
+"""
+Insurance risk analytics pipeline. Submodules are imported on first access (`src.models`,
+`src.optimization`, ...), so `import src` and `python -m src --help` load no third-party
+packages; see src/cli.py for the command line.
+"""
+import importlib
+
+SUBMODULES = (
+    "cleaning", "cli", "data_loader", "evaluation", "imputation", "interpretability", "models",
+    "optimization", "out_of_core", "policy_aggregates", "preprocessing", "schema", "summary_stats",
+    "tuning", "core", "scripts", "services", "utils",
+)
+
+
+def __getattr__(name):
+    if name in SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(SUBMODULES))
@@ -0,0 +1,5 @@
+from src.cli import main
+
+# The guard keeps spawned worker processes, which re-import the main module, from re-running the command
+if __name__ == "__main__":
+    main()
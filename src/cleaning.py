@@ -1,10 +1,43 @@
 import pandas as pd
-from sklearn.impute import SimpleImputer
-
-def clean_and_impute(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    num_cols = df.select_dtypes(include=['float64', 'int64']).columns
-    df[num_cols] = SimpleImputer(strategy='median').fit_transform(df[num_cols])
-    cat_cols = df.select_dtypes(include=['object', 'bool']).columns
-    df[cat_cols] = df[cat_cols].fillna('Missing')
-    return df
\ No newline at end of file
+
+from src.core.tracing import traced
+from src.imputation import apply_imputer, fit_imputer
+
+# Strategies of clean_and_impute by kind of column: numeric gaps get the column median (0 for
+# columns with no values, as SimpleImputer(keep_empty_features=True) did), text, categorical
+# and Yes/No gaps a 'Missing' level
+CLEAN_STRATEGIES = {
+    "numeric": {"strategy": "median", "fallback": 0.0},
+    "categorical": {"strategy": "constant", "value": "Missing"},
+}
+
+CATEGORICAL_DTYPES = ['object', 'string', 'category', 'boolean']
+
+def imputation_spec(df: pd.DataFrame) -> dict:
+    """The imputation spec of clean_and_impute for the columns of df (see CLEAN_STRATEGIES)."""
+    spec = {col: CLEAN_STRATEGIES["numeric"] for col in df.select_dtypes(include='number').columns}
+    spec.update({col: CLEAN_STRATEGIES["categorical"] for col in df.select_dtypes(include=CATEGORICAL_DTYPES).columns})
+    return spec
+
+@traced
+def clean_and_impute(df: pd.DataFrame, imputer=None) -> pd.DataFrame:
+    """
+    Fills numeric gaps with column medians and categorical ones with a 'Missing' level, in
+    place. The statistics are fitted on df unless an imputer from
+    fit_imputer(df, imputation_spec(df)) is given, e.g. the training one saved by run_task_4.
+    """
+    if imputer is None:
+        imputer = fit_imputer(df, imputation_spec(df))
+    return apply_imputer(df, imputer)
+
+@traced
+def fit_clean_and_impute(df: pd.DataFrame):
+    """clean_and_impute, also returning its fitted imputer so new data can be imputed the same way."""
+    imputer = fit_imputer(df, imputation_spec(df))
+    return clean_and_impute(df, imputer), imputer
+
+@traced
+def fill_missing_categories(df: pd.DataFrame) -> pd.DataFrame:
+    """Fills missing text, categorical and Yes/No values with a 'Missing' level (in place)."""
+    spec = {col: CLEAN_STRATEGIES["categorical"] for col in df.select_dtypes(include=CATEGORICAL_DTYPES).columns}
+    return apply_imputer(df, fit_imputer(df, spec))
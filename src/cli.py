@@ -0,0 +1,44 @@
+"""
+Command line of the pipeline:
+
+    python -m src clean [--chunksize N] [--incremental]     # src/scripts/run_cleaning.py
+    python -m src test                                      # scripts/run_hypothesis_tests.py
+    python -m src train [--profile fast] [--out-of-core]    # scripts/run_task_4.py
+    python -m src price [--input policies.csv]              # scripts/price_policies.py
+    python -m src simulate [--scenarios N] [--segment col]  # scripts/simulate_losses.py
+
+Each subcommand runs its script as __main__ with the remaining arguments (`python -m src
+train --help` shows the training options). Only argparse is imported before a subcommand
+runs, so `--help` returns without loading pandas, scikit-learn or the plotting stack.
+"""
+import argparse
+import runpy
+import sys
+
+# Subcommand: (module run as __main__, help)
+COMMANDS = {
+    "clean": ("src.scripts.run_cleaning", "clean the raw extract into the processed Parquet store"),
+    "test": ("scripts.run_hypothesis_tests", "run the risk hypothesis tests on the processed data"),
+    "train": ("scripts.run_task_4", "train, evaluate and explain the frequency/severity models"),
+    "price": ("scripts.price_policies", "price policies with the saved models"),
+    "simulate": ("scripts.simulate_losses", "simulate portfolio losses and VaR/TVaR with the saved models"),
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m src", description="Insurance risk analytics pipeline.")
+    subparsers = parser.add_subparsers(dest="command", required=True, metavar="{" + ",".join(COMMANDS) + "}")
+    for name, (_, help_text) in COMMANDS.items():
+        # Options are left to the script's own parser
+        subparsers.add_parser(name, help=help_text, add_help=False)
+    return parser
+
+
+def main(argv=None):
+    args, rest = build_parser().parse_known_args(argv)
+    from config.settings import load_env
+    load_env()
+    module = COMMANDS[args.command][0]
+    # alter_sys makes the script the __main__ module, so spawned workers can re-import it
+    sys.argv = [module.replace(".", "/") + ".py", *rest]
+    runpy.run_module(module, run_name="__main__", alter_sys=True)
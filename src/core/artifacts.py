@@ -0,0 +1,153 @@
+import functools
+import hashlib
+import importlib.util
+import json
+import os
+import pathlib
+
+import joblib
+import numpy as np
+
+from src.data_loader import ROOT_DIR
+
+# Default location and size budget of the on-disk artifact store
+ARTIFACTS_DIR = ROOT_DIR / ".artifacts"
+DEFAULT_MAX_BYTES = 5 * 1024 ** 3
+
+# Bumped to invalidate every cached artifact (e.g. after a change to the store format)
+CACHE_VERSION = 1
+
+# Source modules whose code decides each stage's artifact; editing one invalidates the stage
+# (and, through the chained keys, every stage after it)
+STAGE_MODULES = {
+    "clean": ("src.cleaning", "src.imputation", "src.schema", "src.data_loader"),
+    "features": ("src.preprocessing",),
+    "models": ("src.models",),
+    "evaluation": ("src.evaluation",),
+    "shap": ("src.interpretability",),
+}
+
+
+# Function to fingerprint a data file or a partitioned dataset directory
+def data_fingerprint(path, chunk_size=1 << 20):
+    """
+    Content hash of a file, or of every file under a directory (e.g. the Province-partitioned
+    Parquet dataset) together with its relative path.
+    """
+    path = pathlib.Path(path)
+    files = sorted(p for p in path.rglob('*') if p.is_file()) if path.is_dir() else [path]
+    digest = hashlib.blake2b(digest_size=16)
+    for file in files:
+        digest.update(str(file.relative_to(path) if path.is_dir() else file.name).encode())
+        with open(file, 'rb') as f:
+            while chunk := f.read(chunk_size):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Function to fingerprint the source code of modules
+@functools.cache
+def code_fingerprint(*modules):
+    """Hash of the source files of the named modules, found without importing them."""
+    digest = hashlib.blake2b(digest_size=16)
+    for module in modules:
+        digest.update(module.encode())
+        digest.update(pathlib.Path(importlib.util.find_spec(module).origin).read_bytes())
+    return digest.hexdigest()
+
+
+def _canonical(obj):
+    # JSON-able, address-free description of configs and estimators, so equal configs hash equally
+    if hasattr(obj, 'get_params'):
+        return {'class': f"{type(obj).__module__}.{type(obj).__qualname__}",
+                'params': _canonical(obj.get_params(deep=False))}
+    if isinstance(obj, dict):
+        return {str(key): _canonical(value) for key, value in sorted(obj.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(obj, (list, tuple)):
+        return [_canonical(value) for value in obj]
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, type) or callable(obj):
+        return f"{getattr(obj, '__module__', '')}.{getattr(obj, '__qualname__', repr(obj))}"
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    return repr(obj)
+
+
+# Function to derive a cache key from the inputs of a stage
+def artifact_key(stage, *parts):
+    """
+    Hashes a stage name with its inputs: data fingerprints, feature configs, model params
+    (estimators are described by class and get_params) or upstream artifact keys.
+    """
+    payload = json.dumps([stage, _canonical(list(parts))], sort_keys=True)
+    return f"{stage}-{hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()}"
+
+
+# Function to derive the cache key of a pipeline stage
+def stage_key(stage, *parts):
+    """artifact_key of a stage's inputs plus CACHE_VERSION and the code of its STAGE_MODULES."""
+    return artifact_key(stage, CACHE_VERSION, code_fingerprint(*STAGE_MODULES.get(stage, ())), *parts)
+
+
+class ArtifactStore:
+    """
+    On-disk, content-addressed store for pipeline artifacts (frames, matrices, models, results).
+    Entries are joblib files named by their key; reads refresh an entry's mtime and writes evict
+    the least recently used entries once the store grows beyond max_bytes.
+    """
+
+    def __init__(self, root=ARTIFACTS_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = pathlib.Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key):
+        return self.root / f"{key}.joblib"
+
+    def __contains__(self, key):
+        return self._path(key).exists()
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            value = joblib.load(path)
+        except FileNotFoundError:
+            return default
+        os.utime(path)  # mark as recently used
+        return value
+
+    def put(self, key, value):
+        path = self._path(key)
+        # Write to a temporary name first so an interrupted run never leaves a truncated entry
+        tmp = path.with_suffix('.tmp')
+        joblib.dump(value, tmp)
+        os.replace(tmp, path)
+        self.evict(keep=key)
+        return value
+
+    def cached(self, key, compute):
+        """Returns the stored artifact for key, computing and storing it on a miss."""
+        value = self.get(key, default=_MISSING)
+        if value is _MISSING:
+            value = self.put(key, compute())
+        return value
+
+    def size(self):
+        return sum(path.stat().st_size for path in self.root.glob('*.joblib'))
+
+    def evict(self, keep=None):
+        """Removes least recently used entries until the store fits in max_bytes."""
+        entries = sorted(self.root.glob('*.joblib'), key=lambda path: path.stat().st_mtime)
+        total = sum(path.stat().st_size for path in entries)
+        for path in entries:
+            if total <= self.max_bytes:
+                break
+            if path.stem == keep:
+                continue
+            total -= path.stat().st_size
+            path.unlink()
+        return total
+
+
+_MISSING = object()
@@ -0,0 +1,24 @@
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Stand-in for a module that is imported on first attribute access."""
+
+    def __getattr__(self, attr):
+        return getattr(importlib.import_module(self.__name__), attr)
+
+    def __repr__(self):
+        state = "loaded" if self.__name__ in sys.modules else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+# Function to defer a heavy import (shap, xgboost, matplotlib, seaborn) until it is used
+def lazy_import(name):
+    """
+    Returns the module if it is already imported, else a LazyModule that imports it when one
+    of its attributes is first used, e.g. `plt = lazy_import("matplotlib.pyplot")` at module
+    level costs nothing until a plotting function calls `plt.figure()`.
+    """
+    return sys.modules.get(name) or LazyModule(name)
@@ -0,0 +1,316 @@
+import atexit
+import collections
+import cProfile
+import functools
+import json
+import os
+import pathlib
+import sys
+import threading
+import time
+
+# Project root, computed here rather than imported from src.data_loader (which loads pyarrow)
+ROOT_DIR = pathlib.Path(__file__).resolve().parents[2]
+
+# PIPELINE_TRACE=1 (or a directory) records every traced stage; PIPELINE_PROFILE=<stage> profiles
+# that stage with cProfile, or with a stack sampler when PIPELINE_PROFILE_MODE=sample
+TRACE_ENV = "PIPELINE_TRACE"
+PROFILE_ENV = "PIPELINE_PROFILE"
+PROFILE_MODE_ENV = "PIPELINE_PROFILE_MODE"
+# Run id shared with worker processes through the environment, so they append to the same trace
+RUN_ENV = "PIPELINE_TRACE_RUN"
+TRACES_DIR = ROOT_DIR / "reports" / "traces"
+
+_config = {"enabled": False, "trace_dir": None, "profile": None, "profile_mode": "cprofile", "run_id": None}
+_local = threading.local()
+_write_lock = threading.Lock()
+
+
+def _rss_mb():
+    """Current resident memory in MB, from /proc (None where unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class MemorySampler:
+    """Polls the resident memory in a background thread; peak_mb is the increase over the start."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak_mb = None
+
+    def __enter__(self):
+        self._start = _rss_mb()
+        self._peak = self._start
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._poll, daemon=True)
+        if self._start is not None:
+            self._thread.start()
+        return self
+
+    def _poll(self):
+        while not self._stop.wait(self.interval):
+            self._peak = max(self._peak, _rss_mb())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._start is not None:
+            self._thread.join()
+            self._peak = max(self._peak, _rss_mb())
+            self.peak_mb = self._peak - self._start
+        return False
+
+
+class StackSampler:
+    """Samples the call stack of one thread at a fixed interval and counts collapsed stacks."""
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = collections.Counter()
+
+    def __enter__(self):
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._poll, daemon=True)
+        self._thread.start()
+        return self
+
+    def _poll(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{pathlib.Path(code.co_filename).stem}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+    def write(self, path):
+        # Collapsed-stack format, readable by flamegraph.pl and speedscope
+        lines = [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+        pathlib.Path(path).write_text("\n".join(lines) + "\n")
+        return path
+
+
+# Function to switch tracing on or off
+def configure(trace_dir=None, profile=None, profile_mode="cprofile"):
+    """
+    Enables tracing into trace_dir (trace-<run id>.jsonl, plus a Chrome trace at exit) and/or
+    profiling of the stage named profile. With neither, tracing is disabled.
+    """
+    if profile_mode not in ("cprofile", "sample"):
+        raise ValueError("profile_mode must be 'cprofile' or 'sample'")
+    trace_dir = pathlib.Path(trace_dir) if trace_dir is not None else None
+    if trace_dir is None and profile:
+        trace_dir = TRACES_DIR
+    run_id = None
+    if trace_dir is not None:
+        trace_dir.mkdir(parents=True, exist_ok=True)
+        run_id = os.environ.get(RUN_ENV) or f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        os.environ[RUN_ENV] = run_id
+    _config.update(enabled=trace_dir is not None, trace_dir=trace_dir, profile=profile or None,
+                   profile_mode=profile_mode, run_id=run_id)
+
+
+def configure_from_env():
+    trace = os.environ.get(TRACE_ENV, "")
+    trace_dir = None if trace in ("", "0") else (TRACES_DIR if trace == "1" else trace)
+    configure(trace_dir, os.environ.get(PROFILE_ENV) or None, os.environ.get(PROFILE_MODE_ENV, "cprofile"))
+
+
+def is_enabled():
+    return _config["enabled"]
+
+
+def trace_file():
+    """JSON-lines trace of the current run (None while tracing is disabled)."""
+    if not _config["enabled"]:
+        return None
+    return _config["trace_dir"] / f"trace-{_config['run_id']}.jsonl"
+
+
+def _shape(obj):
+    # (rows, bytes) of a frame, array or sparse matrix; the first element of a tuple result
+    if isinstance(obj, (tuple, list)) and obj and not isinstance(obj[0], (tuple, list)):
+        obj = obj[0]
+    shape = getattr(obj, "shape", None)
+    if not shape:
+        return None, None
+    if hasattr(obj, "memory_usage"):
+        usage = obj.memory_usage(index=False)
+        size = int(usage.sum() if hasattr(usage, "sum") else usage)
+    elif hasattr(obj, "data") and hasattr(obj, "indices"):
+        size = obj.data.nbytes + obj.indices.nbytes + obj.indptr.nbytes
+    else:
+        size = getattr(obj, "nbytes", None)
+    return int(shape[0]), size
+
+
+def _first_shaped(args):
+    for arg in args:
+        rows, size = _shape(arg)
+        if rows is not None:
+            return rows, size
+    return None, None
+
+
+def _write_event(event):
+    with _write_lock, open(trace_file(), "a") as f:
+        f.write(json.dumps(event, default=str) + "\n")
+
+
+# Context manager to trace a block; traced() wraps function calls in it
+class stage:
+    """
+    Traces a block: `with stage("load", df) as span: span.result = ...`. Rows and sizes are
+    taken from the first frame/array in args and from span.result, when set. Records wall and
+    CPU time, peak memory delta and, for the stage named in PIPELINE_PROFILE, a profile.
+    """
+
+    def __init__(self, name, args=()):
+        self.name = name
+        self.args = args
+        self.result = None
+        self._active = False
+
+    def __enter__(self):
+        if not _config["enabled"]:
+            return self
+        self._active = True
+        if not hasattr(_local, "stack"):
+            _local.stack = []
+        self._event = {"name": self.name, "pid": os.getpid(), "tid": threading.get_ident(),
+                       "parent": _local.stack[-1] if _local.stack else None, "start": time.time()}
+        self._event["rows_in"], self._event["bytes_in"] = _first_shaped(self.args)
+        _local.stack.append(self.name)
+
+        # One profiler at a time per thread, e.g. when a profiled stage calls itself
+        self._profiler = self._sampler = None
+        if _config["profile"] == self.name and not getattr(_local, "profiling", False):
+            _local.profiling = True
+            if _config["profile_mode"] == "cprofile":
+                self._profiler = cProfile.Profile()
+                self._profiler.enable()
+            else:
+                self._sampler = StackSampler(threading.get_ident()).__enter__()
+        self._memory = MemorySampler().__enter__()
+        self._wall, self._cpu = time.perf_counter(), time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self._active:
+            return False
+        event = self._event
+        event["wall_s"] = time.perf_counter() - self._wall
+        event["cpu_s"] = time.process_time() - self._cpu
+        self._memory.__exit__(None, None, None)
+        event["peak_memory_delta_mb"] = self._memory.peak_mb
+        event["rows_out"], event["bytes_out"] = _shape(self.result)
+        if exc_type is not None:
+            event["error"] = exc_type.__name__
+        _local.stack.pop()
+
+        if self._profiler is not None or self._sampler is not None:
+            _local.profiling = False
+            path = _config["trace_dir"] / f"profile-{self.name}-{os.getpid()}-{int(event['start'] * 1000)}"
+            if self._profiler is not None:
+                self._profiler.disable()
+                path = path.with_suffix(".prof")
+                self._profiler.dump_stats(path)
+            else:
+                self._sampler.__exit__(None, None, None)
+                path = self._sampler.write(path.with_suffix(".folded"))
+            event["profile"] = str(path)
+        _write_event(event)
+        return False
+
+
+# Decorator to trace a pipeline stage
+def traced(func=None, *, name=None):
+    """
+    Traces every call of func as a stage (see stage) when tracing is enabled. Disabled, the
+    wrapper only checks a flag before calling func. The stage is named after the function's
+    qualified name unless name is given.
+    """
+    if func is None:
+        return functools.partial(traced, name=name)
+    stage_name = name or func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _config["enabled"]:
+            return func(*args, **kwargs)
+        with stage(stage_name, args) as span:
+            span.result = func(*args, **kwargs)
+        return span.result
+
+    return wrapper
+
+
+# Function to read the recorded stage events
+def read_trace(path=None):
+    path = pathlib.Path(path or trace_file())
+    if not path.exists():
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# Function to export the recorded stages in the Chrome trace event format
+def export_chrome_trace(path=None, output_path=None):
+    """
+    Converts a JSON-lines trace (all processes of a run; the current run by default) into a
+    Chrome trace file next to it, viewable in chrome://tracing or Perfetto. Returns its path.
+    """
+    path = pathlib.Path(path or trace_file())
+    events = [{
+        "name": event["name"], "cat": "stage", "ph": "X",
+        "ts": event["start"] * 1e6, "dur": event["wall_s"] * 1e6,
+        "pid": event["pid"], "tid": event["tid"],
+        "args": {key: value for key, value in event.items()
+                 if key not in ("name", "start", "wall_s", "pid", "tid")},
+    } for event in read_trace(path)]
+    output_path = pathlib.Path(output_path or path.with_suffix(".json"))
+    output_path.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}))
+    return output_path
+
+
+# Function to summarize a trace per stage
+def format_trace_summary(events, top=15):
+    """
+    Text table of the stages with the most wall time: calls, total wall and CPU seconds,
+    largest peak memory delta and largest input in rows.
+    """
+    totals = {}
+    for event in events:
+        row = totals.setdefault(event["name"], {"calls": 0, "wall": 0.0, "cpu": 0.0, "memory": 0.0, "rows": 0})
+        row["calls"] += 1
+        row["wall"] += event["wall_s"]
+        row["cpu"] += event["cpu_s"]
+        row["memory"] = max(row["memory"], event.get("peak_memory_delta_mb") or 0.0)
+        row["rows"] = max(row["rows"], event.get("rows_in") or 0)
+    lines = [f"{'stage':<40}{'calls':>7}{'wall (s)':>10}{'cpu (s)':>10}{'peak (MB)':>11}{'rows in':>12}"]
+    for name, row in sorted(totals.items(), key=lambda item: -item[1]["wall"])[:top]:
+        lines.append(f"{name[:39]:<40}{row['calls']:>7}{row['wall']:>10.2f}{row['cpu']:>10.2f}"
+                     f"{row['memory']:>11.1f}{row['rows']:>12,}")
+    return "\n".join(lines)
+
+
+def _export_at_exit():
+    # Worker processes append to the run's JSON lines; the process that started the run
+    # (its pid ends the run id) writes the Chrome trace
+    if _config["enabled"] and _config["run_id"].endswith(f"-{os.getpid()}") and trace_file().exists():
+        export_chrome_trace()
+
+
+configure_from_env()
+atexit.register(_export_at_exit)
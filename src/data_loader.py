@@ -0,0 +1,141 @@
+import pathlib
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from src.schema import apply_schema
+
+# Project root, so paths resolve the same from scripts, notebooks and DVC stages
+ROOT_DIR = pathlib.Path(__file__).resolve().parents[1]
+
+RAW_DATA_PATH = ROOT_DIR / "data" / "raw" / "insurance_data.csv"
+PROCESSED_PARQUET_PATH = ROOT_DIR / "data" / "processed" / "insurance_data_cleaned.parquet"
+PROCESSED_CSV_PATH = ROOT_DIR / "data" / "processed" / "insurance_data_cleaned.csv"
+
+# Imputation counts, policy codes and running summary of incremental ingestion
+INGESTION_STATE_PATH = ROOT_DIR / "data" / "processed" / "ingestion_state.joblib"
+
+# Fitted artifacts written by scripts/run_task_4.py and loaded for scoring and the quoting service
+MODELS_DIR = ROOT_DIR / "models"
+ENCODER_FILE = "feature_encoder.joblib"
+FREQUENCY_MODEL_FILE = "frequency_model.joblib"
+SEVERITY_MODEL_FILE = "severity_model.joblib"
+# Imputation statistics of the training data (src/imputation.py), for batch scoring of raw rows
+IMPUTER_FILE = "imputation.joblib"
+# Claim amount dispersion around the severity predictions (src/simulation.py), for loss simulation
+SEVERITY_DISTRIBUTION_FILE = "severity_distribution.json"
+
+# The processed dataset is partitioned by province so downstream stages can skip partitions
+PARTITION_COLS = ['Province']
+
+
+# Function to map a pandas dtype to the Arrow type stored in the processed dataset
+def arrow_type(dtype):
+    """
+    Returns the Arrow type used for a pandas dtype. Text and categorical columns are
+    stored dictionary-encoded so they load back as pandas categoricals.
+    """
+    if isinstance(dtype, pd.CategoricalDtype) and pd.api.types.is_integer_dtype(dtype.categories.dtype):
+        return pa.dictionary(pa.int32(), pa.int64())
+    if isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_object_dtype(dtype) \
+            or pd.api.types.is_string_dtype(dtype):
+        return pa.dictionary(pa.int32(), pa.string())
+    if pd.api.types.is_bool_dtype(dtype):
+        return pa.bool_()
+    # Nullable extension dtypes (Int32, Float64, ...) map through their numpy dtype
+    return pa.from_numpy_dtype(getattr(dtype, 'numpy_dtype', dtype))
+
+
+# Function to build the Arrow schema of a cleaned frame
+def processed_schema(df):
+    """
+    Builds a stable Arrow schema for a cleaned frame. Partition columns are kept as plain strings.
+    """
+    return pa.schema([
+        (col, pa.string() if col in PARTITION_COLS else arrow_type(dtype))
+        for col, dtype in df.dtypes.items()
+    ])
+
+
+# Function to convert a cleaned frame to an Arrow table
+def to_arrow_table(df):
+    """
+    Converts a cleaned frame to an Arrow table with the processed-dataset schema.
+    """
+    df = df.copy()
+    for col, dtype in df.dtypes.items():
+        if col in PARTITION_COLS:
+            df[col] = df[col].astype(object)
+        elif pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+            df[col] = df[col].astype('category')
+    return pa.Table.from_pandas(df, schema=processed_schema(df), preserve_index=False)
+
+
+# Function to write the cleaned data to the processed store
+def save_processed(df, path=PROCESSED_PARQUET_PATH, fmt=None, append=False, part=0):
+    """
+    Saves a cleaned frame as a Province-partitioned Parquet dataset (default) or as CSV.
+    The format is inferred from the path suffix unless fmt is given. With append=True the
+    frame is added to the existing output; part numbers the files so row order is stable.
+    """
+    path = pathlib.Path(path)
+    fmt = fmt or ('csv' if path.suffix == '.csv' else 'parquet')
+    if fmt == 'csv':
+        df.to_csv(path, index=False, mode='a' if append else 'w', header=not append)
+        return path
+
+    if not append and path.exists():
+        shutil.rmtree(path)
+    pq.write_to_dataset(
+        to_arrow_table(df),
+        root_path=str(path),
+        partition_cols=PARTITION_COLS,
+        basename_template=f"part-{part:05d}-{{i}}.parquet",
+    )
+    return path
+
+
+# Function to load the processed dataset
+def load_processed(path=PROCESSED_PARQUET_PATH, columns=None, provinces=None):
+    """
+    Loads the processed dataset, reading only the requested columns and provinces,
+    with the compact dtypes of src/schema.py. A CSV path is read with pandas for
+    backwards compatibility.
+    """
+    path = pathlib.Path(path)
+    if path.suffix == '.csv':
+        df = pd.read_csv(path, usecols=columns)
+        if provinces is not None:
+            df = df[df['Province'].isin(provinces)].reset_index(drop=True)
+        return apply_schema(df)
+
+    filters = [('Province', 'in', list(provinces))] if provinces is not None else None
+    table = pq.read_table(path, columns=columns, filters=filters, partitioning=_partitioning())
+    df = apply_schema(table.to_pandas())
+    return df[columns] if columns is not None else df
+
+
+# Function to stream the processed dataset in batches
+def iter_processed(path=PROCESSED_PARQUET_PATH, columns=None, batch_size=100_000):
+    """
+    Yields the processed dataset as frames of at most batch_size rows, with the compact
+    dtypes of src/schema.py, without loading the whole dataset into memory.
+    """
+    path = pathlib.Path(path)
+    if path.suffix == '.csv':
+        for chunk in pd.read_csv(path, usecols=columns, chunksize=batch_size):
+            yield apply_schema(chunk)
+        return
+
+    dataset = ds.dataset(path, format='parquet', partitioning=_partitioning())
+    for batch in dataset.to_batches(columns=columns, batch_size=batch_size):
+        if batch.num_rows:
+            yield apply_schema(batch.to_pandas())
+
+
+def _partitioning():
+    # Partition values are read back as plain strings (see processed_schema)
+    return ds.partitioning(pa.schema([(col, pa.string()) for col in PARTITION_COLS]), flavor='hive')
@@ -1,23 +1,192 @@
 import numpy as np
-from sklearn.metrics import mean_squared_error, r2_score, accuracy_score, f1_score, classification_report
+import pandas as pd
+from joblib import Parallel, delayed
 
-def evaluate_regression(models, X_test, y_test):
-    results = {}
-    for name, model in models.items():
-        preds = model.predict(X_test)
-        results[name] = {
-            "RMSE": np.sqrt(mean_squared_error(y_test, preds)),
-            "R2": r2_score(y_test, preds)
-        }
+from src.core.tracing import traced
+
+# Bootstrap replicates run_task_4 uses for the confidence intervals, and their coverage
+DEFAULT_BOOTSTRAP = 1000
+CONFIDENCE = 0.95
+
+# Prediction deciles of the lift and calibration metrics
+N_DECILES = 10
+
+# Replicates x rows per block of the bootstrap weight matrix, which bounds its memory
+BOOTSTRAP_BLOCK_CELLS = 5_000_000
+
+def _cost_metrics(fit_stats, name):
+    # Fit time and serialized size recorded by src.models, reported next to the scores
+    stats = (fit_stats or {}).get(name)
+    if stats is None:
+        return {}
+    return {"FitTime": stats["fit_time_s"], "ModelSizeMB": stats["model_size_mb"]}
+
+def _predict(model, X, classification):
+    return model.predict_proba(X)[:, 1] if classification else model.predict(X)
+
+@traced
+def collect_predictions(models, batches, classification=False, n_jobs=-1):
+    """
+    Scores (X, y) or (X, y, segments) batches with every model, keeping only the targets,
+    predictions (claim probabilities for classifiers) and segments: one value per row and
+    model, never the features. Models predict each batch in parallel threads.
+    Returns (y, {name: predictions}, segments or None).
+    """
+    ys, segments, preds = [], [], {name: [] for name in models}
+    with Parallel(n_jobs=n_jobs, prefer="threads") as parallel:
+        for batch in batches:
+            X, y = batch[0], batch[1]
+            ys.append(np.asarray(y, dtype=float))
+            if len(batch) > 2:
+                segments.append(np.asarray(batch[2]))
+            scores = parallel(delayed(_predict)(model, X, classification) for model in models.values())
+            for name, score in zip(models, scores):
+                preds[name].append(np.asarray(score, dtype=float))
+    return (np.concatenate(ys), {name: np.concatenate(p) for name, p in preds.items()},
+            np.concatenate(segments) if segments else None)
+
+def bootstrap_weights(n_rows, n_replicates, rng):
+    """
+    Bootstrap resamples as a (replicates, rows) matrix of how often each row is drawn, from
+    one matrix of resampled indices. Metrics weighted by it equal metrics on the resamples.
+    """
+    indices = rng.integers(0, n_rows, size=(n_replicates, n_rows))
+    indices += np.arange(n_replicates)[:, None] * n_rows
+    return np.bincount(indices.ravel(), minlength=n_replicates * n_rows).reshape(n_replicates, n_rows).astype(float)
+
+def _decile_starts(n_rows):
+    # First row of each prediction decile, in ascending order of the predictions
+    return np.unique(np.linspace(0, n_rows, N_DECILES + 1).astype(int)[:-1])
+
+def _lorenz_gini(y, W):
+    # Gini of the ordered Lorenz curve of y, rows sorted by the ranking score (ascending)
+    losses = W * y
+    area = (W * (2 * np.cumsum(losses, axis=1) - losses)).sum(axis=1) / (2 * W.sum(axis=1) * losses.sum(axis=1))
+    return 1 - 2 * area
+
+def _regression_metrics(y, pred, W):
+    # Each row of W weights one sample; rows of y / pred sorted by pred
+    n = W.sum(axis=1)
+    sse = W @ (y - pred) ** 2
+    sum_y = W @ y
+    by_y = np.argsort(y, kind="stable")
+    starts = _decile_starts(len(y))
+    top_mean = np.add.reduceat(W * y, starts, axis=1)[:, -1] / np.add.reduceat(W, starts, axis=1)[:, -1]
+    return {
+        "RMSE": np.sqrt(sse / n),
+        "R2": 1 - sse / (W @ y ** 2 - sum_y ** 2 / n),
+        "Gini": _lorenz_gini(y, W) / _lorenz_gini(y[by_y], W[:, by_y]),
+        "TopDecileLift": top_mean / (sum_y / n),
+    }
+
+def _classification_metrics(y, p, W):
+    # Each row of W weights one sample; rows of y / p sorted by p
+    n = W.sum(axis=1)
+    label = (p > 0.5).astype(float)
+    tp = W @ (label * y)
+    errors = W @ (label != y).astype(float)
+
+    # AUC from positives and negatives per distinct score, ties counting half
+    Wy = W * y
+    levels = np.flatnonzero(np.r_[True, np.diff(p) != 0])
+    pos = Wy if len(levels) == len(p) else np.add.reduceat(Wy, levels, axis=1)
+    neg = (W if len(levels) == len(p) else np.add.reduceat(W, levels, axis=1)) - pos
+    auc = (pos * (np.cumsum(neg, axis=1) - neg / 2)).sum(axis=1) / (pos.sum(axis=1) * neg.sum(axis=1))
+
+    starts = _decile_starts(len(y))
+    rows = np.add.reduceat(W, starts, axis=1)
+    observed = np.add.reduceat(Wy, starts, axis=1)
+    predicted = np.add.reduceat(W * p, starts, axis=1)
+    return {
+        "Accuracy": (n - errors) / n,
+        "F1": np.where(tp + errors > 0, 2 * tp / np.maximum(2 * tp + errors, 1e-12), 0.0),
+        "AUC": auc,
+        "Gini": 2 * auc - 1,
+        "TopDecileLift": (observed[:, -1] / rows[:, -1]) / (observed.sum(axis=1) / n),
+        "CalibrationError": np.abs(observed - predicted).sum(axis=1) / n,
+    }
+
+def decile_table(y, pred):
+    """Rows, mean prediction, mean actual and lift (vs the overall mean) per prediction decile, 1 = lowest."""
+    order = np.argsort(pred, kind="stable")
+    decile = np.searchsorted(_decile_starts(len(y)), np.arange(len(y)), side="right")
+    table = pd.DataFrame({"Decile": decile, "Predicted": pred[order], "Actual": y[order]}).groupby("Decile").agg(
+        Rows=("Actual", "size"), MeanPredicted=("Predicted", "mean"), MeanActual=("Actual", "mean"))
+    table["Lift"] = table["MeanActual"] / y.mean()
+    return table
+
+def actual_vs_expected(y, pred, segments):
+    """Actual and expected (predicted) totals per segment and their ratio."""
+    table = pd.DataFrame({"Segment": segments, "Actual": y, "Expected": pred}).groupby(
+        "Segment", observed=True).agg(Rows=("Actual", "size"), Actual=("Actual", "sum"), Expected=("Expected", "sum"))
+    table["AvE"] = table["Actual"] / table["Expected"]
+    return table
+
+def _with_intervals(point, replicates):
+    # Point metrics plus percentile bootstrap intervals ({metric}_ci_low / _ci_high)
+    results = {key: float(value[0]) for key, value in point.items()}
+    if replicates:
+        tail = (1 - CONFIDENCE) / 2 * 100
+        for key in point:
+            values = np.concatenate([replicate[key] for replicate in replicates])
+            results[f"{key}_ci_low"], results[f"{key}_ci_high"] = np.nanpercentile(values, [tail, 100 - tail])
     return results
 
-def evaluate_classification(models, X_test, y_test):
+def _evaluate(models, batches, classification, fit_stats, n_bootstrap, n_jobs, random_state):
+    """
+    Metrics of every model with n_bootstrap percentile intervals. Each block of bootstrap
+    weights is drawn once and applied to every model's rows in prediction order (resampling
+    is exchangeable, so no reordering is needed); models are scored in parallel threads.
+    """
+    y, preds, segments = collect_predictions(models, batches, classification, n_jobs)
+    metrics = _classification_metrics if classification else _regression_metrics
+    ordered = {}
+    for name, pred in preds.items():
+        order = np.argsort(pred, kind="stable")
+        ordered[name] = (y[order], pred[order])
+
+    replicates = {name: [] for name in models}
+    with Parallel(n_jobs=n_jobs, prefer="threads") as parallel, np.errstate(divide="ignore", invalid="ignore"):
+        point = dict(zip(models, parallel(delayed(metrics)(*ordered[name], np.ones((1, len(y)))) for name in models)))
+        rng = np.random.default_rng(random_state)
+        block = max(1, BOOTSTRAP_BLOCK_CELLS // len(y))
+        for start in range(0, n_bootstrap, block):
+            W = bootstrap_weights(len(y), min(block, n_bootstrap - start), rng)
+            for name, values in zip(models, parallel(delayed(metrics)(*ordered[name], W) for name in models)):
+                replicates[name].append(values)
+
     results = {}
-    for name, model in models.items():
-        preds = model.predict(X_test)
-        results[name] = {
-            "Accuracy": accuracy_score(y_test, preds),
-            "F1": f1_score(y_test, preds),
-            "Report": classification_report(y_test, preds, digits=3)
-        }
-    return results
\ No newline at end of file
+    for name, pred in preds.items():
+        results[name] = {**_with_intervals(point[name], replicates[name]), "Deciles": decile_table(y, pred)}
+        if segments is not None:
+            results[name]["ActualVsExpected"] = actual_vs_expected(y, pred, segments)
+        results[name].update(_cost_metrics(fit_stats, name))
+    return results
+
+@traced
+def evaluate_regression_batches(models, batches, fit_stats=None, n_bootstrap=0, n_jobs=-1, random_state=42):
+    """
+    RMSE, R², normalized Gini and top-decile lift of every model over (X, y) or (X, y, segments)
+    batches, read once, with bootstrap intervals when n_bootstrap > 0. Each result also holds
+    a Deciles table and, given segments, an ActualVsExpected table.
+    """
+    return _evaluate(models, batches, False, fit_stats, n_bootstrap, n_jobs, random_state)
+
+@traced
+def evaluate_classification_batches(models, batches, fit_stats=None, n_bootstrap=0, n_jobs=-1, random_state=42):
+    """
+    Accuracy, F1, AUC, Gini, top-decile lift and calibration error (mean |observed - predicted|
+    claim rate over the deciles) of every model over (X, y) or (X, y, segments) batches, read
+    once, with bootstrap intervals when n_bootstrap > 0. Tables as in evaluate_regression_batches.
+    """
+    return _evaluate(models, batches, True, fit_stats, n_bootstrap, n_jobs, random_state)
+
+@traced
+def evaluate_regression(models, X_test, y_test, fit_stats=None, segments=None, n_bootstrap=0, n_jobs=-1):
+    batch = (X_test, y_test) if segments is None else (X_test, y_test, segments)
+    return evaluate_regression_batches(models, [batch], fit_stats, n_bootstrap, n_jobs)
+
+@traced
+def evaluate_classification(models, X_test, y_test, fit_stats=None, segments=None, n_bootstrap=0, n_jobs=-1):
+    batch = (X_test, y_test) if segments is None else (X_test, y_test, segments)
+    return evaluate_classification_batches(models, [batch], fit_stats, n_bootstrap, n_jobs)
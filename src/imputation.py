@@ -0,0 +1,117 @@
+"""
+Declarative imputation: a spec maps each column to a strategy, fit_imputer computes the
+statistics of every column together and apply_imputer fills the gaps in place.
+
+    spec = {
+        "Bank": {"strategy": "mode"},
+        "kilowatts": {"strategy": "median", "fallback": 0.0},
+        "CustomValueEstimate": {"strategy": "group_median", "by": "make"},
+        "Gender": {"strategy": "constant", "value": "Missing"},
+    }
+    imputer = fit_imputer(df, spec)   # plain dict, saved with save_imputer
+    apply_imputer(new_df, imputer)    # same fills at scoring time
+
+group_median falls back to the column median for groups without a value (unseen or missing
+keys); median and group_median use "fallback" when the column has no values at all.
+"""
+import pathlib
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.core.tracing import traced
+
+STRATEGIES = ("mode", "median", "group_median", "constant")
+
+
+@traced
+def fit_imputer(df, spec):
+    """
+    Statistics of an imputation spec ({column: {"strategy": ...}}, columns not in df are
+    skipped). All modes come from one DataFrame.mode call, all medians from one
+    DataFrame.median call and the group medians from one groupby per key. Returns
+    {column: {"value": fill}}, plus "by" and "values" ({group: fill}) for group medians.
+    """
+    spec = {col: rule for col, rule in spec.items() if col in df.columns}
+    unknown = {rule["strategy"] for rule in spec.values()} - set(STRATEGIES)
+    if unknown:
+        raise ValueError(f"Unknown imputation strategies: {sorted(unknown)}")
+
+    def columns(*strategies):
+        return [col for col, rule in spec.items() if rule["strategy"] in strategies]
+
+    imputer = {col: {"value": spec[col]["value"]} for col in columns("constant")}
+
+    mode_cols = columns("mode")
+    if mode_cols:
+        modes = df[mode_cols].mode(dropna=True)
+        for col in mode_cols:
+            imputer[col] = {"value": modes[col].iloc[0] if len(modes) else np.nan}
+
+    median_cols = columns("median", "group_median")
+    if median_cols:
+        medians = df[median_cols].median()
+        for col in median_cols:
+            value = medians[col]
+            imputer[col] = {"value": spec[col].get("fallback", np.nan) if pd.isna(value) else float(value)}
+
+    group_cols = columns("group_median")
+    for key in dict.fromkeys(spec[col]["by"] for col in group_cols):
+        cols = [col for col in group_cols if spec[col]["by"] == key]
+        group_medians = df.groupby(key, observed=True)[cols].median()
+        for col in cols:
+            imputer[col].update(by=key, values=group_medians[col].dropna().to_dict())
+
+    return {col: imputer[col] for col in spec}
+
+
+def _fill(df, col, value):
+    # Fills one column keeping its dtype; categories (and boolean flags filled with a label)
+    # get the fill values as new levels, integers get rounded medians
+    column = df[col]
+    fills = pd.unique(value.dropna()) if isinstance(value, pd.Series) else [value]
+    if pd.api.types.is_bool_dtype(column.dtype) and not all(isinstance(fill, (bool, np.bool_)) for fill in fills):
+        column = column.astype('category')
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        new = [fill for fill in fills if fill not in column.cat.categories]
+        df[col] = column.cat.add_categories(new).fillna(value) if new else column.fillna(value)
+    elif pd.api.types.is_numeric_dtype(column.dtype) and not pd.api.types.is_bool_dtype(column.dtype):
+        if pd.api.types.is_integer_dtype(column.dtype):
+            value = np.round(value)
+        df[col] = column.fillna(value).astype(column.dtype)
+    else:
+        df[col] = column.fillna(value)
+
+
+@traced
+def apply_imputer(df, imputer):
+    """
+    Fills the gaps of df in place with the statistics of fit_imputer (columns not in df, or
+    without gaps, are left alone) and returns df. Only the missing rows are looked up in
+    the group medians.
+    """
+    for col, fill in imputer.items():
+        if col not in df.columns:
+            continue
+        missing = df[col].isna()
+        if not missing.any():
+            continue
+        value = fill["value"]
+        if "by" in fill:
+            grouped = df.loc[missing, fill["by"]].astype(object).map(fill["values"]).astype('float64')
+            value = grouped if pd.isna(value) else grouped.fillna(value)
+        _fill(df, col, value)
+    return df
+
+
+def save_imputer(imputer, path):
+    """Saves fitted imputation statistics, e.g. next to the encoder for the scoring services."""
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(imputer, path)
+    return path
+
+
+def load_imputer(path):
+    return joblib.load(path)
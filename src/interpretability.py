@@ -1,7 +1,113 @@
-import shap
-import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+from src.core.artifacts import stage_key
+from src.core.lazy import lazy_import
+from src.core.tracing import traced
+from src.data_loader import ROOT_DIR
+
+# Imported when SHAP values are first computed or plotted
+shap = lazy_import("shap")
+plt = lazy_import("matplotlib.pyplot")
+
+# Headless plots are written here
+FIGURES_DIR = ROOT_DIR / "reports" / "figures"
+
+# exact: path-dependent TreeSHAP; interventional: TreeSHAP against a background sample
+# (background_size rows); approx: Saabas attributions, orders of magnitude faster on deep forests
+SHAP_MODES = ("exact", "interventional", "approx")
+
+def stratified_sample(strata, n_samples, random_state=42):
+    """
+    Row positions of a sample of n_samples rows drawn proportionally from each stratum
+    (e.g. claim / no claim), with at least one row per stratum. Sorted, so CSR slicing stays cheap.
+    """
+    strata = pd.Series(np.asarray(strata))
+    if n_samples >= len(strata):
+        return np.arange(len(strata))
+    rng = np.random.default_rng(random_state)
+    shares = strata.value_counts(normalize=True)
+    positions = []
+    for value, share in shares.items():
+        rows = np.flatnonzero((strata == value).to_numpy())
+        positions.append(rng.choice(rows, min(len(rows), max(1, round(share * n_samples))), replace=False))
+    return np.sort(np.concatenate(positions))
+
+def _dense(X):
+    return X.toarray() if hasattr(X, "toarray") else np.asarray(X)
+
+def _positive_class(values):
+    # Classifiers return one array per class (list, or a trailing class axis); keep the positive class
+    if isinstance(values, list):
+        return values[-1]
+    return values[..., -1] if values.ndim == 3 else values
+
+def _explain_batch(model, X, mode, background):
+    X = _dense(X)
+    if mode == "interventional":
+        explainer = shap.TreeExplainer(model, data=background, feature_perturbation="interventional")
+        values = explainer.shap_values(X, check_additivity=False)
+    else:
+        values = shap.TreeExplainer(model).shap_values(X, approximate=mode == "approx")
+    return _positive_class(values).astype(np.float32)
+
+@traced
+def compute_shap_values(model, X, mode="exact", background_size=100, batch_size=5_000, n_jobs=-1, random_state=42):
+    """
+    SHAP values of a tree model for every row of X (dense or sparse), computed in row batches
+    in parallel worker processes. Only one batch per worker is densified at a time.
+    """
+    if mode not in SHAP_MODES:
+        raise ValueError(f"mode must be one of {SHAP_MODES}")
+    background = None
+    if mode == "interventional":
+        rng = np.random.default_rng(random_state)
+        rows = np.sort(rng.choice(X.shape[0], min(background_size, X.shape[0]), replace=False))
+        background = _dense(X[rows])
+    batches = [X[start:start + batch_size] for start in range(0, X.shape[0], batch_size)]
+    if len(batches) == 1:
+        return _explain_batch(model, batches[0], mode, background)
+    values = Parallel(n_jobs=n_jobs)(delayed(_explain_batch)(model, batch, mode, background) for batch in batches)
+    return np.vstack(values)
+
+def global_importance(shap_values, feature_names):
+    """Mean absolute SHAP value per feature, most important first."""
+    importance = pd.Series(np.abs(shap_values).mean(axis=0), index=feature_names, name="MeanAbsSHAP")
+    return importance.sort_values(ascending=False)
+
+@traced
+def explain_model(model, X, feature_names, strata=None, n_samples=50_000, mode="exact", background_size=100,
+                  store=None, model_key=None, batch_size=5_000, n_jobs=-1, random_state=42):
+    """
+    Explains a stratified sample of the rows of X. Returns a dict with the sample row positions,
+    the SHAP values and the global importance. With an ArtifactStore and the model's artifact
+    key, the explanation is persisted and reused while the model and the settings are unchanged.
+    """
+    def compute():
+        rows = stratified_sample(np.zeros(X.shape[0]) if strata is None else strata, n_samples, random_state)
+        values = compute_shap_values(model, X[rows], mode, background_size, batch_size, n_jobs, random_state)
+        return {"rows": rows, "shap_values": values, "importance": global_importance(values, feature_names)}
+
+    if store is None or model_key is None:
+        return compute()
+    key = stage_key("shap", model_key, mode, n_samples, background_size, random_state)
+    return store.cached(key, compute)
+
+def plot_shap_summary(shap_values, X_sample, feature_names=None, max_display=10, output_path=None):
+    """
+    SHAP summary plot, kept separate from the computation. With output_path the figure is
+    saved and closed (headless); otherwise it is shown.
+    """
+    shap.summary_plot(shap_values, _dense(X_sample), feature_names=feature_names, max_display=max_display, show=False)
+    if output_path is None:
+        plt.show()
+        return None
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    plt.savefig(output_path, bbox_inches="tight", dpi=120)
+    plt.close()
+    return output_path
 
 def explain_model_with_shap(model, X_sample, feature_names=None, max_display=10):
-    explainer = shap.TreeExplainer(model)
-    shap_values = explainer.shap_values(X_sample)
-    shap.summary_plot(shap_values, X_sample, feature_names=feature_names, max_display=max_display)
\ No newline at end of file
+    shap_values = compute_shap_values(model, X_sample)
+    plot_shap_summary(shap_values, X_sample, feature_names=feature_names, max_display=max_display)
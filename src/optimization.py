@@ -1,4 +1,98 @@
+import pathlib
+
 import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.cleaning import fill_missing_categories
+from src.core.tracing import traced
+from src.imputation import apply_imputer
+
+# Rows priced per model call; large enough to amortize per-call overhead, small enough
+# that the sparse batch and the predictions stay well below 1 GB
+DEFAULT_BATCH_SIZE = 100_000
+
+# Columns copied from the policy frame to the priced output when present
+ID_COLS = ["PolicyID", "UnderwrittenCoverID"]
+
+def compute_optimized_premium(p_claim, expected_claim, loading_factor=1.2, expense_ratio=0.0, profit_margin=0.0):
+    """
+    Premium = p_claim * expected_claim * loading_factor, grossed up so that expenses and
+    profit make up expense_ratio and profit_margin of the final premium.
+    """
+    if expense_ratio + profit_margin >= 1:
+        raise ValueError("expense_ratio + profit_margin must be below 1")
+    return p_claim * expected_claim * loading_factor / (1 - expense_ratio - profit_margin)
+
+def encode_batch(df, encoder, imputer=None):
+    """
+    Feature matrix of a batch of policies for scoring, with the same missing-value handling
+    as training (clean_and_impute): the training imputer when given, else 'Missing' levels
+    for the encoder's categorical columns and the encoder's fitted medians.
+    """
+    categorical = [col for col in encoder.categorical_cols_ if col in df.columns]
+    df = df.copy(deep=False)
+    if imputer is not None:
+        apply_imputer(df, imputer)
+    elif categorical:
+        df[categorical] = fill_missing_categories(df[categorical].copy())
+    return encoder.transform(df)
+
+def price_batch(df, encoder, frequency_model, severity_model, loading_factor=1.2, expense_ratio=0.0, profit_margin=0.0,
+                imputer=None):
+    """
+    Prices one batch of policies: both models score the same encoded rows, so the claim
+    probability and the expected severity of row i always belong to the same policy.
+    Gaps are filled with the training imputer (src/imputation.py) when one is given.
+    """
+    X = encode_batch(df, encoder, imputer)
+    p_claim = frequency_model.predict_proba(X)[:, 1]
+    expected_claim = np.clip(severity_model.predict(X), 0, None)
+    priced = df[[col for col in ID_COLS if col in df.columns]].reset_index(drop=True)
+    priced["ClaimProbability"] = p_claim
+    priced["ExpectedSeverity"] = expected_claim
+    priced["RiskPremium"] = p_claim * expected_claim
+    priced["OptimizedPremium"] = compute_optimized_premium(
+        p_claim, expected_claim, loading_factor, expense_ratio, profit_margin
+    )
+    return priced
+
+def iter_batches(policies, batch_size=DEFAULT_BATCH_SIZE):
+    """Splits a frame, or an iterable of frames (e.g. src.data_loader.iter_processed), into batches."""
+    frames = [policies] if isinstance(policies, pd.DataFrame) else policies
+    for frame in frames:
+        for start in range(0, len(frame), batch_size):
+            yield frame.iloc[start:start + batch_size]
+
+@traced
+def price_portfolio(policies, encoder, frequency_model, severity_model, output_path=None,
+                    batch_size=DEFAULT_BATCH_SIZE, imputer=None, **premium_args):
+    """
+    Prices a portfolio in fixed-size batches. policies is a frame or an iterable of frames;
+    pass the training imputer (models/imputation.joblib) to score raw rows.
+    Without output_path the priced frame is returned; with it, each batch is appended to a
+    Parquet file as soon as it is priced (so the portfolio never has to fit in memory) and
+    the number of priced policies is returned.
+    """
+    batches = (
+        price_batch(batch, encoder, frequency_model, severity_model, imputer=imputer, **premium_args)
+        for batch in iter_batches(policies, batch_size)
+    )
+    if output_path is None:
+        return pd.concat(list(batches), ignore_index=True)
 
-def compute_optimized_premium(p_claim, expected_claim, loading_factor=1.2):
-    return p_claim * expected_claim * loading_factor
\ No newline at end of file
+    output_path = pathlib.Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    n_rows, writer = 0, None
+    try:
+        for priced in batches:
+            table = pa.Table.from_pandas(priced, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(output_path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+            n_rows += len(priced)
+    finally:
+        if writer is not None:
+            writer.close()
+    return n_rows
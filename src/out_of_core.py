@@ -0,0 +1,190 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import xgboost
+from sklearn.base import BaseEstimator, is_regressor
+from sklearn.linear_model import SGDClassifier, SGDRegressor
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import MaxAbsScaler, StandardScaler
+
+from src.cleaning import CLEAN_STRATEGIES, fill_missing_categories
+from src.core.tracing import traced
+from src.data_loader import PROCESSED_PARQUET_PATH, iter_processed
+from src.models import model_size_mb
+from src.preprocessing import TARGET_COLS, FeatureEncoder
+
+# Rows read, encoded and handed to the models at a time
+BATCH_SIZE = 100_000
+
+# Share of the policies held out for evaluation, as in prepare_*_data
+TEST_SIZE = 0.3
+
+# Boosting settings for external-memory XGBoost (hist is the only external-memory method)
+EXTERNAL_XGB_PARAMS = {"tree_method": "hist", "max_bin": 256, "learning_rate": 0.1, "max_depth": 6, "seed": 42}
+EXTERNAL_XGB_ROUNDS = 200
+
+# Passes of partial_fit over the training batches for the SGD baselines
+SGD_EPOCHS = 5
+
+
+def holdout_mask(df, test_size=TEST_SIZE, seed=42):
+    """
+    Held-out rows of a batch, from a hash of PolicyCode: the split is the same in every pass
+    over the data and all rows of a policy fall on the same side.
+    """
+    hashes = pd.util.hash_pandas_object(df["PolicyCode"], index=False, hash_key=f"{seed:016d}")
+    return (hashes.to_numpy() % 10_000) < test_size * 10_000
+
+
+def iter_training_batches(encoder, task, split="train", path=PROCESSED_PARQUET_PATH, batch_size=BATCH_SIZE,
+                          segment_col=None):
+    """
+    Yields encoded (X, y) batches of the processed data for task 'classification' (all
+    policies, claim / no claim) or 'severity' (policies with a claim, claim amount), from the
+    'train' or 'test' side of holdout_mask, plus the segment_col values when given. Missing
+    values are filled as in clean_and_impute: categorical levels here, numeric medians by the encoder.
+    """
+    for batch in iter_processed(path, batch_size=batch_size):
+        keep = holdout_mask(batch) if split == "test" else ~holdout_mask(batch)
+        if task == "severity":
+            keep &= (batch["TotalClaims"] > 0).to_numpy()
+        batch = fill_missing_categories(batch[keep].reset_index(drop=True))
+        if len(batch) == 0:
+            continue
+        y = batch["TotalClaims"] if task == "severity" else (batch["TotalClaims"] > 0).astype(int)
+        if segment_col is None:
+            yield encoder.transform(batch), y.to_numpy()
+        else:
+            yield encoder.transform(batch), y.to_numpy(), batch[segment_col].to_numpy()
+
+
+def training_imputer(encoder):
+    """
+    The imputation the out-of-core models are trained with, in the format of fit_imputer: the
+    'Missing' level for the encoder's categorical columns and its fitted medians for the
+    numeric ones, so scoring can load it like the in-memory training imputer.
+    """
+    imputer = {col: {"value": CLEAN_STRATEGIES["categorical"]["value"]} for col in encoder.categorical_cols_}
+    imputer.update({col: {"value": value} for col, value in encoder.numeric_fill_.items()})
+    return imputer
+
+
+class BatchIterator(xgboost.DataIter):
+    """Feeds (X, y) batches to XGBoost; make_batches() starts a new pass over the data."""
+
+    def __init__(self, make_batches, cache_prefix):
+        self._make_batches = make_batches
+        self._batches = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self._batches is None:
+            self._batches = iter(self._make_batches())
+        batch = next(self._batches, None)
+        if batch is None:
+            return False
+        X, y = batch
+        input_data(data=X, label=y)
+        return True
+
+    def reset(self):
+        self._batches = None
+
+
+class BoosterModel(BaseEstimator):
+    """predict / predict_proba on a Booster trained with xgboost.train, like the sklearn wrappers."""
+
+    def __init__(self, booster, classifier=False):
+        self.booster = booster
+        self.classifier = classifier
+
+    def predict_proba(self, X):
+        p = self.booster.inplace_predict(X)
+        return np.column_stack([1 - p, p])
+
+    def predict(self, X):
+        if self.classifier:
+            return (self.booster.inplace_predict(X) > 0.5).astype(int)
+        return self.booster.inplace_predict(X)
+
+
+@traced
+def train_external_xgboost(make_batches, objective, cache_dir, params=None, num_boost_round=EXTERNAL_XGB_ROUNDS):
+    """
+    Trains XGBoost from batches in external-memory mode: quantized pages are cached on disk
+    under cache_dir and streamed at every boosting round, so only one page is in memory.
+    """
+    params = {**EXTERNAL_XGB_PARAMS, **(params or {}), "objective": objective}
+    it = BatchIterator(make_batches, cache_prefix=os.path.join(cache_dir, "xgb"))
+    dtrain = xgboost.ExtMemQuantileDMatrix(it, max_bin=params["max_bin"])
+    booster = xgboost.train(params, dtrain, num_boost_round=num_boost_round)
+    return BoosterModel(booster, classifier=objective.startswith("binary:"))
+
+
+@traced
+def train_sgd(model, make_batches, n_epochs=SGD_EPOCHS, classes=None):
+    """
+    Fits an SGD model with partial_fit over n_epochs passes of the batches. Features are
+    scaled to [-1, 1] by a MaxAbsScaler fitted on a first pass (it keeps them sparse; uncentered
+    standard scaling leaves codes and years far from zero and SGD diverges).
+    Regression targets are standardized while fitting and the coefficients rescaled after,
+    as raw claim amounts are too large for SGD's step sizes. Returns scaler and model as a pipeline.
+    """
+    scaler, target = MaxAbsScaler(), StandardScaler()
+    for X, y in make_batches():
+        scaler.partial_fit(X)
+        target.partial_fit(np.reshape(y, (-1, 1)).astype(float))
+    regression = is_regressor(model)
+    for _ in range(n_epochs):
+        for X, y in make_batches():
+            if regression:
+                model.partial_fit(scaler.transform(X), target.transform(np.reshape(y, (-1, 1)).astype(float)).ravel())
+            else:
+                model.partial_fit(scaler.transform(X), y, classes=classes)
+    if regression:
+        model.coef_ = model.coef_ * target.scale_[0]
+        model.intercept_ = model.intercept_ * target.scale_[0] + target.mean_[0]
+    return make_pipeline(scaler, model)
+
+
+@traced
+def train_out_of_core(path=PROCESSED_PARQUET_PATH, high_card_cols=(), batch_size=BATCH_SIZE, cache_dir=None):
+    """
+    Fits the encoder and the claim models without materializing the feature matrix: every
+    stage streams batches of the processed data. Trains an SGD baseline and external-memory
+    XGBoost per task. Returns (encoder, regression models, classification models, fit stats).
+    """
+    encoder = FeatureEncoder(exclude=list(high_card_cols) + TARGET_COLS).fit_batches(
+        fill_missing_categories(batch) for batch in iter_processed(path, batch_size=batch_size)
+    )
+
+    def batches(task):
+        return lambda: iter_training_batches(encoder, task, "train", path, batch_size)
+
+    jobs = {
+        "regression": {
+            "SGDRegressor": lambda: train_sgd(SGDRegressor(random_state=42), batches("severity")),
+            "XGBoost": lambda: train_external_xgboost(batches("severity"), "reg:squarederror", tmp),
+        },
+        "classification": {
+            "SGDClassifier": lambda: train_sgd(SGDClassifier(loss="log_loss", random_state=42),
+                                               batches("classification"), classes=[0, 1]),
+            "XGBoost": lambda: train_external_xgboost(batches("classification"), "binary:logistic", tmp),
+        },
+    }
+    fitted = {suite: {} for suite in jobs}
+    stats = {suite: {} for suite in jobs}
+    with tempfile.TemporaryDirectory(prefix="xgb_pages_", dir=cache_dir) as tmp:
+        for suite, models in jobs.items():
+            for name, fit in models.items():
+                wall, cpu = time.perf_counter(), time.process_time()
+                fitted[suite][name] = fit()
+                stats[suite][name] = {
+                    "fit_time_s": time.perf_counter() - wall,
+                    "cpu_time_s": time.process_time() - cpu,
+                    "model_size_mb": model_size_mb(fitted[suite][name]),
+                }
+    return encoder, fitted["regression"], fitted["classification"], stats
@@ -0,0 +1,99 @@
+import pathlib
+
+import numpy as np
+import pandas as pd
+
+from src.data_loader import ROOT_DIR, PROCESSED_PARQUET_PATH, load_processed
+
+# Per-policy aggregates cached next to the processed dataset
+POLICY_AGGREGATES_PATH = ROOT_DIR / "data" / "processed" / "policy_aggregates.parquet"
+
+POLICY_COLUMNS = ['PolicyCode', 'TotalClaims', 'TotalPremium']
+
+
+# Function to compute per-policy aggregates from the PolicyCode column
+def compute_policy_aggregates(policy_code, total_claims, total_premium, n_policies=None):
+    """
+    Aggregates row-level claims and premiums per policy with np.bincount kernels.
+    policy_code holds the integer codes from cleaning (-1 for a missing PolicyID); the
+    result is indexed by PolicyCode and has one row per code in [0, n_policies).
+    """
+    codes = np.asarray(policy_code)
+    claims = np.nan_to_num(np.asarray(total_claims, dtype='float64'))
+    premium = np.nan_to_num(np.asarray(total_premium, dtype='float64'))
+    valid = codes >= 0
+    codes, claims, premium = codes[valid], claims[valid], premium[valid]
+    if n_policies is None:
+        n_policies = int(codes.max()) + 1 if codes.size else 0
+
+    exposure = np.bincount(codes, minlength=n_policies)
+    claim_count = np.bincount(codes, weights=claims > 0, minlength=n_policies)
+    claims_sum = np.bincount(codes, weights=claims, minlength=n_policies)
+    premium_sum = np.bincount(codes, weights=premium, minlength=n_policies)
+    return _policy_frame(exposure, claim_count, claims_sum, premium_sum)
+
+
+# Function to combine aggregates computed over disjoint sets of rows
+def combine_policy_aggregates(*aggregates):
+    """
+    Adds up the additive columns (Exposure, ClaimCount, TotalClaims, TotalPremium) of per-policy
+    aggregates computed on different rows, e.g. the cached aggregates and a newly ingested month,
+    and recomputes the derived metrics. Shorter frames are padded with empty policies.
+    """
+    aggregates = [a for a in aggregates if a is not None]
+    n_policies = max(len(a) for a in aggregates)
+    sums = [
+        sum(np.pad(a[col].to_numpy(dtype='float64'), (0, n_policies - len(a))) for a in aggregates)
+        for col in ['Exposure', 'ClaimCount', 'TotalClaims', 'TotalPremium']
+    ]
+    return _policy_frame(*sums)
+
+
+def _policy_frame(exposure, claim_count, claims_sum, premium_sum):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        severity = np.where(claim_count > 0, claims_sum / claim_count, 0.0)
+        loss_ratio = np.divide(claims_sum, premium_sum, out=np.ones_like(claims_sum), where=premium_sum != 0)
+
+    return pd.DataFrame({
+        'Exposure': exposure.astype('int32'),
+        'ClaimCount': claim_count.astype('int32'),
+        'TotalClaims': claims_sum,
+        'TotalPremium': premium_sum,
+        # A policy "has a claim" if any of its transactions did (the old groupby-max)
+        'ClaimFrequency': (claim_count > 0).astype('float64'),
+        'ClaimSeverity': severity,
+        'Margin': premium_sum - claims_sum,
+        'LossRatio': loss_ratio,
+    }, index=pd.RangeIndex(len(exposure), name='PolicyCode'))
+
+
+# Function to broadcast a per-policy column back to rows
+def broadcast_to_rows(aggregates, column, policy_code):
+    """
+    Looks up a per-policy value for every row by its PolicyCode (NaN for missing policies).
+    """
+    codes = np.asarray(policy_code)
+    values = aggregates[column].to_numpy(dtype='float64')
+    return np.where(codes >= 0, values[np.clip(codes, 0, None)], np.nan)
+
+
+# Function to build and cache the per-policy aggregates of the processed dataset
+def build_policy_aggregates(processed_path=PROCESSED_PARQUET_PATH, output_path=POLICY_AGGREGATES_PATH):
+    """
+    Reads only PolicyCode/TotalClaims/TotalPremium from the processed dataset, aggregates them
+    per policy and saves the result next to it.
+    """
+    df = load_processed(processed_path, columns=POLICY_COLUMNS)
+    aggregates = compute_policy_aggregates(df['PolicyCode'], df['TotalClaims'], df['TotalPremium'])
+    aggregates.to_parquet(output_path)
+    return aggregates
+
+
+# Function to load the cached per-policy aggregates
+def load_policy_aggregates(path=POLICY_AGGREGATES_PATH):
+    """
+    Loads the cached per-policy aggregates, or returns None when they have not been built yet.
+    """
+    if not pathlib.Path(path).exists():
+        return None
+    return pd.read_parquet(path)
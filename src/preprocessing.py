@@ -1,22 +1,222 @@
+import joblib
+import numpy as np
 import pandas as pd
-from category_encoders import OneHotEncoder
+from scipy import sparse
 from sklearn.model_selection import train_test_split
 
-def preprocess_data(df, target_col, high_card_cols):
-    df = df.drop(columns=high_card_cols, errors='ignore')
-    y = df[target_col]
-    X = df.drop(columns=[target_col])
-    encoder = OneHotEncoder(use_cat_names=True)
-    X_encoded = encoder.fit_transform(X)
-    return X_encoded, y
-
-def prepare_severity_data(df, high_card_cols, target_col="TotalClaims", test_size=0.3, random_state=42):
-    df_sev = df[df["TotalClaims"] > 0].copy()
-    X, y = preprocess_data(df_sev, target_col=target_col, high_card_cols=high_card_cols)
-    return train_test_split(X, y, test_size=test_size, random_state=random_state), df_sev
-
-def prepare_classification_data(df, high_card_cols, target_col="HasClaim", test_size=0.3, random_state=42):
-    df_cls = df.copy()
-    df_cls[target_col] = (df_cls["TotalClaims"] > 0).astype(int)
-    X, y = preprocess_data(df_cls, target_col=target_col, high_card_cols=high_card_cols)
-    return train_test_split(X, y, test_size=test_size, random_state=random_state)
\ No newline at end of file
+from src.core.tracing import traced
+
+# Targets, and columns derived from them, are never used as features
+TARGET_COLS = ["TotalClaims", "LossRatio", "HasClaim"]
+
+
+class FeatureEncoder:
+    """
+    Fit-once / transform-many feature pipeline. Numeric and boolean columns pass through,
+    categorical and text columns are one-hot encoded against the vocabulary seen at fit time
+    (unseen values encode as all zeros). transform returns a sparse CSR matrix whose columns
+    always follow feature_names_, so every matrix produced by one encoder is aligned.
+    """
+
+    def __init__(self, exclude=None, dtype=np.float32):
+        self.exclude = list(exclude or [])
+        self.dtype = dtype
+
+    @traced
+    def fit(self, df):
+        columns = [col for col in df.columns if col not in self.exclude]
+        features = df[columns]
+        self.numeric_cols_ = list(features.select_dtypes(include=['number', 'bool']).columns)
+        self.categorical_cols_ = [col for col in columns if col not in self.numeric_cols_]
+
+        # Medians fill numeric gaps at transform time (e.g. single quotes with missing fields)
+        self.numeric_fill_ = {
+            col: float(np.nan_to_num(features[col].astype('float64').median()))
+            for col in self.numeric_cols_
+        }
+        self.categories_ = {
+            col: sorted(features[col].dropna().unique().tolist(), key=str)
+            for col in self.categorical_cols_
+        }
+        return self._set_feature_names()
+
+    @traced
+    def fit_batches(self, batches, sample_size=100_000, random_state=42):
+        """
+        Out-of-core fit over an iterable of frames prepared like the training data. The
+        vocabulary is the union of the values seen in every batch, and a column that is
+        categorical in any batch is categorical. Medians come from a uniform sample of
+        sample_size rows (the smallest random keys), so memory does not grow with the data.
+        """
+        rng = np.random.default_rng(random_state)
+        columns, numeric, sample, values = None, None, None, {}
+        for batch in batches:
+            if columns is None:
+                columns = [col for col in batch.columns if col not in self.exclude]
+            features = batch[columns]
+            batch_numeric = set(features.select_dtypes(include=['number', 'bool']).columns)
+            numeric = batch_numeric if numeric is None else numeric & batch_numeric
+            for col in columns:
+                # Flags may turn categorical ('Missing') in a later batch, so their values are kept too
+                if col not in batch_numeric or pd.api.types.is_bool_dtype(features[col].dtype):
+                    values.setdefault(col, set()).update(features[col].dropna().unique().tolist())
+            rows = features[sorted(numeric, key=columns.index)].astype('float64')
+            rows['_key'] = rng.random(len(rows))
+            sample = rows if sample is None else pd.concat([sample[rows.columns], rows], ignore_index=True)
+            sample = sample.nsmallest(sample_size, '_key')
+        if columns is None:
+            raise ValueError("fit_batches needs at least one batch")
+
+        self.numeric_cols_ = [col for col in columns if col in numeric]
+        self.categorical_cols_ = [col for col in columns if col not in numeric]
+        self.numeric_fill_ = {
+            col: float(np.nan_to_num(sample[col].median())) for col in self.numeric_cols_
+        }
+        self.categories_ = {
+            col: sorted(values.get(col, ()), key=str) for col in self.categorical_cols_
+        }
+        return self._set_feature_names()
+
+    def _set_feature_names(self):
+        self.feature_names_ = list(self.numeric_cols_) + [
+            f"{col}_{value}" for col in self.categorical_cols_ for value in self.categories_[col]
+        ]
+        self._lookup = None
+        return self
+
+    @property
+    def n_features_(self):
+        return len(self.feature_names_)
+
+    def _numeric_block(self, df):
+        values = np.empty((len(df), len(self.numeric_cols_)), dtype=self.dtype)
+        for i, col in enumerate(self.numeric_cols_):
+            column = df[col].astype('float64') if col in df.columns else pd.Series(np.nan, index=df.index)
+            values[:, i] = column.fillna(self.numeric_fill_[col]).to_numpy()
+        return sparse.csr_matrix(values)
+
+    @staticmethod
+    def _codes(column, values):
+        # Position of each value in the fitted vocabulary, -1 for missing or unseen values
+        vocabulary = pd.Index(values, dtype=object)
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            lookup = np.append(vocabulary.get_indexer(column.cat.categories.astype(object)), -1)
+            return lookup[column.cat.codes.to_numpy()]
+        return vocabulary.get_indexer(column.astype(object))
+
+    def _one_hot_block(self, df):
+        n_rows = len(df)
+        rows, cols = [], []
+        offset = 0
+        for col in self.categorical_cols_:
+            values = self.categories_[col]
+            if col in df.columns:
+                codes = self._codes(df[col], values)
+                hit = codes >= 0
+                rows.append(np.flatnonzero(hit))
+                cols.append(codes[hit].astype(np.int64) + offset)
+            offset += len(values)
+        rows = np.concatenate(rows) if rows else np.array([], dtype=np.int64)
+        cols = np.concatenate(cols) if cols else np.array([], dtype=np.int64)
+        data = np.ones(len(rows), dtype=self.dtype)
+        return sparse.csr_matrix((data, (rows, cols)), shape=(n_rows, offset))
+
+    @traced
+    def transform(self, df):
+        return sparse.hstack([self._numeric_block(df), self._one_hot_block(df)], format='csr')
+
+    def fit_transform(self, df):
+        return self.fit(df).transform(df)
+
+    def _record_lookup(self):
+        # {column: {value: feature index}}, built once and cached for transform_records
+        if getattr(self, "_lookup", None) is None:
+            lookup, offset = {}, 0
+            for col in self.categorical_cols_:
+                values = self.categories_[col]
+                lookup[col] = {value: offset + i for i, value in enumerate(values)}
+                lookup[col].update({str(value): offset + i for i, value in enumerate(values)})
+                offset += len(values)
+            self._lookup = lookup
+        return self._lookup
+
+    def coerce_records(self, records):
+        """
+        Checks the numeric fields of a list of dicts before they are scored: numbers and null
+        pass, numeric strings are converted in place. Raises ValueError naming the first field
+        that is not a number.
+        """
+        for i, record in enumerate(records):
+            for col in self.numeric_cols_:
+                value = record.get(col)
+                if value is None or isinstance(value, (int, float)):
+                    continue
+                try:
+                    record[col] = float(value)
+                except (TypeError, ValueError):
+                    raise ValueError(f"policy {i}: {col} must be a number, got {value!r}") from None
+        return records
+
+    def transform_records(self, records):
+        """
+        Encodes a list of dicts (e.g. policies parsed from JSON) without building a DataFrame.
+        Matches transform on a frame prepared like the training data: missing numeric values
+        take the fitted medians and missing categorical values the 'Missing' level, if seen.
+        """
+        lookup = self._record_lookup()
+        numeric = np.empty((len(records), len(self.numeric_cols_)), dtype=self.dtype)
+        rows, cols = [], []
+        for i, record in enumerate(records):
+            for j, col in enumerate(self.numeric_cols_):
+                value = record.get(col)
+                numeric[i, j] = self.numeric_fill_[col] if value is None else float(value)
+            for col in self.categorical_cols_:
+                value = record.get(col)
+                index = lookup[col].get("Missing" if value is None else value)
+                if index is not None:
+                    rows.append(i)
+                    cols.append(index)
+        one_hot = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=self.dtype), (rows, cols)),
+            shape=(len(records), self.n_features_ - len(self.numeric_cols_)),
+        )
+        return sparse.hstack([sparse.csr_matrix(numeric), one_hot], format='csr')
+
+    def save(self, path):
+        joblib.dump(self, path)
+        return path
+
+    @staticmethod
+    def load(path):
+        return joblib.load(path)
+
+
+@traced
+def build_feature_matrix(df, high_card_cols, encoder=None):
+    """
+    Encodes the frame once into a sparse feature matrix shared by the severity and
+    classification tasks. A fitted encoder (e.g. loaded at scoring time) is reused as-is.
+    """
+    if encoder is None:
+        encoder = FeatureEncoder(exclude=list(high_card_cols) + TARGET_COLS).fit(df)
+    return encoder.transform(df), encoder
+
+
+@traced
+def prepare_severity_data(df, X, target_col="TotalClaims", test_size=0.3, random_state=42):
+    """
+    Train/test split of the policies with a claim, selected from the shared matrix by mask.
+    Returns the split and the boolean row mask.
+    """
+    mask = (df["TotalClaims"] > 0).to_numpy()
+    y = df.loc[mask, target_col]
+    return train_test_split(X[mask], y, test_size=test_size, random_state=random_state), mask
+
+
+@traced
+def prepare_classification_data(df, X, target_col="HasClaim", test_size=0.3, random_state=42):
+    """
+    Train/test split of all policies from the shared matrix, with a binary claim target.
+    """
+    y = (df["TotalClaims"] > 0).astype(int).rename(target_col)
+    return train_test_split(X, y, test_size=test_size, random_state=random_state)
@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+
+# Dtypes used when parsing the raw pipe-delimited extract. Text stays as plain objects here
+# because the cleaning steps replace and impute string values; the compact schema below is
+# applied once cleaning is done.
+RAW_DTYPES = {
+    'UnderwrittenCoverID': 'Int64',
+    'PolicyID': 'Int64',
+    'TransactionMonth': 'object',
+    'IsVATRegistered': 'boolean',
+    'Citizenship': 'object',
+    'LegalType': 'object',
+    'Title': 'object',
+    'Language': 'object',
+    'Bank': 'object',
+    'AccountType': 'object',
+    'MaritalStatus': 'object',
+    'Gender': 'object',
+    'Country': 'object',
+    'Province': 'object',
+    'PostalCode': 'Int64',
+    'MainCrestaZone': 'object',
+    'SubCrestaZone': 'object',
+    'ItemType': 'object',
+    'mmcode': 'float64',
+    'VehicleType': 'object',
+    'RegistrationYear': 'Int64',
+    'make': 'object',
+    'Model': 'object',
+    'Cylinders': 'float64',
+    'cubiccapacity': 'float64',
+    'kilowatts': 'float64',
+    'bodytype': 'object',
+    'NumberOfDoors': 'float64',
+    'VehicleIntroDate': 'object',
+    'CustomValueEstimate': 'float64',
+    'AlarmImmobiliser': 'object',
+    'TrackingDevice': 'object',
+    'CapitalOutstanding': 'object',
+    'NewVehicle': 'object',
+    'WrittenOff': 'object',
+    'Rebuilt': 'object',
+    'Converted': 'object',
+    'CrossBorder': 'object',
+    'NumberOfVehiclesInFleet': 'float64',
+    'SumInsured': 'float64',
+    'TermFrequency': 'object',
+    'CalculatedPremiumPerTerm': 'float64',
+    'ExcessSelected': 'object',
+    'CoverCategory': 'object',
+    'CoverType': 'object',
+    'CoverGroup': 'object',
+    'Section': 'object',
+    'Product': 'object',
+    'StatutoryClass': 'object',
+    'StatutoryRiskType': 'object',
+    'TotalPremium': 'float64',
+    'TotalClaims': 'float64',
+}
+
+# Yes/No flags stored as nullable booleans
+YES_NO_COLUMNS = ['AlarmImmobiliser', 'TrackingDevice', 'WrittenOff', 'Rebuilt', 'Converted', 'CrossBorder']
+YES_NO_VALUES = {'Yes': True, 'No': False, 'True': True, 'False': False, True: True, False: False}
+
+# Canonical, memory-compact dtype of every column of the insurance dataset.
+# Monetary amounts and mmcode (an 8-digit code) stay float64; vehicle attributes fit in float32.
+INSURANCE_SCHEMA = {
+    'UnderwrittenCoverID': 'Int32',
+    'PolicyID': 'Int32',
+    'PolicyCode': 'int32',
+    'TransactionMonth': 'category',
+    'IsVATRegistered': 'boolean',
+    'Citizenship': 'category',
+    'LegalType': 'category',
+    'Title': 'category',
+    'Language': 'category',
+    'Bank': 'category',
+    'AccountType': 'category',
+    'MaritalStatus': 'category',
+    'Gender': 'category',
+    'Country': 'category',
+    'Province': 'category',
+    'PostalCode': 'category',
+    'MainCrestaZone': 'category',
+    'SubCrestaZone': 'category',
+    'ItemType': 'category',
+    'mmcode': 'float64',
+    'VehicleType': 'category',
+    'RegistrationYear': 'Int16',
+    'make': 'category',
+    'Model': 'category',
+    'Cylinders': 'float32',
+    'cubiccapacity': 'float32',
+    'kilowatts': 'float32',
+    'bodytype': 'category',
+    'NumberOfDoors': 'float32',
+    'VehicleIntroDate': 'category',
+    'CustomValueEstimate': 'float64',
+    'AlarmImmobiliser': 'boolean',
+    'TrackingDevice': 'boolean',
+    'CapitalOutstanding': 'category',
+    'NewVehicle': 'category',
+    'WrittenOff': 'boolean',
+    'Rebuilt': 'boolean',
+    'Converted': 'boolean',
+    'CrossBorder': 'boolean',
+    'NumberOfVehiclesInFleet': 'float32',
+    'SumInsured': 'float64',
+    'TermFrequency': 'category',
+    'CalculatedPremiumPerTerm': 'float64',
+    'ExcessSelected': 'category',
+    'CoverCategory': 'category',
+    'CoverType': 'category',
+    'CoverGroup': 'category',
+    'Section': 'category',
+    'Product': 'category',
+    'StatutoryClass': 'category',
+    'StatutoryRiskType': 'category',
+    'TotalPremium': 'float64',
+    'TotalClaims': 'float64',
+    'LossRatio': 'float64',
+}
+
+
+def to_yes_no_flag(series: pd.Series) -> pd.Series:
+    """Decodes a Yes/No (or True/False) column into a nullable boolean."""
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return series.astype('boolean')
+    return series.astype(object).map(YES_NO_VALUES).astype('boolean')
+
+
+def apply_schema(df: pd.DataFrame, schema: dict = None) -> pd.DataFrame:
+    """Casts the columns of df to their canonical dtypes. Columns not in the schema are left as-is."""
+    schema = INSURANCE_SCHEMA if schema is None else schema
+    df = df.copy(deep=False)
+    for col in df.columns:
+        dtype = schema.get(col)
+        if dtype is None or df[col].dtype == dtype:
+            continue
+        if col in YES_NO_COLUMNS:
+            df[col] = to_yes_no_flag(df[col])
+        elif dtype.startswith('Int') and pd.api.types.is_float_dtype(df[col].dtype):
+            df[col] = df[col].round().astype(dtype)
+        else:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """Per-column memory usage (bytes) before and after applying the schema, with a total row."""
+    report = pd.DataFrame({
+        'dtype_before': before.dtypes.astype(str),
+        'dtype_after': after.dtypes.astype(str),
+        'bytes_before': before.memory_usage(index=False, deep=True),
+        'bytes_after': after.memory_usage(index=False, deep=True),
+    })
+    report.loc['TOTAL'] = ['', '', report['bytes_before'].sum(), report['bytes_after'].sum()]
+    report['bytes_saved'] = report['bytes_before'] - report['bytes_after']
+    report['saving_pct'] = np.round(100 * report['bytes_saved'] / report['bytes_before'].replace(0, np.nan), 1)
+    return report
@@ -1,33 +1,77 @@
+import argparse
 import json
 import pandas as pd
 import sys, pathlib
 
 # Dynamically get the root directory (project root where `src/` is located)
-ROOT_DIR = pathlib.Path(__file__).resolve().parents[1]
+ROOT_DIR = pathlib.Path(__file__).resolve().parents[2]
 SRC_DIR = ROOT_DIR
 
 sys.path.append(str(SRC_DIR))
 
-from src.utils.eda_cleaning_and_imputation_functions import preprocess_data
+from src.core.tracing import format_trace_summary, is_enabled, read_trace, trace_file, traced
+from src.data_loader import RAW_DATA_PATH, PROCESSED_PARQUET_PATH, PROCESSED_CSV_PATH, INGESTION_STATE_PATH
+from src.policy_aggregates import POLICY_AGGREGATES_PATH, build_policy_aggregates
+from src.summary_stats import SUMMARY_STATS_PATH, save_summary, summarize, summary_metrics
+from src.utils.eda_cleaning_and_imputation_functions import (
+    ingest_new_months,
+    preprocess_data,
+    preprocess_data_in_chunks,
+)
 
 # File paths
-input_file = "../data/raw/insurance_data.csv"
-output_file = "../data/processed/insurance_data_cleaned.csv"
-metrics_file = "metrics/summary.json"
-
-def main():
-    # Run the full cleaning pipeline
-    df = preprocess_data(input_file, output_file)
-
-    # If cleaning succeeded, generate summary metrics
-    if df is not None:
-        metrics = {
-            "rows": int(df.shape[0]),
-            "columns": int(df.shape[1]),
-            "missing_values": int(df.isnull().sum().sum()),
-            "mean_loss_ratio": float(df['LossRatio'].mean()),
-            "writtenoff_ratio": float((df['WrittenOff'] == 'Yes').mean())
-        }
+input_file = RAW_DATA_PATH
+output_files = {"parquet": PROCESSED_PARQUET_PATH, "csv": PROCESSED_CSV_PATH}
+metrics_file = ROOT_DIR / "metrics" / "summary.json"
+memory_report_file = ROOT_DIR / "metrics" / "memory_report.csv"
+# The grouped rollups are cached for the Parquet store only
+summary_file = {"parquet": SUMMARY_STATS_PATH, "csv": None}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Clean the raw insurance extract.")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="Stream the raw file in chunks of this many rows instead of loading it whole.")
+    parser.add_argument("--format", choices=sorted(output_files), default="parquet",
+                        help="Write the cleaned data as a Province-partitioned Parquet dataset or as CSV.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only clean TransactionMonths that are not in the processed Parquet store yet.")
+    return parser.parse_args()
+
+@traced(name="run_cleaning")
+def main(chunksize=None, fmt="parquet", incremental=False):
+    output_file = output_files[fmt]
+    if incremental and fmt != "parquet":
+        print("❌ Incremental ingestion appends to the Parquet store; use --format parquet.")
+        return
+    if not incremental and fmt == "parquet":
+        # A full run rewrites the store with freshly factorized PolicyCodes and part numbers, so
+        # the incremental state no longer describes it; the next --incremental run starts over
+        INGESTION_STATE_PATH.unlink(missing_ok=True)
+    if incremental:
+        # Imputation counts and summary totals are updated from the new months only;
+        # the per-policy aggregates are updated in place as well
+        metrics = ingest_new_months(input_file, output_file, INGESTION_STATE_PATH, POLICY_AGGREGATES_PATH,
+                                    chunksize=chunksize or 100_000, summary_file=summary_file[fmt])
+    elif chunksize:
+        # Streaming mode: metrics are accumulated over the cleaned chunks
+        metrics = preprocess_data_in_chunks(input_file, output_file, chunksize=chunksize,
+                                            summary_file=summary_file[fmt])
+    else:
+        # Run the full cleaning pipeline
+        df = preprocess_data(input_file, output_file, memory_report_file=memory_report_file)
+
+        # If cleaning succeeded, generate summary metrics from the mergeable summary
+        metrics = None
+        if df is not None:
+            summary = summarize(df)
+            if summary_file[fmt] is not None:
+                save_summary(summary, summary_file[fmt])
+            metrics = summary_metrics(summary)
+
+    if metrics is not None:
+        # Cache per-policy frequency/severity/exposure/margin next to the processed data
+        if not incremental:
+            build_policy_aggregates(output_file)
 
         # Save metrics to JSON
         with open(metrics_file, 'w') as f:
@@ -38,4 +82,9 @@ def main():
         print("❌ Cleaning failed.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = parse_args()
+    main(chunksize=args.chunksize, fmt=args.format, incremental=args.incremental)
+    # PIPELINE_TRACE=1 records per-stage time and memory (see src/core/tracing.py)
+    if is_enabled():
+        print(f"🧭 Stage trace: {trace_file()}")
+        print(format_trace_summary(read_trace()))
\ No newline at end of file
@@ -0,0 +1,33 @@
+import argparse
+import sys, pathlib
+import time
+
+# Dynamically get the root directory (project root where `src/` is located)
+ROOT_DIR = pathlib.Path(__file__).resolve().parents[2]
+SRC_DIR = ROOT_DIR
+
+sys.path.append(str(SRC_DIR))
+
+from src.data_loader import PROCESSED_PARQUET_PATH, load_processed
+from src.summary_stats import load_summary
+from src.utils.eda_report import EDA_REPORT_DIR, generate_eda_report
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Render the EDA report of the processed data.")
+    parser.add_argument("--input", type=pathlib.Path, default=PROCESSED_PARQUET_PATH)
+    parser.add_argument("--output-dir", type=pathlib.Path, default=EDA_REPORT_DIR)
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes rendering figures (default: all cores).")
+    parser.add_argument("--max-points", type=int, default=10_000, help="Points drawn per scatter plot.")
+    return parser.parse_args()
+
+def main(input_file=PROCESSED_PARQUET_PATH, output_dir=EDA_REPORT_DIR, n_jobs=None, max_points=10_000):
+    start = time.perf_counter()
+    df = load_processed(input_file)
+    # The cached summary only describes the default processed store
+    summary = load_summary() if pathlib.Path(input_file) == PROCESSED_PARQUET_PATH else None
+    index = generate_eda_report(df, output_dir, n_jobs=n_jobs, max_points=max_points, summary=summary)
+    print(f"✅ EDA report for {len(df):,} rows written to {index} in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    args = parse_args()
+    main(args.input, args.output_dir, args.jobs, args.max_points)
@@ -0,0 +1,171 @@
+import json
+import pathlib
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+from src.core.tracing import traced
+from src.optimization import DEFAULT_BATCH_SIZE, encode_batch, iter_batches
+
+# Scenarios of a default run, and per block: a block's claims and its (scenarios x segments)
+# losses are all that is held in memory at once
+DEFAULT_SCENARIOS = 100_000
+SCENARIO_BLOCK = 10_000
+
+# Levels of the reported VaR / TVaR
+RISK_LEVELS = (0.95, 0.99, 0.995)
+
+# Claim amount around the severity model's prediction: gamma with a common shape (constant
+# coefficient of variation) or lognormal with a common log-scale sigma, both with mean = prediction
+SEVERITY_FAMILIES = ("gamma", "lognormal")
+
+# Segment of policies without one
+UNKNOWN_SEGMENT = "Missing"
+
+@traced
+def fit_severity_distribution(y_true, y_pred, family="gamma"):
+    """
+    Dispersion of actual claim amounts around the severity model's predictions (e.g. on the
+    test claims), as {"family": ..., "shape": k} (gamma, CV = 1 / sqrt(k)) or
+    {"family": ..., "sigma": s} (lognormal), from the ratios actual / predicted. Raises
+    ValueError when fewer than two claims have positive amounts and predictions, or their
+    ratios do not vary.
+    """
+    if family not in SEVERITY_FAMILIES:
+        raise ValueError(f"family must be one of {SEVERITY_FAMILIES}")
+    y_true, y_pred = np.asarray(y_true, dtype=float), np.asarray(y_pred, dtype=float)
+    valid = (y_true > 0) & (y_pred > 0)
+    ratio = y_true[valid] / y_pred[valid]
+    if len(ratio) < 2 or np.ptp(ratio) == 0:
+        raise ValueError(f"need at least two claims with varying actual / predicted ratios, got {len(ratio)}")
+    if family == "gamma":
+        return {"family": family, "shape": float(ratio.mean() ** 2 / ratio.var())}
+    return {"family": family, "sigma": float(np.log(ratio).std())}
+
+def save_severity_distribution(distribution, path):
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(distribution, indent=4))
+    return path
+
+def load_severity_distribution(path):
+    return json.loads(pathlib.Path(path).read_text())
+
+def _claim_positions(p_claim, n_scenarios, rng):
+    """
+    (policy, scenario) of every claim in a block of n_scenarios, each policy claiming in each
+    scenario with probability p_claim (independent Bernoulli draws). The scenarios a policy
+    claims in are walked with geometric gaps, so the work and memory follow the number of
+    claims instead of policies x scenarios.
+    """
+    candidates = np.flatnonzero(p_claim > 0)
+    p = p_claim[candidates]
+    last = np.full(len(candidates), -1, dtype=np.int64)
+    active = np.arange(len(candidates))
+    policies, scenarios = [], []
+    while len(active):
+        # Enough gaps to pass the end of the block for nearly every policy; the rest go another round
+        remaining = n_scenarios - 1 - last[active]
+        mean = remaining * p[active]
+        draws = np.ceil(mean + 3 * np.sqrt(mean * (1 - p[active])) + 1).astype(np.int64)
+        owner = np.repeat(active, draws)
+        # Gaps beyond the block end are all equivalent; capping them keeps the sums in range
+        gaps = np.minimum(rng.geometric(p[owner]), n_scenarios + 1)
+        ends = np.cumsum(draws)
+        total = np.cumsum(gaps)
+        before = np.repeat(np.r_[0, total[ends[:-1] - 1]], draws)
+        position = total - before + np.repeat(last[active], draws)
+        inside = position < n_scenarios
+        policies.append(candidates[owner[inside]])
+        scenarios.append(position[inside])
+        last[active] = position[ends - 1]
+        active = active[last[active] < n_scenarios]
+    return np.concatenate(policies), np.concatenate(scenarios)
+
+def _claim_amounts(expected, distribution, rng):
+    # One draw per claim with mean = the severity model's prediction for the policy
+    if distribution["family"] == "gamma":
+        shape = distribution["shape"]
+        return rng.gamma(shape, expected / shape)
+    sigma = distribution["sigma"]
+    with np.errstate(divide="ignore"):
+        return rng.lognormal(np.log(expected) - sigma ** 2 / 2, sigma)
+
+def _simulate_block(p_claim, expected_severity, segment_codes, n_segments, distribution, n_scenarios, seed):
+    """Worker: (n_scenarios, n_segments) aggregate losses of one block of scenarios."""
+    rng = np.random.default_rng(seed)
+    policies, scenarios = _claim_positions(p_claim, n_scenarios, rng)
+    amounts = _claim_amounts(expected_severity[policies], distribution, rng)
+    cells = scenarios * n_segments + segment_codes[policies]
+    return np.bincount(cells, weights=amounts, minlength=n_scenarios * n_segments).reshape(n_scenarios, n_segments)
+
+@traced
+def simulate_losses(p_claim, expected_severity, distribution, segments=None, n_scenarios=DEFAULT_SCENARIOS,
+                    block_size=SCENARIO_BLOCK, n_jobs=-1, random_state=42):
+    """
+    Monte Carlo aggregate losses of a portfolio: in every scenario each policy claims with
+    probability p_claim and a claim costs a draw from distribution (fit_severity_distribution)
+    around expected_severity. Returns a (scenarios x segments) frame of total losses per
+    segment (one 'Total' column without segments).
+
+    Scenarios run in blocks of block_size on joblib worker processes. Each block has its own
+    random stream spawned from random_state (numpy SeedSequence), so the result does not
+    depend on n_jobs or the order the blocks finish in.
+    """
+    if distribution["family"] not in SEVERITY_FAMILIES:
+        raise ValueError(f"family must be one of {SEVERITY_FAMILIES}")
+    p_claim = np.clip(np.asarray(p_claim, dtype=float), 0.0, 1.0)
+    expected_severity = np.clip(np.asarray(expected_severity, dtype=float), 0.0, None)
+    if segments is None:
+        codes, labels = np.zeros(len(p_claim), dtype=np.int64), pd.Index(["Total"])
+    else:
+        codes, labels = pd.factorize(pd.Series(segments).astype(object).fillna(UNKNOWN_SEGMENT), sort=True)
+
+    sizes = [min(block_size, n_scenarios - start) for start in range(0, n_scenarios, block_size)]
+    seeds = np.random.SeedSequence(random_state).spawn(len(sizes))
+    blocks = Parallel(n_jobs=n_jobs)(
+        delayed(_simulate_block)(p_claim, expected_severity, codes, len(labels), distribution, size, seed)
+        for size, seed in zip(sizes, seeds)
+    )
+    losses = pd.DataFrame(np.vstack(blocks), columns=labels)
+    losses.index.name = "Scenario"
+    return losses
+
+def risk_measures(losses, levels=RISK_LEVELS):
+    """
+    Mean, standard deviation, VaR (the level quantile) and TVaR (mean loss at or beyond the
+    VaR) of the simulated losses per segment, plus the portfolio total.
+    """
+    if "Total" not in losses.columns:
+        losses = losses.assign(Total=losses.sum(axis=1))
+    values = np.sort(losses.to_numpy(), axis=0)
+    table = pd.DataFrame({"Mean": values.mean(axis=0), "Std": values.std(axis=0)}, index=losses.columns)
+    for level in levels:
+        var = np.quantile(values, level, axis=0)
+        tail = values >= var
+        table[f"VaR_{level:g}"] = var
+        table[f"TVaR_{level:g}"] = (values * tail).sum(axis=0) / tail.sum(axis=0)
+    table.index.name = "Segment"
+    return table
+
+@traced
+def simulate_portfolio(policies, encoder, frequency_model, severity_model, distribution, segment_col="Province",
+                       n_scenarios=DEFAULT_SCENARIOS, block_size=SCENARIO_BLOCK, imputer=None,
+                       batch_size=DEFAULT_BATCH_SIZE, n_jobs=-1, random_state=42):
+    """
+    Scores policies (a frame or an iterable of frames) in batches as price_portfolio does,
+    keeping one claim probability (predict_proba), expected severity and segment per policy,
+    then runs simulate_losses. Returns (losses per scenario and segment, risk_measures table).
+    """
+    p_claim, expected, segments = [], [], []
+    for batch in iter_batches(policies, batch_size):
+        X = encode_batch(batch, encoder, imputer)
+        p_claim.append(frequency_model.predict_proba(X)[:, 1])
+        expected.append(np.clip(severity_model.predict(X), 0, None))
+        if segment_col is not None:
+            segments.append(batch[segment_col].astype(object).to_numpy())
+    losses = simulate_losses(np.concatenate(p_claim), np.concatenate(expected), distribution,
+                             np.concatenate(segments) if segment_col is not None else None,
+                             n_scenarios, block_size, n_jobs, random_state)
+    return losses, risk_measures(losses)
@@ -0,0 +1,214 @@
+import functools
+import pathlib
+
+import joblib
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+from joblib import Parallel, delayed
+
+from src.data_loader import ROOT_DIR, PROCESSED_PARQUET_PATH, _partitioning, load_processed
+
+# Mergeable summary of the processed dataset, cached next to it
+SUMMARY_STATS_PATH = ROOT_DIR / "data" / "processed" / "summary_stats.joblib"
+
+# Columns the rollups are grouped by, and the metrics summarized for every group
+GROUP_COLUMNS = ['Province', 'PostalCode', 'Gender', 'make', 'VehicleType', 'Bank', 'CoverType']
+METRIC_COLUMNS = ['TotalClaims', 'TotalPremium', 'LossRatio', 'Margin', 'ClaimOccurred']
+
+# A summary is a dict of additive counters plus two frames of per-metric moments
+# ({metric}_n, {metric}_sum, {metric}_sumsq, the centred sum of squares {metric}_m2 and the row
+# count): 'totals' over all rows and 'groups' indexed by (group_col, group). Summaries of disjoint
+# rows are combined by adding the counters and sums and pooling the M2s (Chan et al.), so chunks,
+# months and partitions can be summarized independently.
+
+
+def _metric_frame(df, metric_cols):
+    # Margin and ClaimOccurred are derived from the claim/premium columns when not present
+    values = {}
+    for col in metric_cols:
+        if col in df.columns:
+            values[col] = df[col]
+        elif col == 'Margin':
+            values[col] = df['TotalPremium'] - df['TotalClaims']
+        elif col == 'ClaimOccurred':
+            values[col] = (df['TotalClaims'] > 0).where(df['TotalClaims'].notna())
+    return pd.DataFrame({col: pd.to_numeric(v, errors='coerce').astype('float64') for col, v in values.items()})
+
+
+def _moments(values, keys):
+    # Deviations from the group's own mean: sumsq - n * mean^2 cancels catastrophically on large values
+    centred = (values - values.groupby(keys, observed=True, sort=False).transform('mean')).pow(2)
+    squares = values.pow(2).add_suffix('_sumsq')
+    grouped = pd.concat([values.add_suffix('_sum'), squares, centred.add_suffix('_m2')], axis=1).groupby(
+        keys, observed=True, sort=False)
+    counts = values.notna().add_suffix('_n').groupby(keys, observed=True, sort=False).sum()
+    return pd.concat([grouped.size().rename('rows'), counts, grouped.sum()], axis=1)
+
+
+def _merge_moments(a, b):
+    # Chan et al.'s pairwise update: M2 = M2_a + M2_b + delta^2 * n_a * n_b / n, delta the difference
+    # of the means. Everything else adds up; groups missing on one side contribute nothing.
+    index = a.index.union(b.index, sort=False)
+    a, b = a.reindex(index, fill_value=0), b.reindex(index, fill_value=0)
+    merged = a + b
+    for col in merged.columns[merged.columns.str.endswith('_m2')]:
+        metric = col[:-len('_m2')]
+        n_a, n_b = a[f"{metric}_n"], b[f"{metric}_n"]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            delta = b[f"{metric}_sum"] / n_b - a[f"{metric}_sum"] / n_a
+            pooled = delta ** 2 * n_a * n_b / (n_a + n_b)
+        merged[col] = a[col] + b[col] + pooled.where((n_a > 0) & (n_b > 0), 0)
+    return merged
+
+
+# Function to summarize a frame (a chunk, a month or a partition of the processed data)
+def summarize(df, group_cols=GROUP_COLUMNS, metric_cols=METRIC_COLUMNS):
+    """
+    Computes the mergeable summary of a frame: row, missing-value and WrittenOff counts, and
+    count/sum/sum of squares of every metric overall and per group of each group column.
+    Rows with a missing group value are left out of that column's groups only.
+    """
+    values = _metric_frame(df, metric_cols)
+    groups = []
+    for col in group_cols:
+        if col not in df.columns:
+            continue
+        moments = _moments(values, df[col])
+        moments.index = pd.MultiIndex.from_arrays(
+            [np.full(len(moments), col, dtype=object), moments.index.astype(object)], names=['group_col', 'group'])
+        groups.append(moments)
+    return {
+        'rows': len(df),
+        'columns': df.shape[1],
+        'missing_values': int(df.isnull().sum().sum()),
+        'writtenoff_yes': int(df['WrittenOff'].eq(True).sum()) if 'WrittenOff' in df.columns else 0,
+        'totals': _moments(values, np.zeros(len(df), dtype='int8')).reset_index(drop=True),
+        'groups': pd.concat(groups) if groups else None,
+    }
+
+
+# Function to combine summaries computed over disjoint sets of rows
+def merge_summaries(*summaries):
+    """
+    Combines summaries of disjoint rows (e.g. per-chunk or per-partition summaries). The merge is
+    associative and commutative; None entries are ignored, and None is returned if all are None.
+    """
+    summaries = [s for s in summaries if s is not None]
+    if not summaries:
+        return None
+    if len(summaries) == 1:
+        return summaries[0]
+    totals = [s['totals'] for s in summaries if len(s['totals'])]
+    groups = [s['groups'] for s in summaries if s['groups'] is not None]
+    return {
+        'rows': sum(s['rows'] for s in summaries),
+        'columns': max(s['columns'] for s in summaries),
+        'missing_values': sum(s['missing_values'] for s in summaries),
+        'writtenoff_yes': sum(s['writtenoff_yes'] for s in summaries),
+        'totals': functools.reduce(_merge_moments, totals) if totals else summaries[0]['totals'],
+        'groups': functools.reduce(_merge_moments, groups) if groups else None,
+    }
+
+
+def _summarize_partition(path, province, group_cols, metric_cols):
+    return summarize(load_processed(path, provinces=[province]), group_cols, metric_cols)
+
+
+# Function to summarize the processed dataset one Province partition per worker
+def build_summary(processed_path=PROCESSED_PARQUET_PATH, output_path=SUMMARY_STATS_PATH, n_jobs=-1,
+                  group_cols=GROUP_COLUMNS, metric_cols=METRIC_COLUMNS):
+    """
+    Summarizes each Province partition of the processed dataset in parallel worker processes,
+    merges the partition summaries and saves the result (unless output_path is None).
+    """
+    dataset = ds.dataset(processed_path, format='parquet', partitioning=_partitioning())
+    provinces = sorted({ds.get_partition_keys(f.partition_expression).get('Province')
+                        for f in dataset.get_fragments()}, key=str)
+    partials = Parallel(n_jobs=n_jobs)(
+        delayed(_summarize_partition)(processed_path, province, group_cols, metric_cols) for province in provinces)
+    summary = merge_summaries(*partials)
+    if output_path is not None:
+        save_summary(summary, output_path)
+    return summary
+
+
+# Function to save a summary
+def save_summary(summary, path=SUMMARY_STATS_PATH):
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(summary, path)
+    return path
+
+
+# Function to load the cached summary
+def load_summary(path=SUMMARY_STATS_PATH):
+    """
+    Loads the cached summary, or returns None when it has not been built yet.
+    """
+    if not pathlib.Path(path).exists():
+        return None
+    return joblib.load(path)
+
+
+# Function to turn a summary into the metrics of metrics/summary.json
+def summary_metrics(summary):
+    if summary is None:
+        return {'rows': 0, 'columns': 0, 'missing_values': 0,
+                'mean_loss_ratio': float('nan'), 'writtenoff_ratio': float('nan')}
+    rows = summary['rows']
+    totals = summary['totals']
+    loss_ratio_n = float(totals['LossRatio_n'].sum())
+    return {
+        'rows': rows,
+        'columns': summary['columns'],
+        'missing_values': summary['missing_values'],
+        'mean_loss_ratio': float(totals['LossRatio_sum'].sum()) / loss_ratio_n if loss_ratio_n else float('nan'),
+        'writtenoff_ratio': summary['writtenoff_yes'] / rows if rows else float('nan'),
+    }
+
+
+def _group_moments(summary, group_col):
+    groups = summary['groups']
+    if groups is None or group_col not in groups.index.get_level_values('group_col'):
+        raise KeyError(f"'{group_col}' is not summarized; summarize it with group_cols=[..., '{group_col}']")
+    return groups.xs(group_col, level='group_col')
+
+
+# Function to derive per-group count, mean and variance from a summary
+def group_stats(summary, group_col, metric_cols):
+    """
+    Count, mean and variance (ddof=1) of each metric for every group of group_col, in the tidy
+    format of hypothesis_testing.group_sufficient_stats (one row per (metric, group)).
+    """
+    moments = _group_moments(summary, group_col)
+    frames = []
+    for metric in metric_cols:
+        n, total, m2 = (moments[f"{metric}_{stat}"].to_numpy(dtype='float64') for stat in ('n', 'sum', 'm2'))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(n > 0, total / n, np.nan)
+            var = np.where(n > 1, np.maximum(m2, 0) / (n - 1), np.nan)
+        frames.append(pd.DataFrame({'group_col': group_col, 'metric': metric, 'group': moments.index.to_numpy(),
+                                    'n': n, 'mean': mean, 'var': var}))
+    return pd.concat(frames, ignore_index=True)
+
+
+# Function to build a grouped loss-ratio table from a summary
+def loss_ratio_table(summary, group_col, max_groups=None):
+    """
+    Rows, claim and premium totals per group of group_col, with the portfolio loss ratio
+    (TotalClaims / TotalPremium, NaN without premium) and the mean row-level LossRatio.
+    Sorted by rows; max_groups keeps the largest groups only.
+    """
+    moments = _group_moments(summary, group_col)
+    claims, premium = moments['TotalClaims_sum'], moments['TotalPremium_sum']
+    table = pd.DataFrame({
+        'Rows': moments['rows'].astype('int64'),
+        'TotalClaims': claims,
+        'TotalPremium': premium,
+        'LossRatio': (claims / premium).where(premium != 0),
+        'MeanLossRatio': moments['LossRatio_sum'] / moments['LossRatio_n'].where(moments['LossRatio_n'] > 0),
+    })
+    table.index.name = group_col
+    table = table.sort_values('Rows', ascending=False, kind='stable')
+    return table if max_groups is None else table.head(max_groups)
@@ -0,0 +1,196 @@
+import json
+import math
+import multiprocessing
+import os
+import pathlib
+import tempfile
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import mean_squared_error, roc_auc_score
+from sklearn.model_selection import ParameterSampler
+from threadpoolctl import threadpool_limits
+
+from src.core.artifacts import artifact_key
+from src.core.tracing import MemorySampler, traced
+from src.data_loader import ROOT_DIR
+from src.models import TUNED_PARAMS_PATH, TUNING_TASKS, search_spaces, share_training_data
+
+TASKS = TUNING_TASKS
+
+# Trial logs (JSON lines, one per task) of the searches
+TUNING_DIR = ROOT_DIR / "reports" / "tuning"
+
+# Halving schedule: every rung trains on ETA times more rows and keeps the best 1 / ETA configs
+ETA = 3
+MIN_ROWS = 10_000
+
+# Share of the training rows held out to score every trial
+VALIDATION_FRACTION = 0.2
+
+
+def sample_candidates(task, n_candidates, models=None, random_state=42):
+    """n_candidates parameter sets per model of the task (all, or those in models) from search_spaces()."""
+    candidates = []
+    for name, (_, space) in search_spaces()[task].items():
+        if models and name not in models:
+            continue
+        for params in ParameterSampler(space, n_candidates, random_state=random_state):
+            candidates.append((name, {key: value.item() if isinstance(value, np.generic) else value
+                                      for key, value in params.items()}))
+    return candidates
+
+
+def halving_budgets(n_rows, min_rows=MIN_ROWS, eta=ETA):
+    """Training rows per rung: min_rows, times eta at every rung, ending with all n_rows."""
+    budgets, budget = [], min_rows
+    while budget < n_rows:
+        budgets.append(budget)
+        budget *= eta
+    return budgets + [n_rows]
+
+
+def read_trials(path):
+    """Trials logged so far (a line cut short by an interruption is skipped)."""
+    path = pathlib.Path(path)
+    if not path.exists():
+        return []
+    trials = []
+    with open(path) as f:
+        for line in f:
+            try:
+                trials.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return trials
+
+
+def _estimator(task, name, params):
+    return clone(search_spaces()[task][name][0]).set_params(**params)
+
+
+def _run_trial(task, model, data_path, train_rows, val_rows, threads=1):
+    """
+    Worker: fits a configuration on train_rows of the memory-mapped data and scores it on
+    val_rows, with BLAS/OpenMP pools capped at threads so concurrent trials do not oversubscribe.
+    """
+    X, y = joblib.load(data_path, mmap_mode='r')
+    with threadpool_limits(limits=threads):
+        with MemorySampler() as memory, warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            wall, cpu = time.perf_counter(), time.process_time()
+            model.fit(X[train_rows], y[train_rows])
+            fit_time, cpu_time = time.perf_counter() - wall, time.process_time() - cpu
+        X_val, y_val = X[val_rows], y[val_rows]
+        if task == "frequency":
+            score = roc_auc_score(y_val, model.predict_proba(X_val)[:, 1])
+        else:
+            score = -np.sqrt(mean_squared_error(y_val, model.predict(X_val)))
+    return {"score": float(score), "fit_time_s": fit_time, "cpu_time_s": cpu_time, "peak_memory_mb": memory.peak_mb}
+
+
+def _score(record):
+    return record["score"] if record.get("score") is not None else -math.inf
+
+
+def _promote(survivors, candidates, results, eta):
+    # The best 1 / eta configurations of each model at this rung; failed trials rank last
+    promoted = []
+    for name in dict.fromkeys(candidates[trial_id][0] for trial_id in survivors):
+        trials = [trial_id for trial_id in survivors if candidates[trial_id][0] == name]
+        trials.sort(key=lambda trial_id: _score(results[trial_id]), reverse=True)
+        promoted += trials[:max(1, len(trials) // eta)]
+    return promoted
+
+
+@traced
+def successive_halving(task, X, y, n_candidates=9, min_rows=MIN_ROWS, eta=ETA, models=None, n_jobs=None,
+                       log_path=None, data_key=None, random_state=42):
+    """
+    Successive-halving search over the models of a task ('frequency' or 'severity', see
+    search_spaces). n_candidates configurations per model start on min_rows training rows;
+    every rung multiplies the rows by eta and keeps the best 1 / eta of each model's
+    configurations, until the survivors train on all rows. Trials run in a process pool on one
+    memory-mapped copy of (X, y) and are scored on a fixed validation split (AUC for frequency,
+    -RMSE for severity).
+
+    Every trial (score, fit time, peak memory) is appended to the JSON-lines log_path. Trials
+    already logged for the same data_key are not run again (failed ones are), so an interrupted
+    search resumes where it stopped. Returns a leaderboard of the search's trials, best first.
+    """
+    log_path = pathlib.Path(log_path or TUNING_DIR / f"{task}_trials.jsonl")
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    y = np.asarray(y)
+    rows = np.random.default_rng(random_state).permutation(len(y))
+    n_val = int(len(rows) * VALIDATION_FRACTION)
+    val_rows, train_rows = np.sort(rows[:n_val]), rows[n_val:]
+    budgets = halving_budgets(len(train_rows), min(min_rows, len(train_rows)), eta)
+
+    # Trials are identified by data, configured estimator and split; failed ones are retried
+    candidates = {
+        artifact_key("trial", data_key, task, _estimator(task, name, params), random_state): (name, params)
+        for name, params in sample_candidates(task, n_candidates, models, random_state)
+    }
+    logged = {(trial["trial_id"], trial["n_rows"]): trial for trial in read_trials(log_path) if trial["status"] == "ok"}
+    n_cores = n_jobs or os.cpu_count() or 1
+    survivors, trials = list(candidates), []
+
+    with tempfile.TemporaryDirectory(prefix="tune_") as tmp:
+        data_path = share_training_data(X, y, tmp, task)
+        with ProcessPoolExecutor(max_workers=n_cores, mp_context=multiprocessing.get_context("spawn")) as pool:
+            for rung, budget in enumerate(budgets):
+                rung_rows = np.sort(train_rows[:budget])
+                pending = [trial_id for trial_id in survivors if (trial_id, budget) not in logged]
+                # Cores left over when fewer trials than workers remain go to the tree ensembles
+                threads = max(1, n_cores // max(len(pending), 1))
+                futures = {}
+                for trial_id in pending:
+                    model = _estimator(task, *candidates[trial_id])
+                    if "n_jobs" in model.get_params():
+                        model.set_params(n_jobs=threads)
+                    futures[pool.submit(_run_trial, task, model, data_path, rung_rows, val_rows, threads)] = trial_id
+
+                for future in as_completed(futures):
+                    trial_id = futures[future]
+                    name, params = candidates[trial_id]
+                    record = {"trial_id": trial_id, "task": task, "model": name, "params": params,
+                              "rung": rung, "n_rows": budget}
+                    try:
+                        record.update(future.result(), status="ok")
+                    except Exception as exc:
+                        record.update(score=None, status=f"error: {exc!r}")
+                    with open(log_path, "a") as f:
+                        f.write(json.dumps(record) + "\n")
+                    logged[(trial_id, budget)] = record
+
+                results = {trial_id: logged[(trial_id, budget)] for trial_id in survivors}
+                trials += results.values()
+                if rung < len(budgets) - 1:
+                    survivors = _promote(survivors, candidates, results, eta)
+
+    leaderboard = pd.DataFrame(trials)
+    return leaderboard.sort_values(["n_rows", "score"], ascending=False, na_position="last").reset_index(drop=True)
+
+
+def best_params(leaderboard):
+    """{model: params} of each model's best trial at the largest number of rows it reached."""
+    best = {}
+    for name, trials in leaderboard[leaderboard["status"] == "ok"].groupby("model", sort=False):
+        top = trials[trials["n_rows"] == trials["n_rows"].max()]
+        best[name] = top.loc[top["score"].idxmax(), "params"]
+    return best
+
+
+def save_best_params(task, params, path=TUNED_PARAMS_PATH):
+    """Merges a task's best parameters into the file read by the 'tuned' model profile."""
+    path = pathlib.Path(path)
+    saved = json.loads(path.read_text()) if path.exists() else {}
+    saved[task] = {**saved.get(task, {}), **params}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(saved, indent=4))
+    return path
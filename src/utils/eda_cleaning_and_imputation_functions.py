@@ -1,7 +1,19 @@
 # Import required libraries
+import pathlib
+import re
+
+import joblib
 import pandas as pd
 import numpy as np
 
+from src.core.artifacts import code_fingerprint
+from src.core.tracing import traced
+from src.data_loader import save_processed
+from src.imputation import apply_imputer, fit_imputer
+from src.policy_aggregates import combine_policy_aggregates, compute_policy_aggregates, load_policy_aggregates
+from src.schema import RAW_DTYPES, apply_schema, memory_report
+from src.summary_stats import merge_summaries, save_summary, summarize, summary_metrics
+
 # Define the title-to-gender mapping
 TITLE_TO_GENDER = {
     'Mr': 'Male',
@@ -11,13 +23,40 @@ TITLE_TO_GENDER = {
     'Dr': 'Not specified',  # You can extend this as needed
 }
 
+# Placeholders treated as missing values
+MISSING_PLACEHOLDERS = ['', 'Not specified', 'Unknown', 'NA', 'N/A']
+
+# Imputation of the raw extract (src/imputation.py), applied after placeholders are standardized
+# and Gender is inferred from Title
+RAW_IMPUTATION_SPEC = {
+    'Bank': {'strategy': 'mode'},
+    'AccountType': {'strategy': 'mode'},
+    'WrittenOff': {'strategy': 'mode'},
+    'CustomValueEstimate': {'strategy': 'group_median', 'by': 'make'},
+}
+
+# Columns dropped from the cleaned dataset
+COLUMNS_TO_DROP = [
+    'UnderwrittenCoverID', 'PolicyID', 'Language', 'Country',
+    'Rebuilt', 'Converted', 'CrossBorder', 'NumberOfVehiclesInFleet', 'Title'
+]
+
+# Function to read the raw pipe-delimited extract
+@traced
+def read_raw_data(input_file, chunksize=None):
+    """
+    Reads the raw pipe-delimited extract with explicit dtypes.
+    Returns a DataFrame, or an iterator of DataFrames when chunksize is given.
+    """
+    return pd.read_csv(input_file, sep="|", dtype=RAW_DTYPES, chunksize=chunksize)
+
 # Function to standardize missing values
+@traced
 def standardize_missing_values(df, cols):
     """
     Standardizes common missing value placeholders like 'NA', 'Unknown', etc. to NaN.
     """
-    for col in cols:
-        df[col] = df[col].replace(['', 'Not specified', 'Unknown', 'NA', 'N/A'], np.nan)
+    df[cols] = df[cols].mask(df[cols].isin(MISSING_PLACEHOLDERS))
     return df
 
 # Function to infer gender from title
@@ -30,27 +69,36 @@ def infer_gender_from_title(row):
     return row['Gender']
 
 # Function to impute gender using the title
+@traced
 def impute_gender(df):
     """
     Imputes missing 'Gender' values based on the 'Title' column.
+    Vectorized equivalent of applying infer_gender_from_title row by row.
     """
-    df['Gender'] = df.apply(infer_gender_from_title, axis=1)
+    missing = df['Gender'].isna()
+    gender = df['Gender'].astype(object).mask(missing, df['Title'].map(TITLE_TO_GENDER))
+    df['Gender'] = gender.infer_objects()
     return df
 
 # Function to impute categorical variables using mode
-def impute_categorical_modes(df, columns):
+@traced
+def impute_categorical_modes(df, columns, modes=None):
     """
     Imputes missing values for categorical variables using the mode (most frequent value).
+    Precomputed modes (e.g. gathered over the whole file) can be passed as a {column: value} dict.
     """
-    for col in columns:
-        mode_val = df[col].mode(dropna=True)[0]
-        df[col] = df[col].fillna(mode_val)
-    return df
+    if modes is None:
+        return apply_imputer(df, fit_imputer(df, {col: {'strategy': 'mode'} for col in columns}))
+    return apply_imputer(df, {col: {'value': modes[col]} for col in columns})
 
-# Function to clean the data by standardizing missing values, imputing gender and categorical modes
-def clean_data(df):
+# Function to clean the data by standardizing missing values, imputing gender and the RAW_IMPUTATION_SPEC columns
+@traced
+def clean_data(df, imputer=None):
     """
     The main function to clean the data: handles missing values and imputations.
+    Bank, AccountType, WrittenOff and CustomValueEstimate are imputed as in RAW_IMPUTATION_SPEC,
+    with statistics fitted on df unless a fitted imputer (e.g. gathered over the whole file
+    by statistics_from_counts) is given.
     """
     # Standardize placeholders to NaN
     df = standardize_missing_values(df, ['Gender', 'Bank', 'AccountType'])
@@ -58,12 +106,13 @@ def clean_data(df):
     # Impute gender using Title
     df = impute_gender(df)
     
-    # Impute other categorical variables like 'Bank' and 'AccountType'
-    df = impute_categorical_modes(df, ['Bank', 'AccountType'])
-    
-    return df
+    # Impute modes and the 'make' medians of CustomValueEstimate, with statistics from one pass
+    if imputer is None:
+        imputer = fit_imputer(df, RAW_IMPUTATION_SPEC)
+    return apply_imputer(df, imputer)
 
 # Function to safely drop unnecessary columns
+@traced
 def drop_columns_safely(df, cols_to_drop):
     """
     Drops specified columns from the dataframe, checks if they exist before dropping.
@@ -76,47 +125,337 @@ def drop_columns_safely(df, cols_to_drop):
     print(f"Dropped columns: {dropped_cols}")
     return df
 
+# Function to encode PolicyID as a compact integer code
+@traced
+def add_policy_code(df, policy_ids=None):
+    """
+    Adds 'PolicyCode', the position of PolicyID in the sorted array of distinct policy IDs
+    (-1 when PolicyID is missing), so per-policy metrics survive dropping PolicyID.
+    Pass the global policy_ids when processing the data in chunks; incremental ingestion
+    appends new IDs to that array, so existing codes never change.
+    """
+    if policy_ids is None:
+        codes, _ = pd.factorize(df['PolicyID'], sort=True)
+    else:
+        ids = df['PolicyID'].to_numpy(dtype='float64', na_value=np.nan)
+        codes = pd.Index(policy_ids).get_indexer(ids)
+    df.insert(df.columns.get_loc('PolicyID'), 'PolicyCode', codes.astype('int32'))
+    return df
+
 # Function to impute missing 'CustomValueEstimate' using median by 'make'
-def impute_custom_value(df):
+@traced
+def impute_custom_value(df, make_medians=None, global_median=None):
     """
     Imputes missing 'CustomValueEstimate' values using group median by 'make' and global median as fallback.
+    Precomputed medians (a {make: median} mapping and a scalar) can be passed in for chunked processing.
     """
-    # Step 1: Median by VehicleMake
-    make_median = df.groupby('make')['CustomValueEstimate'].transform('median')
-
-    # Step 2: Impute missing values with group median
-    df['CustomValueEstimate_imputed'] = df['CustomValueEstimate'].fillna(make_median)
-
-    # Step 3: Fallback to global median for still missing values
-    global_median = df['CustomValueEstimate'].median()
-    df['CustomValueEstimate_imputed'] = df['CustomValueEstimate_imputed'].fillna(global_median)
-
-    # Replace original column with imputed values
-    df['CustomValueEstimate'] = df['CustomValueEstimate_imputed']
-    df.drop(columns=['CustomValueEstimate_imputed'], inplace=True)
-
-    return df
+    imputer = fit_imputer(df, {'CustomValueEstimate': RAW_IMPUTATION_SPEC['CustomValueEstimate']})
+    if make_medians is not None:
+        imputer['CustomValueEstimate']['values'] = make_medians
+    if global_median is not None:
+        imputer['CustomValueEstimate']['value'] = global_median
+    return apply_imputer(df, imputer)
 
 # Function to calculate Loss Ratio and handle zero premiums
+@traced
 def calculate_loss_ratio(df):
     """
     Calculates the loss ratio while handling zero premiums gracefully.
     When TotalPremium == 0, set LossRatio to 100% (i.e., 1).
     """
-    df['LossRatio'] = df.apply(
-        lambda row: 1 if row['TotalPremium'] == 0 else row['TotalClaims'] / row['TotalPremium'],
-        axis=1
-    )
+    claims = df['TotalClaims'].to_numpy(dtype='float64')
+    premium = df['TotalPremium'].to_numpy(dtype='float64')
+    df['LossRatio'] = np.divide(claims, premium, out=np.ones_like(claims), where=premium != 0)
     return df
 
+# Function to compute the mode from accumulated value counts
+def mode_from_counts(counts):
+    """
+    Returns the mode of a value-count Series, breaking ties like Series.mode (smallest value first).
+    """
+    counts = counts[counts.index.notna() & (counts > 0)]
+    if counts.empty:
+        return np.nan
+    return sorted(counts.index[counts == counts.max()])[0]
+
+# Function to compute the median from accumulated value counts
+def median_from_counts(counts):
+    """
+    Returns the exact median of the values described by a value-count Series.
+    """
+    counts = counts[counts.index.notna() & (counts > 0)].sort_index()
+    n = int(counts.sum())
+    if n == 0:
+        return np.nan
+    cumulative = counts.cumsum().to_numpy()
+    values = counts.index.to_numpy(dtype='float64')
+    lower = values[np.searchsorted(cumulative, (n - 1) // 2, side='right')]
+    upper = values[np.searchsorted(cumulative, n // 2, side='right')]
+    return (lower + upper) / 2
+
+# Function to accumulate the value counts the cleaning statistics are derived from
+@traced
+def count_cleaning_values(chunks):
+    """
+    Accumulates, over an iterable of raw chunks, the value counts of Gender/Bank/AccountType/
+    WrittenOff, the (make, CustomValueEstimate) counts and the distinct PolicyIDs.
+    Counts from disjoint sets of rows can be combined with merge_counts.
+    """
+    raw_counts = {col: [] for col in ['Gender', 'Bank', 'AccountType', 'WrittenOff']}
+    value_counts = []
+    policy_ids = []
+    for chunk in chunks:
+        for col in raw_counts:
+            raw_counts[col].append(chunk[col].value_counts(dropna=False))
+        value_counts.append(
+            chunk.groupby(['make', 'CustomValueEstimate'], dropna=False).size()
+        )
+        policy_ids.append(chunk['PolicyID'].dropna().unique().to_numpy(dtype='float64'))
+
+    # Combine the per-chunk counts
+    return {
+        'raw_counts': {col: merge_counts(*counts) for col, counts in raw_counts.items()},
+        'value_counts': merge_counts(*value_counts),
+        'policy_ids': np.unique(np.concatenate(policy_ids)) if policy_ids else np.array([]),
+    }
+
+# Function to add up value counts gathered over different rows
+def merge_counts(*counts):
+    """
+    Sums value-count Series (single or multi-level index), keeping missing values as keys.
+    """
+    counts = [c for c in counts if c is not None]
+    if not counts:
+        return pd.Series(dtype='int64')
+    combined = pd.concat(counts)
+    return combined.groupby(level=list(range(combined.index.nlevels)), dropna=False).sum()
+
+# Function to derive the imputation statistics from accumulated counts
+@traced
+def statistics_from_counts(counts):
+    """
+    Derives the global modes (Bank, AccountType, WrittenOff) and the 'make' / global medians
+    of 'CustomValueEstimate' from the output of count_cleaning_values, and the imputer of
+    clean_data (RAW_IMPUTATION_SPEC) made of them.
+    """
+    raw_counts, value_counts = counts['raw_counts'], counts['value_counts']
+
+    # Modes are taken after placeholders are standardized to NaN, as in clean_data
+    modes = {}
+    for col in ['Bank', 'AccountType']:
+        col_counts = raw_counts[col]
+        modes[col] = mode_from_counts(col_counts[~col_counts.index.isin(MISSING_PLACEHOLDERS)])
+    modes['WrittenOff'] = mode_from_counts(raw_counts['WrittenOff'])
+
+    value_counts = value_counts[value_counts.index.get_level_values(1).notna()]
+    make_medians = {
+        make: median_from_counts(make_counts.droplevel(0))
+        for make, make_counts in value_counts.groupby(level=0)
+    }
+    global_median = median_from_counts(value_counts.groupby(level=1).sum())
+
+    imputer = {col: {'value': value} for col, value in modes.items()}
+    imputer['CustomValueEstimate'] = {'value': global_median, 'by': 'make', 'values': make_medians}
+
+    return {
+        'raw_counts': raw_counts,
+        'modes': modes,
+        'make_medians': make_medians,
+        'global_median': global_median,
+        'imputer': imputer,
+        'policy_ids': counts['policy_ids'],
+    }
+
+# Function to gather the global cleaning statistics in a first pass over the raw file
+@traced
+def collect_cleaning_statistics(input_file, chunksize):
+    """
+    First pass of the streaming pipeline: accumulates value counts chunk by chunk and derives
+    the global modes (Bank, AccountType, WrittenOff), the 'make' / global medians of
+    'CustomValueEstimate' and the sorted distinct PolicyIDs. Memory is bounded by the
+    number of distinct values, not rows.
+    """
+    return statistics_from_counts(count_cleaning_values(read_raw_data(input_file, chunksize=chunksize)))
+
+# Function to print the value counts of the key columns before cleaning
+def print_cleaning_preview(raw_counts):
+    """
+    Prints missing counts and value counts of Gender, Bank and AccountType before cleaning.
+    """
+    print("🔍 BEFORE CLEANING")
+    for label, col in [('GENDER', 'Gender'), ('BANK', 'Bank'), ('ACCOUNT TYPE', 'AccountType')]:
+        counts = raw_counts[col].sort_values(ascending=False, kind='stable')
+        missing = int(counts[counts.index.isna()].sum())
+        print(f"\n{label} (missing count):", missing)
+        print(counts if col == 'Gender' else counts.head())
+
+# Function to apply the cleaning steps to one chunk using precomputed statistics
+@traced
+def clean_chunk(df, stats):
+    """
+    Applies the cleaning and imputation steps of preprocess_data to a single chunk,
+    using the global statistics from collect_cleaning_statistics.
+    """
+    df = clean_data(df, stats['imputer'])
+    df = add_policy_code(df, stats['policy_ids'])
+    df = df.drop(columns=[col for col in COLUMNS_TO_DROP if col in df.columns])
+    df = calculate_loss_ratio(df)
+    return apply_schema(df)
+
+# Streaming variant of the preprocessing pipeline
+@traced
+def preprocess_data_in_chunks(input_file, output_file, chunksize=100_000, summary_file=None):
+    """
+    Two-pass streaming version of preprocess_data for extracts that do not fit in memory.
+    The first pass gathers the global statistics, the second cleans each chunk and appends it
+    to the output file, so the output is identical to the in-memory path while peak memory is
+    set by the chunk size. The output is a partitioned Parquet dataset, or CSV when
+    output_file ends in '.csv'. Returns summary metrics merged from the per-chunk summaries
+    of src/summary_stats.py; pass summary_file to save the merged summary.
+    """
+    try:
+        stats = collect_cleaning_statistics(input_file, chunksize)
+    except FileNotFoundError:
+        print(f"Error: The file '{input_file}' was not found.")
+        return None
+    except Exception as e:
+        print(f"An error occurred while reading the file: {e}")
+        return None
+
+    print_cleaning_preview(stats['raw_counts'])
+
+    summary = None
+    try:
+        for i, chunk in enumerate(read_raw_data(input_file, chunksize=chunksize)):
+            chunk = clean_chunk(chunk, stats)
+            save_processed(chunk, output_file, append=i > 0, part=i)
+            summary = merge_summaries(summary, summarize(chunk))
+        print("✅ Final cleaned data saved.")
+    except Exception as e:
+        print(f"Error while cleaning or saving the file: {e}")
+        return None
+
+    if summary_file is not None:
+        save_summary(summary, summary_file)
+    return summary_metrics(summary)
+
+# Function to read only the rows of the given months from the raw file
+def read_new_months(input_file, known_months, chunksize):
+    """
+    Yields the raw chunks restricted to TransactionMonth values not in known_months.
+    """
+    for chunk in read_raw_data(input_file, chunksize=chunksize):
+        chunk = chunk[~chunk['TransactionMonth'].isin(known_months)]
+        if len(chunk):
+            yield chunk
+
+# Function to delete the part files written by an interrupted ingestion run
+def remove_parts_from(output_file, first_part):
+    """
+    Removes the files of the processed dataset whose part number is first_part or higher.
+    """
+    for path in pathlib.Path(output_file).rglob('part-*.parquet'):
+        if int(re.match(r'part-(\d+)', path.name).group(1)) >= first_part:
+            path.unlink()
+
+# The incremental state is only valid for the code that wrote it: a change to the schema, the
+# cleaning/imputation logic or the summary layout (or a bump of the version) rebuilds the store from scratch
+INGESTION_STATE_VERSION = 1
+INGESTION_CODE = (
+    "src.schema", "src.imputation", "src.summary_stats", "src.utils.eda_cleaning_and_imputation_functions",
+)
+
+# Function to identify the code an ingestion state was written with
+def ingestion_state_version():
+    return f"{INGESTION_STATE_VERSION}-{code_fingerprint(*INGESTION_CODE)}"
+
+# Incremental variant of the streaming pipeline
+@traced
+def ingest_new_months(input_file, output_file, state_file, aggregates_file, chunksize=100_000, summary_file=None):
+    """
+    Cleans only the TransactionMonths that are not in the processed store yet and appends them
+    as new part files. The state file keeps the value counts behind the imputation statistics,
+    the policy codes and the running summary, so they are updated with the new rows only; the
+    cached per-policy aggregates are combined the same way. Months already ingested keep the
+    imputations made when they were ingested. Returns the summary metrics over all months
+    (None on error); pass summary_file to also save the merged summary of src/summary_stats.py.
+    The first run, with no state file, is equivalent to preprocess_data_in_chunks; so is a run
+    whose state was written by another ingestion_state_version().
+    """
+    state_file = pathlib.Path(state_file)
+    version = ingestion_state_version()
+    state = joblib.load(state_file) if state_file.exists() else None
+    if state is not None and state.get('version') != version:
+        print("♻️ The ingestion state was written by other cleaning code; reprocessing all months.")
+        state = None
+    state = state or {'months': [], 'counts': None, 'summary': None, 'next_part': 0}
+    try:
+        new_counts = count_cleaning_values(read_new_months(input_file, state['months'], chunksize))
+    except FileNotFoundError:
+        print(f"Error: The file '{input_file}' was not found.")
+        return None
+    except Exception as e:
+        print(f"An error occurred while reading the file: {e}")
+        return None
+
+    if new_counts['raw_counts']['Gender'].sum() == 0:
+        print("✅ No new months to ingest.")
+        return summary_metrics(state['summary'])
+
+    # Merge the counts; new policy IDs get the next codes so existing PolicyCodes stay valid
+    old = state['counts']
+    counts = new_counts if old is None else {
+        'raw_counts': {col: merge_counts(old['raw_counts'][col], new_counts['raw_counts'][col])
+                       for col in new_counts['raw_counts']},
+        'value_counts': merge_counts(old['value_counts'], new_counts['value_counts']),
+        'policy_ids': np.concatenate([old['policy_ids'],
+                                      np.setdiff1d(new_counts['policy_ids'], old['policy_ids'])]),
+    }
+    stats = statistics_from_counts(counts)
+    print_cleaning_preview(new_counts['raw_counts'])
+
+    summary = state['summary']
+    months, aggregates = set(), None
+    part = state['next_part']
+    # Leftovers of an interrupted run are not in the state; drop them before appending
+    if state['months']:
+        remove_parts_from(output_file, part)
+    try:
+        for chunk in read_new_months(input_file, state['months'], chunksize):
+            months.update(chunk['TransactionMonth'].unique())
+            chunk = clean_chunk(chunk, stats)
+            save_processed(chunk, output_file, append=part > 0, part=part)
+            summary = merge_summaries(summary, summarize(chunk))
+            aggregates = combine_policy_aggregates(aggregates, compute_policy_aggregates(
+                chunk['PolicyCode'], chunk['TotalClaims'], chunk['TotalPremium'], len(stats['policy_ids'])))
+            part += 1
+    except Exception as e:
+        print(f"Error while cleaning or saving the file: {e}")
+        return None
+
+    existing = load_policy_aggregates(aggregates_file) if state['months'] else None
+    combine_policy_aggregates(existing, aggregates).to_parquet(aggregates_file)
+
+    # A missing TransactionMonth is tracked like a month, so those rows are ingested only once
+    state = {'months': sorted(set(state['months']) | months, key=str), 'counts': counts,
+             'summary': summary, 'next_part': part, 'version': version}
+    joblib.dump(state, state_file)
+    if summary_file is not None:
+        save_summary(summary, summary_file)
+    print(f"✅ Ingested {len(months)} new month(s): {', '.join(sorted(map(str, months)))}")
+    return summary_metrics(summary)
+
 # Main function to clean and process the data
-def preprocess_data(input_file, output_file):
+@traced
+def preprocess_data(input_file, output_file, memory_report_file=None):
     """
     Full preprocessing pipeline including cleaning, imputations, and saving the cleaned data.
+    The cleaned frame is cast to the compact schema in src/schema.py; pass memory_report_file
+    to save the per-column memory saving as CSV.
     """
     try:
         # Read the raw data
-        df = pd.read_csv(input_file, sep="|")
+        df = read_raw_data(input_file)
     except FileNotFoundError:
         print(f"Error: The file '{input_file}' was not found.")
         return None
@@ -133,29 +472,30 @@ def preprocess_data(input_file, output_file):
     print("\nACCOUNT TYPE (missing count):", df['AccountType'].isna().sum())
     print(df['AccountType'].value_counts(dropna=False).head())
 
-    # Apply Cleaning Process
-    df_cleaned = clean_data(df.copy())
+    # Apply Cleaning Process (imputes Bank, AccountType, WrittenOff and CustomValueEstimate)
+    df_cleaned = clean_data(df)
 
-    # Drop columns that are not needed
-    columns_to_drop = [
-        'UnderwrittenCoverID', 'PolicyID', 'Language', 'Country',
-        'Rebuilt', 'Converted', 'CrossBorder', 'NumberOfVehiclesInFleet', 'Title'
-    ]
-    df_cleaned = drop_columns_safely(df_cleaned, columns_to_drop)
+    # Keep a compact integer code of PolicyID for per-policy metrics
+    df_cleaned = add_policy_code(df_cleaned)
 
-    # Impute 'CustomValueEstimate' based on the group and global median
-    df_cleaned = impute_custom_value(df_cleaned)
+    # Drop columns that are not needed
+    df_cleaned = drop_columns_safely(df_cleaned, COLUMNS_TO_DROP)
 
     # Calculate Loss Ratio
     df_cleaned = calculate_loss_ratio(df_cleaned)
 
-    # Impute 'WrittenOff' using the mode
-    mode_writtenoff = df_cleaned['WrittenOff'].mode()[0]
-    df_cleaned['WrittenOff'] = df_cleaned['WrittenOff'].fillna(mode_writtenoff)
+    # Cast to the compact dtype schema
+    df_compact = apply_schema(df_cleaned)
+    report = memory_report(df_cleaned, df_compact)
+    print(f"Compact schema: {report.loc['TOTAL', 'bytes_before'] / 1e6:.1f} MB -> "
+          f"{report.loc['TOTAL', 'bytes_after'] / 1e6:.1f} MB ({report.loc['TOTAL', 'saving_pct']}% saved)")
+    if memory_report_file is not None:
+        report.to_csv(memory_report_file, index_label='column')
+    df_cleaned = df_compact
 
-    # Save the cleaned data to CSV
+    # Save the cleaned data (partitioned Parquet, or CSV for a '.csv' path)
     try:
-        df_cleaned.to_csv(output_file, index=False)
+        save_processed(df_cleaned, output_file)
         print("✅ Final cleaned data saved.")
     except Exception as e:
         print(f"Error while saving the file: {e}")
@@ -0,0 +1,119 @@
+import html
+import multiprocessing
+import os
+import pathlib
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from src.core.tracing import traced
+from src.data_loader import ROOT_DIR
+from src.utils import eda_visualization_functions as viz
+
+# Report output location
+EDA_REPORT_DIR = ROOT_DIR / "docs" / "reports" / "eda"
+
+# Default report content
+CATEGORICAL_COLUMNS = ['Gender', 'Province', 'VehicleType', 'CoverType', 'make', 'Bank']
+NUMERICAL_COLUMNS = ['TotalClaims', 'TotalPremium', 'SumInsured', 'CustomValueEstimate', 'RegistrationYear', 'kilowatts']
+SCATTER_PAIRS = [('TotalClaims', 'TotalPremium'), ('SumInsured', 'TotalPremium')]
+LOSS_RATIO_COLUMNS = ['make', 'Bank', 'Province', 'PostalCode', 'VehicleType']
+
+
+# Function to compute every aggregate the report draws, in one pass over the frame
+@traced
+def compute_report_figures(df, categorical_columns=CATEGORICAL_COLUMNS, numerical_columns=NUMERICAL_COLUMNS,
+                           scatter_pairs=SCATTER_PAIRS, loss_ratio_columns=LOSS_RATIO_COLUMNS,
+                           top_n=10, bins=30, max_points=10_000, max_groups=30, summary=None):
+    """
+    Returns a list of figure specs (name, title, draw function name, arguments, figsize).
+    Only small aggregates are kept, so the specs are cheap to send to worker processes.
+    Columns missing from df are skipped. Loss-ratio rollups are read from summary when given.
+    """
+    present = lambda columns: [col for col in columns if col in df.columns]
+    figures = [("missing_values", "Missing values", "draw_missing_data", (viz.missing_rates(df),), (10, 6))]
+    for col in present(categorical_columns):
+        figures.append((f"categories_{col}", f"Top {col} categories", "draw_categorical_distribution",
+                        (viz.top_value_counts(df, col, top_n), col), (10, 6)))
+    for col in present(numerical_columns):
+        figures.append((f"distribution_{col}", f"Distribution of {col}", "draw_histogram",
+                        (viz.histogram_bins(df, col, bins), col), (10, 6)))
+    for x_column, y_column in scatter_pairs:
+        if x_column in df.columns and y_column in df.columns:
+            figures.append((f"scatter_{x_column}_vs_{y_column}", f"{x_column} vs {y_column}",
+                            "draw_numerical_relationship",
+                            (viz.scatter_sample(df, x_column, y_column, max_points), x_column, y_column), (10, 6)))
+    if 'LossRatio' in df.columns:
+        figures.append(("distribution_LossRatio", "Distribution of Loss Ratio", "draw_histogram",
+                        (viz.histogram_bins(df, 'LossRatio', bins), "Loss Ratio", 'orange',
+                         "Distribution of Loss Ratio"), (10, 6)))
+        for col in present(loss_ratio_columns):
+            figures.append((f"loss_ratio_by_{col}", f"Average Loss Ratio by {col}", "draw_loss_ratio_vs_other",
+                            (viz.loss_ratio_by(df, col, max_groups, summary), col), (12, 6)))
+    figures.append(("correlation", "Correlation heatmap", "draw_correlation_heatmap",
+                    (viz.correlation_matrix(df),), (12, 10)))
+    if 'WrittenOff' in df.columns:
+        figures.append(("writtenoff", "WrittenOff status", "draw_writtenoff_distribution",
+                        (df['WrittenOff'].value_counts(dropna=False),), (10, 6)))
+    return figures
+
+
+def _render_figure(spec, output_dir):
+    # Worker: draw one figure with the Agg backend and save it as PNG
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    name, _, draw, args, figsize = spec
+    viz.set_plot_style()
+    fig, ax = plt.subplots(figsize=figsize)
+    getattr(viz, draw)(ax, *args)
+    fig.tight_layout()
+    path = pathlib.Path(output_dir) / f"{name}.png"
+    fig.savefig(path, dpi=100)
+    plt.close(fig)
+    return path.name
+
+
+# Function to write the HTML index of the report
+def write_report_index(figures, output_dir, n_rows, title="EDA report"):
+    """
+    Writes index.html linking every rendered figure.
+    """
+    items = "\n".join(
+        f'<figure><img src="{html.escape(file)}" alt="{html.escape(caption)}" loading="lazy">'
+        f'<figcaption>{html.escape(caption)}</figcaption></figure>'
+        for file, caption in figures
+    )
+    page = f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{html.escape(title)}</title>
+<style>body{{font-family:sans-serif;margin:2em}}figure{{display:inline-block;margin:1em;width:45%}}img{{width:100%}}</style>
+</head><body>
+<h1>{html.escape(title)}</h1>
+<p>{n_rows:,} rows, generated {time.strftime('%Y-%m-%d %H:%M')}</p>
+{items}
+</body></html>
+"""
+    path = pathlib.Path(output_dir) / "index.html"
+    path.write_text(page, encoding="utf-8")
+    return path
+
+
+# Function to generate the headless EDA report
+@traced
+def generate_eda_report(df, output_dir=EDA_REPORT_DIR, n_jobs=None, **figure_options):
+    """
+    Precomputes the report aggregates once, renders every figure with the Agg backend in a
+    process pool and writes the PNGs plus an HTML index to output_dir. Returns the index path.
+    """
+    output_dir = pathlib.Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    specs = compute_report_figures(df, **figure_options)
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs == 1:
+        files = [_render_figure(spec, output_dir) for spec in specs]
+    else:
+        # spawn: workers start clean instead of inheriting the loaded frame and Arrow threads
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(specs)),
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            files = list(pool.map(_render_figure, specs, [output_dir] * len(specs)))
+    return write_report_index([(file, spec[1]) for file, spec in zip(files, specs)], output_dir, len(df))
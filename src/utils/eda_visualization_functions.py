@@ -1,7 +1,15 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+from src.core.lazy import lazy_import
+from src.core.tracing import traced
+from src.summary_stats import loss_ratio_table
+
+# Plotting libraries are imported by the first draw step, so the aggregates load without them
+plt = lazy_import("matplotlib.pyplot")
+sns = lazy_import("seaborn")
+
+# Each plot is split into an aggregate step (runs once on the full frame) and a draw step
+# (only touches the small aggregate), so src/utils/eda_report.py can render headless in parallel.
 
 # Function to set up the default plot style for consistency
 def set_plot_style():
@@ -11,17 +19,135 @@ def set_plot_style():
     sns.set(style="whitegrid", palette="muted")
     plt.rcParams["figure.figsize"] = (10, 6)
 
+# Function to compute the percentage of missing values per column
+@traced
+def missing_rates(df):
+    """
+    Returns the percentage of missing values of the columns that have any.
+    """
+    missing_data = df.isnull().mean() * 100
+    return missing_data[missing_data > 0].sort_values(ascending=False)
+
+# Function to compute the most frequent categories of a column
+@traced
+def top_value_counts(df, column, top_n=10, dropna=True):
+    """
+    Returns the counts of the top_n most frequent values of a column.
+    """
+    return df[column].value_counts(dropna=dropna).head(top_n)
+
+# Function to compute histogram bins of a numerical column
+@traced
+def histogram_bins(df, column, bins=30):
+    """
+    Returns (counts, bin_edges) of the finite values of a numerical column.
+    """
+    values = df[column].to_numpy(dtype='float64', na_value=np.nan)
+    return np.histogram(values[np.isfinite(values)], bins=bins)
+
+# Function to downsample two columns for a scatter plot
+@traced
+def scatter_sample(df, x_column, y_column, max_points=10_000, random_state=42):
+    """
+    Returns at most max_points complete (x, y) rows, sampled uniformly.
+    """
+    data = df[[x_column, y_column]].dropna()
+    if len(data) > max_points:
+        data = data.sample(max_points, random_state=random_state)
+    return data
+
+# Function to compute the mean loss ratio per category
+@traced
+def loss_ratio_by(df, column, max_groups=30, summary=None):
+    """
+    Returns the mean LossRatio of the max_groups categories with the most rows.
+    With a summary from src.summary_stats that covers the column, df is not scanned.
+    """
+    if summary is not None and summary['groups'] is not None \
+            and column in summary['groups'].index.get_level_values('group_col'):
+        return loss_ratio_table(summary, column, max_groups)['MeanLossRatio'].rename('LossRatio')
+    grouped = df.groupby(column, observed=True)['LossRatio'].agg(['mean', 'size'])
+    return grouped.nlargest(max_groups, 'size')['mean'].rename('LossRatio')
+
+# Function to compute the correlation matrix of numerical columns
+@traced
+def correlation_matrix(df, correlation_columns=None):
+    """
+    Returns the correlation matrix of the numerical columns (or of correlation_columns).
+    """
+    if correlation_columns is None:
+        correlation_columns = df.select_dtypes(include=[np.number]).columns
+    return df[correlation_columns].astype('float64').corr()
+
+# Placeholder for figures whose aggregate is empty (e.g. no missing values after cleaning)
+def _draw_no_data(ax, message):
+    ax.text(0.5, 0.5, message, ha='center', va='center', transform=ax.transAxes)
+    ax.set_axis_off()
+
+# Function to draw missing rates
+def draw_missing_data(ax, missing_data):
+    if missing_data.empty:
+        _draw_no_data(ax, "No missing values")
+        return
+    missing_data.plot(kind='barh', color='coral', ax=ax)
+    ax.set_title("Percentage of Missing Values per Column")
+    ax.set_xlabel("Percentage")
+    ax.set_ylabel("Columns")
+
+# Function to draw category counts
+def draw_categorical_distribution(ax, counts, column):
+    if counts.empty:
+        _draw_no_data(ax, f"No values in '{column}'")
+        return
+    counts.plot(kind='barh', color='skyblue', ax=ax)
+    ax.set_title(f"Top {len(counts)} Most Frequent Categories in '{column}'")
+    ax.set_xlabel("Frequency")
+    ax.set_ylabel(column)
+
+# Function to draw precomputed histogram bins
+def draw_histogram(ax, histogram, column, color='seagreen', title=None):
+    counts, edges = histogram
+    ax.stairs(counts, edges, fill=True, color=color, edgecolor='black')
+    ax.set_title(title or f"Distribution of {column}")
+    ax.set_xlabel(column)
+    ax.set_ylabel("Frequency")
+
+# Function to draw a scatter of sampled points
+def draw_numerical_relationship(ax, data, x_column, y_column):
+    ax.scatter(data[x_column], data[y_column], color='blue', alpha=0.6, s=10)
+    ax.set_title(f"{x_column} vs {y_column}")
+    ax.set_xlabel(x_column)
+    ax.set_ylabel(y_column)
+
+# Function to draw mean loss ratios per category
+def draw_loss_ratio_vs_other(ax, avg_loss_ratio, column):
+    colors = sns.color_palette('viridis', len(avg_loss_ratio))
+    ax.bar(avg_loss_ratio.index.astype(str), avg_loss_ratio.to_numpy(), color=colors)
+    ax.set_title(f"Average Loss Ratio vs {column}")
+    ax.set_xlabel(column)
+    ax.set_ylabel("Average Loss Ratio")
+    ax.tick_params(axis='x', labelrotation=45)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment('right')
+
+# Function to draw a correlation heatmap
+def draw_correlation_heatmap(ax, corr):
+    sns.heatmap(corr, annot=True, cmap='coolwarm', fmt='.2f', linewidths=0.5, ax=ax)
+    ax.set_title("Correlation Heatmap")
+
+# Function to draw the WrittenOff counts
+def draw_writtenoff_distribution(ax, counts):
+    counts.plot(kind='bar', color='lightcoral', ax=ax)
+    ax.set_title("Distribution of WrittenOff Status")
+    ax.set_xlabel("WrittenOff")
+    ax.set_ylabel("Count")
+
 # Function to visualize missing values per column
 def plot_missing_data(df):
     """
     Plot a bar chart of missing values per column.
     """
-    missing_data = df.isnull().mean() * 100
-    missing_data = missing_data[missing_data > 0]
-    missing_data.sort_values(ascending=False).plot(kind='barh', color='coral')
-    plt.title("Percentage of Missing Values per Column")
-    plt.xlabel("Percentage")
-    plt.ylabel("Columns")
+    draw_missing_data(plt.gca(), missing_rates(df))
     plt.show()
 
 # Function to visualize the distribution of categorical variables
@@ -29,11 +155,7 @@ def plot_categorical_distribution(df, column, top_n=10):
     """
     Plots a bar chart for the distribution of a categorical variable.
     """
-    top_categories = df[column].value_counts().head(top_n)
-    top_categories.plot(kind='barh', color='skyblue')
-    plt.title(f"Top {top_n} Most Frequent Categories in '{column}'")
-    plt.xlabel("Frequency")
-    plt.ylabel(column)
+    draw_categorical_distribution(plt.gca(), top_value_counts(df, column, top_n), column)
     plt.show()
 
 # Function to visualize the distribution of numerical variables
@@ -41,21 +163,15 @@ def plot_numerical_distribution(df, column):
     """
     Plots the distribution of a numerical variable using a histogram.
     """
-    df[column].dropna().plot(kind='hist', bins=30, color='seagreen', edgecolor='black')
-    plt.title(f"Distribution of {column}")
-    plt.xlabel(column)
-    plt.ylabel("Frequency")
+    draw_histogram(plt.gca(), histogram_bins(df, column), column)
     plt.show()
 
 # Function to visualize the relationship between two numerical variables
-def plot_numerical_relationship(df, x_column, y_column):
+def plot_numerical_relationship(df, x_column, y_column, max_points=10_000):
     """
-    Plots the relationship between two numerical variables.
+    Plots the relationship between two numerical variables (on a sample of max_points rows).
     """
-    sns.scatterplot(x=df[x_column], y=df[y_column], color='blue', alpha=0.6)
-    plt.title(f"{x_column} vs {y_column}")
-    plt.xlabel(x_column)
-    plt.ylabel(y_column)
+    draw_numerical_relationship(plt.gca(), scatter_sample(df, x_column, y_column, max_points), x_column, y_column)
     plt.show()
 
 # Function to visualize the distribution of loss ratios
@@ -63,29 +179,18 @@ def plot_loss_ratio_distribution(df):
     """
     Plots the distribution of LossRatio.
     """
-    df['LossRatio'].dropna().plot(kind='hist', bins=30, color='orange', edgecolor='black')
-    plt.title("Distribution of Loss Ratio")
-    plt.xlabel("Loss Ratio")
-    plt.ylabel("Frequency")
+    draw_histogram(plt.gca(), histogram_bins(df, 'LossRatio'), "Loss Ratio", color='orange',
+                   title="Distribution of Loss Ratio")
     plt.show()
 
 # Function to visualize the relationship between LossRatio and other variables
-def plot_loss_ratio_vs_other(df, column):
+def plot_loss_ratio_vs_other(df, column, max_groups=30):
     """
-    Visualizes the relationship between LossRatio and another variable (e.g., 'TotalClaims', 'TotalPremium') 
-    using a bar graph showing the mean LossRatio for each category.
+    Visualizes the relationship between LossRatio and another variable (e.g., 'make', 'Bank')
+    using a bar graph showing the mean LossRatio of the max_groups largest categories.
     """
-    # Group by the specified column and calculate the mean LossRatio for each category
-    avg_loss_ratio = df.groupby(column)['LossRatio'].mean().reset_index()
-
-    # Plotting the bar graph
     plt.figure(figsize=(12, 6))
-    sns.barplot(x=column, y='LossRatio', data=avg_loss_ratio, palette='viridis')
-    
-    plt.title(f"Average Loss Ratio vs {column}")
-    plt.xlabel(column)
-    plt.ylabel("Average Loss Ratio")
-    plt.xticks(rotation=45, ha='right')  # Rotate x-axis labels for better readability
+    draw_loss_ratio_vs_other(plt.gca(), loss_ratio_by(df, column, max_groups), column)
     plt.tight_layout()  # Adjust layout to prevent clipping
     plt.show()
 
@@ -94,13 +199,8 @@ def plot_correlation_heatmap(df, correlation_columns=None):
     """
     Plots a heatmap to show the correlation between numerical variables.
     """
-    if correlation_columns is None:
-        correlation_columns = df.select_dtypes(include=[np.number]).columns
-    
-    corr = df[correlation_columns].corr()
     plt.figure(figsize=(10, 8))
-    sns.heatmap(corr, annot=True, cmap='coolwarm', fmt='.2f', linewidths=0.5)
-    plt.title("Correlation Heatmap")
+    draw_correlation_heatmap(plt.gca(), correlation_matrix(df, correlation_columns))
     plt.show()
 
 # Function to visualize the count distribution of the 'WrittenOff' column
@@ -108,8 +208,5 @@ def plot_writtenoff_distribution(df):
     """
     Plots the count of values in the 'WrittenOff' column.
     """
-    df['WrittenOff'].value_counts(dropna=False).plot(kind='bar', color='lightcoral')
-    plt.title("Distribution of WrittenOff Status")
-    plt.xlabel("WrittenOff")
-    plt.ylabel("Count")
-    plt.show()
\ No newline at end of file
+    draw_writtenoff_distribution(plt.gca(), df['WrittenOff'].value_counts(dropna=False))
+    plt.show()
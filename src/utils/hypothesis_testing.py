@@ -1,13 +1,34 @@
+import numpy as np
 import pandas as pd
 from scipy.stats import ttest_ind, chi2_contingency
+from scipy.stats import t as t_dist
 
-def compute_claim_metrics(df):
+from src.core.tracing import traced
+from src.policy_aggregates import broadcast_to_rows, compute_policy_aggregates
+from src.summary_stats import group_stats
+
+@traced
+def compute_claim_metrics(df, policy_aggregates=None):
+    """
+    Adds ClaimOccurred, per-policy ClaimFrequency, ClaimSeverity and Margin.
+    ClaimFrequency comes from the per-policy aggregates, looked up by the PolicyCode column of
+    the processed data (or a factorized PolicyID on raw data). Cached aggregates from
+    src.policy_aggregates can be passed in to skip the aggregation; they require PolicyCode.
+    """
     df['ClaimOccurred'] = df['TotalClaims'] > 0
-    df['ClaimFrequency'] = df.groupby('PolicyID')['ClaimOccurred'].transform('max')
+    if 'PolicyCode' in df.columns:
+        codes = df['PolicyCode'].to_numpy()
+    else:
+        codes, _ = pd.factorize(df['PolicyID'])
+        policy_aggregates = None
+    if policy_aggregates is None:
+        policy_aggregates = compute_policy_aggregates(codes, df['TotalClaims'], df['TotalPremium'])
+    df['ClaimFrequency'] = broadcast_to_rows(policy_aggregates, 'ClaimFrequency', codes)
     df['ClaimSeverity'] = df['TotalClaims'].where(df['ClaimOccurred'], 0)
     df['Margin'] = df['TotalPremium'] - df['TotalClaims']
     return df
 
+@traced
 def t_test_groups(df, group_col, metric_col, group_a, group_b):
     group1 = df[df[group_col] == group_a][metric_col].dropna()
     group2 = df[df[group_col] == group_b][metric_col].dropna()
@@ -22,6 +43,7 @@ def t_test_groups(df, group_col, metric_col, group_a, group_b):
         "significant": p < 0.05
     }
 
+@traced
 def chi_squared_test(df, group_col, target_col):
     contingency = pd.crosstab(df[group_col], df[target_col])
     chi2, p, _, _ = chi2_contingency(contingency)
@@ -31,4 +53,119 @@ def chi_squared_test(df, group_col, target_col):
         "chi2": chi2,
         "p_value": p,
         "significant": p < 0.05
-    }
\ No newline at end of file
+    }
+
+@traced
+def group_sufficient_stats(df, group_col, metric_cols):
+    """
+    Count, mean and variance (ddof=1) of each metric for every group, from a single groupby pass.
+    Returns a tidy frame with one row per (metric, group).
+    """
+    agg = df.groupby(group_col, observed=True)[list(metric_cols)].agg(['count', 'mean', 'var'])
+    agg.index.name = 'group'
+    stats = agg.stack(level=0, future_stack=True).rename_axis(['group', 'metric']).reset_index()
+    stats.insert(0, 'group_col', group_col)
+    return stats.rename(columns={'count': 'n'})[['group_col', 'metric', 'group', 'n', 'mean', 'var']]
+
+
+def welch_t_test_from_stats(n1, mean1, var1, n2, mean2, var2):
+    """
+    Vectorized Welch t-test from per-group sufficient statistics.
+    Matches scipy.stats.ttest_ind(equal_var=False); returns (t_stat, dof, p_value) arrays.
+    """
+    n1, mean1, var1, n2, mean2, var2 = (np.asarray(a, dtype='float64') for a in (n1, mean1, var1, n2, mean2, var2))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vn1, vn2 = var1 / n1, var2 / n2
+        dof = (vn1 + vn2) ** 2 / (vn1 ** 2 / (n1 - 1) + vn2 ** 2 / (n2 - 1))
+        # scipy uses 1 degree of freedom when both variances are zero
+        dof = np.where(np.isnan(dof), 1, dof)
+        t_stat = (mean1 - mean2) / np.sqrt(vn1 + vn2)
+    p_value = 2 * t_dist.sf(np.abs(t_stat), dof)
+    return t_stat, dof, p_value
+
+
+def adjust_p_values(p_values, method='fdr_bh'):
+    """
+    Multiple-testing correction: 'bonferroni' or Benjamini-Hochberg 'fdr_bh'. NaN p-values are ignored.
+    """
+    p = np.asarray(p_values, dtype='float64')
+    adjusted = np.full_like(p, np.nan)
+    valid = ~np.isnan(p)
+    m = valid.sum()
+    if m == 0:
+        return adjusted
+    if method == 'bonferroni':
+        adjusted[valid] = np.minimum(p[valid] * m, 1.0)
+    elif method == 'fdr_bh':
+        order = np.argsort(p[valid])
+        ranked = p[valid][order] * m / np.arange(1, m + 1)
+        ranked = np.minimum.accumulate(ranked[::-1])[::-1]
+        q = np.empty(m)
+        q[order] = np.minimum(ranked, 1.0)
+        adjusted[valid] = q
+    else:
+        raise ValueError(f"Unknown correction method: {method}")
+    return adjusted
+
+
+def _pairwise_tests(stats):
+    """All unordered pairs of groups within one (group_col, metric) block of sufficient statistics."""
+    i, j = np.triu_indices(len(stats), k=1)
+    a, b = stats.iloc[i], stats.iloc[j]
+    t_stat, dof, p_value = welch_t_test_from_stats(a['n'], a['mean'], a['var'], b['n'], b['mean'], b['var'])
+    return pd.DataFrame({
+        'group_a': a['group'].to_numpy(), 'group_b': b['group'].to_numpy(),
+        'n_a': a['n'].to_numpy(), 'n_b': b['n'].to_numpy(),
+        'mean_a': a['mean'].to_numpy(), 'mean_b': b['mean'].to_numpy(),
+        't_stat': t_stat, 'dof': dof, 'p_value': p_value,
+    })
+
+
+def _one_vs_rest_tests(stats):
+    """Each group against all other groups combined, derived from the per-group statistics."""
+    n, mean, var = (stats[c].to_numpy(dtype='float64') for c in ('n', 'mean', 'var'))
+    m2 = np.nan_to_num(var * (n - 1))
+    n_total = n.sum()
+    mean_total = (n * mean).sum() / n_total
+    m2_total = m2.sum() + (n * (mean - mean_total) ** 2).sum()
+
+    # Remove each group from the pooled moments (Chan et al. combination, inverted)
+    n_rest = n_total - n
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_rest = (n_total * mean_total - n * mean) / n_rest
+        m2_rest = m2_total - m2 - n * n_rest / n_total * (mean - mean_rest) ** 2
+        var_rest = np.maximum(m2_rest, 0) / (n_rest - 1)
+    t_stat, dof, p_value = welch_t_test_from_stats(n, mean, var, n_rest, mean_rest, var_rest)
+    return pd.DataFrame({
+        'group_a': stats['group'].to_numpy(), 'group_b': '<rest>',
+        'n_a': n, 'n_b': n_rest, 'mean_a': mean, 'mean_b': mean_rest,
+        't_stat': t_stat, 'dof': dof, 'p_value': p_value,
+    })
+
+
+@traced
+def batch_t_tests(df, group_cols, metric_cols, mode='pairs', alpha=0.05, summary=None):
+    """
+    Welch t-tests for every (group_col, metric): all pairs of groups (mode='pairs') or each
+    group against the rest (mode='one_vs_rest'), computed from grouped sufficient statistics.
+    p-values are corrected with Bonferroni and Benjamini-Hochberg within each (group_col, metric)
+    family. Returns a tidy results table. With a summary from src.summary_stats the statistics
+    are read from it and df is not scanned (it may be None).
+    """
+    tests = {'pairs': _pairwise_tests, 'one_vs_rest': _one_vs_rest_tests}[mode]
+    results = []
+    for group_col in group_cols:
+        if summary is None:
+            stats = group_sufficient_stats(df, group_col, metric_cols)
+        else:
+            stats = group_stats(summary, group_col, metric_cols)
+        for metric, block in stats.groupby('metric', sort=False):
+            res = tests(block.reset_index(drop=True))
+            res.insert(0, 'mode', mode)
+            res.insert(0, 'metric', metric)
+            res.insert(0, 'group_col', group_col)
+            res['p_bonferroni'] = adjust_p_values(res['p_value'], 'bonferroni')
+            res['p_fdr_bh'] = adjust_p_values(res['p_value'], 'fdr_bh')
+            res['significant'] = res['p_fdr_bh'] < alpha
+            results.append(res)
+    return pd.concat(results, ignore_index=True)
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def _raw_insurance_frame(n_rows=600, seed=0):
+    """Builds a small raw extract with the same columns as the real insurance data."""
+    rng = np.random.default_rng(seed)
+
+    def choice(values, size=n_rows, p=None):
+        # Text values go through an object array so np.nan stays missing instead of becoming 'nan'
+        is_text = any(isinstance(v, str) for v in values)
+        return rng.choice(np.array(values, dtype=object if is_text else None), size, p=p)
+
+    premium = np.round(rng.gamma(2.0, 40.0, n_rows), 4)
+    premium[rng.random(n_rows) < 0.05] = 0.0
+    premium[rng.random(n_rows) < 0.02] *= -1
+    claims = np.where(rng.random(n_rows) < 0.1, np.round(rng.gamma(1.5, 5000.0, n_rows), 2), 0.0)
+    custom_value = np.where(rng.random(n_rows) < 0.7, np.nan, choice([50000.0, 80000.0, 119300.0, 250000.0]))
+    makes = choice(['TOYOTA', 'VOLKSWAGEN', 'NISSAN', 'FORD', 'AUDI', np.nan], p=[0.3, 0.25, 0.2, 0.1, 0.1, 0.05])
+
+    return pd.DataFrame({
+        'UnderwrittenCoverID': np.arange(n_rows) + 100,
+        'PolicyID': rng.integers(1, n_rows // 3, n_rows),
+        'TransactionMonth': choice(['2015-01-01 00:00:00', '2015-02-01 00:00:00', '2015-03-01 00:00:00']),
+        'IsVATRegistered': rng.random(n_rows) < 0.1,
+        'Citizenship': choice(['  ', 'ZA']),
+        'LegalType': choice(['Individual', 'Close Corporation']),
+        'Title': choice(['Mr', 'Mrs', 'Ms', 'Miss', 'Dr', 'Prof', np.nan]),
+        'Language': 'English',
+        'Bank': choice(['First National Bank', 'ABSA Bank', 'Standard Bank', 'Unknown', np.nan]),
+        'AccountType': choice(['Current account', 'Savings account', 'NA', np.nan]),
+        'MaritalStatus': choice(['Single', 'Married', 'Not specified']),
+        'Gender': choice(['Male', 'Female', 'Not specified', np.nan]),
+        'Country': 'South Africa',
+        'Province': choice(['Gauteng', 'Western Cape', 'KwaZulu-Natal', 'Limpopo']),
+        'PostalCode': choice([2000, 122, 7441, 4001, 299]),
+        'MainCrestaZone': choice(['Rand East', 'Cape Town']),
+        'SubCrestaZone': choice(['Rand East', 'Cape Town']),
+        'ItemType': 'Mobility - Motor',
+        'mmcode': choice([44069150.0, 64059030.0, np.nan]),
+        'VehicleType': choice(['Passenger Vehicle', 'Medium Commercial']),
+        'RegistrationYear': rng.integers(1995, 2015, n_rows),
+        'make': makes,
+        'Model': choice(['QUANTUM 2.7', 'POLO 1.4', 'NP200']),
+        'Cylinders': choice([4.0, 6.0]),
+        'cubiccapacity': choice([1390.0, 2694.0]),
+        'kilowatts': choice([55.0, 111.0]),
+        'bodytype': choice(['B/S', 'S/D', 'H/B']),
+        'NumberOfDoors': choice([4.0, 5.0]),
+        'VehicleIntroDate': choice(['6/2002', '1/2010']),
+        'CustomValueEstimate': custom_value,
+        'AlarmImmobiliser': choice(['Yes', 'No']),
+        'TrackingDevice': choice(['Yes', 'No']),
+        'CapitalOutstanding': choice(['119300', '0', '']),
+        'NewVehicle': choice(['More than 6 months', np.nan]),
+        'WrittenOff': choice(['Yes', 'No', np.nan], p=[0.1, 0.5, 0.4]),
+        'Rebuilt': choice(['No', np.nan]),
+        'Converted': choice(['No', np.nan]),
+        'CrossBorder': 'No',
+        'NumberOfVehiclesInFleet': np.nan,
+        'SumInsured': np.round(rng.gamma(2.0, 50000.0, n_rows), 2),
+        'TermFrequency': 'Monthly',
+        'CalculatedPremiumPerTerm': np.round(rng.gamma(2.0, 30.0, n_rows), 4),
+        'ExcessSelected': choice(['Mobility - Windscreen', 'No excess']),
+        'CoverCategory': choice(['Windscreen', 'Own damage']),
+        'CoverType': choice(['Windscreen', 'Own Damage']),
+        'CoverGroup': 'Comprehensive - Taxi',
+        'Section': 'Motor Comprehensive',
+        'Product': 'Mobility Metered Taxis: Monthly',
+        'StatutoryClass': 'Commercial',
+        'StatutoryRiskType': 'IFRS Constant',
+        'TotalPremium': premium,
+        'TotalClaims': claims,
+    })
+
+
+@pytest.fixture
+def raw_insurance_frame():
+    return _raw_insurance_frame()
+
+
+@pytest.fixture
+def raw_insurance_file(tmp_path, raw_insurance_frame):
+    path = tmp_path / "insurance_data.csv"
+    raw_insurance_frame.to_csv(path, sep="|", index=False)
+    return path
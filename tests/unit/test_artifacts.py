@@ -0,0 +1,51 @@
+import os
+
+import numpy as np
+
+from src.core.artifacts import ArtifactStore, artifact_key, code_fingerprint, data_fingerprint, stage_key
+from src.models import classification_models, regression_models
+
+
+def test_keys_follow_inputs(tmp_path, monkeypatch):
+    # Fresh but identical estimators hash equally (no object addresses in the key)
+    assert artifact_key("models", "abc", regression_models("fast")) == artifact_key("models", "abc", regression_models("fast"))
+    assert artifact_key("models", "abc", regression_models()) != artifact_key("models", "abc", regression_models("fast"))
+    assert artifact_key("models", "abc", classification_models()) != artifact_key("models", "abd", classification_models())
+    assert artifact_key("features", "abc", ["make"]) != artifact_key("features", "abc", ["make", "Model"])
+
+    # Stage keys also follow the source of the stage's modules
+    assert stage_key("features", "abc") == stage_key("features", "abc") != artifact_key("features", "abc")
+    (tmp_path / "stage_module.py").write_text("X = 1\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    before = code_fingerprint("stage_module")
+    (tmp_path / "stage_module.py").write_text("X = 2\n")
+    code_fingerprint.cache_clear()
+    assert code_fingerprint("stage_module") != before
+
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "part-0.parquet").write_bytes(b"one")
+    before = data_fingerprint(data)
+    assert data_fingerprint(data) == before
+    (data / "part-0.parquet").write_bytes(b"two")
+    assert data_fingerprint(data) != before
+
+
+def test_store_caches_and_evicts_least_recently_used(tmp_path):
+    store = ArtifactStore(tmp_path / "store", max_bytes=10 ** 9)
+    calls = []
+    compute = lambda: calls.append(1) or np.arange(10)
+    np.testing.assert_array_equal(store.cached("a", compute), np.arange(10))
+    np.testing.assert_array_equal(store.cached("a", compute), np.arange(10))
+    assert len(calls) == 1
+
+    store.put("b", np.zeros(1000))
+    store.put("c", np.zeros(1000))
+    # "a" is the oldest entry but was just read, so "b" is the least recently used
+    for key, age in (("a", 30), ("b", 20), ("c", 10)):
+        path = store.root / f"{key}.joblib"
+        os.utime(path, (path.stat().st_atime, path.stat().st_mtime - age))
+    store.get("a")
+    store.max_bytes = store.size() - 1
+    store.evict()
+    assert "a" in store and "c" in store and "b" not in store
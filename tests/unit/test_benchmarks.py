@@ -0,0 +1,40 @@
+from benchmarks.bench_pipeline import compare, environment, environment_differences
+from benchmarks.synthetic import make_raw_frame
+from src.schema import RAW_DTYPES
+
+
+def test_synthetic_frame_matches_raw_schema():
+    df = make_raw_frame(2_000)
+    assert list(df.columns) == list(RAW_DTYPES)
+    assert df['PolicyID'].nunique() < len(df)
+    assert df['TotalPremium'].eq(0).any() and df['CustomValueEstimate'].isna().any()
+
+
+def test_compare_flags_regressions_above_threshold_and_noise_floor():
+    baseline = {"1000": {"encode": {"time_s": 1.0, "peak_memory_mb": 100.0},
+                         "pricing": {"time_s": 0.01, "peak_memory_mb": 1.0}}}
+    results = {"1000": {"encode": {"time_s": 1.2, "peak_memory_mb": 200.0},
+                        "pricing": {"time_s": 0.03, "peak_memory_mb": 5.0},
+                        "train": {"time_s": 9.0, "peak_memory_mb": None}},
+               "5000": {"encode": {"time_s": 9.0, "peak_memory_mb": 900.0}}}
+    # encode time is within 25%; pricing is 3x slower but below the noise floor; train and 5000 have no baseline
+    assert compare(results, baseline, threshold=0.25) == [("1000", "encode", "peak_memory_mb", 100.0, 200.0)]
+    assert [r[2] for r in compare(results, baseline, threshold=0.1)] == ["time_s", "peak_memory_mb"]
+    baseline["1000"]["encode"]["time_spread_s"] = 0.3
+    results["1000"]["encode"]["time_s"] = 1.5
+    results["1000"]["encode"]["peak_memory_spread_mb"] = 60.0
+    # encode is 50% slower and 2x larger, but within twice the spread of the repeated runs
+    assert compare(results, baseline, threshold=0.1) == []
+
+    # On a machine that runs the calibration workload 2x slower, 2x slower stages are no regression
+    baseline["1000"]["calibration"] = {"time_s": 0.1}
+    results["1000"].update(calibration={"time_s": 0.2}, pricing={"time_s": 0.4, "peak_memory_mb": 1.0})
+    baseline["1000"]["pricing"]["time_s"] = 0.2
+    assert compare(results, baseline) == []
+    results["1000"]["calibration"]["time_s"] = 0.1
+    assert compare(results, baseline) == [("1000", "pricing", "time_s", 0.2, 0.4)]
+
+    # Baselines from another machine are not compared against
+    current = environment()
+    assert environment_differences(current, dict(current, platform="other", timestamp="x")) == {}
+    assert environment_differences(current, dict(current, cpu_count=-1)) == {"cpu_count": (-1, current["cpu_count"])}
@@ -0,0 +1,40 @@
+import json
+import runpy
+import subprocess
+import sys
+
+from benchmarks.bench_import_time import ROOT_DIR, parse_importtime
+from src import cli
+from src.core.lazy import LazyModule, lazy_import
+
+
+def _run(*args):
+    return subprocess.run([sys.executable, "-X", "importtime", *args], cwd=ROOT_DIR,
+                          capture_output=True, text=True, check=True)
+
+
+def test_help_and_imports_skip_heavy_packages():
+    run = _run("-m", "src", "--help")
+    assert all(command in run.stdout for command in cli.COMMANDS)
+    assert not {"pandas", "numpy"} & {name.split(".")[0] for name in parse_importtime(run.stderr)}
+
+    # Entry points load shap / xgboost / matplotlib / seaborn only when they are used
+    heavy = ["shap", "xgboost", "matplotlib", "seaborn"]
+    run = _run("-c", "import json, sys, src.interpretability, src.utils.eda_report, scripts.run_task_4; "
+                     f"print(json.dumps([name for name in {heavy!r} if name in sys.modules]))")
+    assert json.loads(run.stdout) == []
+
+
+def test_subcommands_run_scripts_as_main(monkeypatch):
+    calls = []
+    monkeypatch.setattr(sys, "argv", ["python -m src"])
+    monkeypatch.setattr(runpy, "run_module", lambda module, **kwargs: calls.append((module, kwargs, sys.argv)))
+    cli.main(["price", "--batch-size", "500", "--help"])
+    assert calls == [("scripts.price_policies", {"run_name": "__main__", "alter_sys": True},
+                      ["scripts/price_policies.py", "--batch-size", "500", "--help"])]
+
+    monkeypatch.delitem(sys.modules, "colorsys", raising=False)
+    colorsys = lazy_import("colorsys")
+    assert isinstance(colorsys, LazyModule) and "colorsys" not in sys.modules
+    assert colorsys.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0) and "colorsys" in sys.modules
+    assert lazy_import("json") is json
@@ -0,0 +1,35 @@
+import numpy as np
+
+from src.cleaning import clean_and_impute
+from src.schema import apply_schema
+from src.utils import eda_visualization_functions as viz
+from src.utils.eda_report import compute_report_figures, generate_eda_report
+
+
+def _frame(raw):
+    df = apply_schema(raw)
+    df['LossRatio'] = np.where(df['TotalPremium'] != 0, df['TotalClaims'] / df['TotalPremium'], 1.0)
+    return df
+
+
+def test_aggregates_are_bounded(raw_insurance_frame):
+    df = _frame(raw_insurance_frame)
+    assert len(viz.scatter_sample(df, 'TotalClaims', 'TotalPremium', max_points=100)) == 100
+    by_postal_code = viz.loss_ratio_by(df, 'PostalCode', max_groups=3)
+    assert len(by_postal_code) == 3
+    largest = df['PostalCode'].value_counts().head(3).index
+    assert np.isclose(by_postal_code[largest[0]], df.loc[df['PostalCode'] == largest[0], 'LossRatio'].mean())
+    counts, edges = viz.histogram_bins(df, 'TotalPremium', bins=20)
+    assert counts.sum() == df['TotalPremium'].notna().sum() and len(edges) == 21
+
+
+def test_report_renders_every_figure(tmp_path, raw_insurance_frame):
+    df = clean_and_impute(_frame(raw_insurance_frame))
+    specs = compute_report_figures(df)
+    index = generate_eda_report(df, tmp_path / "eda", n_jobs=2)
+
+    page = index.read_text()
+    for name, *_ in specs:
+        assert (tmp_path / "eda" / f"{name}.png").stat().st_size > 0
+        assert f'src="{name}.png"' in page
+    assert "loss_ratio_by_PostalCode" in [name for name, *_ in specs]
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression, LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score, mean_squared_error, r2_score, roc_auc_score
+
+from src.evaluation import (
+    _classification_metrics,
+    bootstrap_weights,
+    evaluate_classification,
+    evaluate_classification_batches,
+    evaluate_regression,
+)
+
+
+def _data(n_rows=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, 4))
+    y_cls = (X[:, 0] + rng.normal(size=n_rows) > 1.2).astype(int)
+    y_reg = 1000 + 300 * X[:, 1] + rng.gamma(2.0, 100.0, n_rows)
+    segments = rng.choice(['Gauteng', 'Western Cape', 'Limpopo'], n_rows)
+    return X, y_cls, y_reg, segments
+
+
+def test_metrics_match_sklearn_and_batches():
+    X, y_cls, y_reg, segments = _data()
+    cls_models = {"LogisticRegression": LogisticRegression().fit(X, y_cls)}
+    reg_models = {"LinearRegression": LinearRegression().fit(X, y_reg)}
+
+    res = evaluate_classification(cls_models, X, y_cls, segments=segments)["LogisticRegression"]
+    p_claim = cls_models["LogisticRegression"].predict_proba(X)[:, 1]
+    preds = cls_models["LogisticRegression"].predict(X)
+    assert np.isclose(res["Accuracy"], accuracy_score(y_cls, preds))
+    assert np.isclose(res["F1"], f1_score(y_cls, preds))
+    assert np.isclose(res["AUC"], roc_auc_score(y_cls, p_claim))
+    assert np.isclose(res["Gini"], 2 * res["AUC"] - 1)
+    assert res["Deciles"]["Rows"].sum() == len(y_cls) and np.isclose(res["Deciles"]["Lift"].iloc[-1], res["TopDecileLift"])
+    assert res["Deciles"]["MeanPredicted"].is_monotonic_increasing
+    ave = res["ActualVsExpected"]
+    assert np.isclose(ave.loc['Gauteng', 'Actual'], y_cls[segments == 'Gauteng'].sum())
+    assert np.isclose(ave.loc['Gauteng', 'Expected'], p_claim[segments == 'Gauteng'].sum())
+
+    # Scores accumulated over batches equal scores on the whole test set
+    batches = [(X[start:start + 700], y_cls[start:start + 700], segments[start:start + 700])
+               for start in range(0, len(X), 700)]
+    batched = evaluate_classification_batches(cls_models, batches)["LogisticRegression"]
+    for key in ("Accuracy", "F1", "AUC", "TopDecileLift", "CalibrationError"):
+        assert np.isclose(batched[key], res[key])
+    pd.testing.assert_frame_equal(batched["ActualVsExpected"], ave)
+
+    res = evaluate_regression(reg_models, X, y_reg)["LinearRegression"]
+    preds = reg_models["LinearRegression"].predict(X)
+    assert np.isclose(res["RMSE"], np.sqrt(mean_squared_error(y_reg, preds)))
+    assert np.isclose(res["R2"], r2_score(y_reg, preds))
+    assert 0 < res["Gini"] <= 1 and res["TopDecileLift"] > 1
+
+
+def test_bootstrap_intervals():
+    X, y_cls, _, _ = _data()
+    model = LogisticRegression().fit(X, y_cls)
+    res = evaluate_classification({"LogisticRegression": model}, X, y_cls, n_bootstrap=500)["LogisticRegression"]
+    for key in ("Accuracy", "F1", "AUC", "CalibrationError"):
+        assert res[f"{key}_ci_low"] <= res[key] <= res[f"{key}_ci_high"]
+    assert 0 < res["AUC_ci_high"] - res["AUC_ci_low"] < 0.1
+
+    # Weighted metrics equal the metrics of the resampled rows
+    p_claim = model.predict_proba(X)[:, 1]
+    order = np.argsort(p_claim, kind="stable")
+    W = bootstrap_weights(len(y_cls), 3, np.random.default_rng(7))
+    indices = np.random.default_rng(7).integers(0, len(y_cls), size=(3, len(y_cls)))
+    auc = _classification_metrics(y_cls[order].astype(float), p_claim[order], W[:, order])["AUC"]
+    np.testing.assert_allclose(auc, [roc_auc_score(y_cls[i], p_claim[i]) for i in indices])
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+from scipy.stats import ttest_ind
+
+from src.utils.hypothesis_testing import adjust_p_values, batch_t_tests, t_test_groups
+
+
+def _frame(seed=1):
+    rng = np.random.default_rng(seed)
+    n = 2000
+    return pd.DataFrame({
+        'PostalCode': rng.choice([2000, 122, 7441, 4001, 299, 1], n, p=[0.3, 0.3, 0.2, 0.1, 0.0995, 0.0005]),
+        'Margin': rng.normal(50, 200, n),
+        'ClaimFrequency': rng.random(n) < 0.1,
+    })
+
+
+def test_pairwise_batch_matches_scipy():
+    df = _frame()
+    results = batch_t_tests(df, ['PostalCode'], ['Margin', 'ClaimFrequency'], mode='pairs')
+    assert len(results) == 2 * 15
+    for row in results.itertuples():
+        expected = t_test_groups(df, 'PostalCode', row.metric, row.group_a, row.group_b)
+        np.testing.assert_allclose(row.t_stat, expected['t_stat'], rtol=1e-9, equal_nan=True)
+        np.testing.assert_allclose(row.p_value, expected['p_value'], rtol=1e-7, equal_nan=True)
+
+
+def test_one_vs_rest_matches_scipy():
+    df = _frame()
+    results = batch_t_tests(df, ['PostalCode'], ['Margin'], mode='one_vs_rest')
+    for row in results.itertuples():
+        mask = df['PostalCode'] == row.group_a
+        t_stat, p_value = ttest_ind(df.loc[mask, 'Margin'], df.loc[~mask, 'Margin'], equal_var=False)
+        np.testing.assert_allclose([row.t_stat, row.p_value], [t_stat, p_value], rtol=1e-7, equal_nan=True)
+
+
+def test_adjust_p_values():
+    p = np.array([0.01, 0.04, np.nan, 0.03, 0.2])
+    np.testing.assert_allclose(adjust_p_values(p, 'bonferroni'), [0.04, 0.16, np.nan, 0.12, 0.8])
+    np.testing.assert_allclose(adjust_p_values(p, 'fdr_bh'), [0.04, 0.0533333, np.nan, 0.0533333, 0.2], rtol=1e-5)
+
+
+def test_claim_metrics_from_policy_code(tmp_path, raw_insurance_file, raw_insurance_frame):
+    """ClaimFrequency on the processed data (no PolicyID) matches the old per-PolicyID groupby."""
+    from src.policy_aggregates import build_policy_aggregates
+    from src.utils.eda_cleaning_and_imputation_functions import preprocess_data
+    from src.utils.hypothesis_testing import compute_claim_metrics
+
+    processed = preprocess_data(raw_insurance_file, tmp_path / "clean.parquet")
+    assert 'PolicyID' not in processed.columns
+    aggregates = build_policy_aggregates(tmp_path / "clean.parquet", tmp_path / "policies.parquet")
+
+    raw = raw_insurance_frame
+    expected = (raw['TotalClaims'] > 0).groupby(raw['PolicyID']).transform('max').astype(float)
+
+    cached = compute_claim_metrics(processed.copy(), policy_aggregates=aggregates)
+    recomputed = compute_claim_metrics(processed.copy())
+    from_raw = compute_claim_metrics(raw.copy())
+    np.testing.assert_array_equal(cached['ClaimFrequency'], expected)
+    np.testing.assert_array_equal(recomputed['ClaimFrequency'], expected)
+    np.testing.assert_array_equal(from_raw['ClaimFrequency'], expected)
+    assert aggregates['Exposure'].sum() == len(raw)
+    assert np.isclose(aggregates['Margin'].sum(), (raw['TotalPremium'] - raw['TotalClaims']).sum())
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression, LogisticRegression
+
+from src.cleaning import clean_and_impute, fit_clean_and_impute
+from src.imputation import apply_imputer, fit_imputer, load_imputer, save_imputer
+from src.optimization import price_portfolio
+from src.preprocessing import build_feature_matrix
+from src.schema import apply_schema
+
+
+def test_spec_strategies_and_persisted_imputer(tmp_path):
+    df = pd.DataFrame({
+        'make': pd.Categorical(['A', 'A', 'A', 'B', 'B', None, 'C']),
+        'value': [10.0, 20.0, np.nan, 100.0, np.nan, np.nan, np.nan],
+        'year': pd.array([2001, 2003, None, 2010, 2010, 2004, None], dtype='Int16'),
+        'bank': ['X', 'Y', 'Y', None, 'X', 'Y', None],
+        'flag': pd.array([True, None, False, True, True, None, False], dtype='boolean'),
+    })
+    spec = {
+        'value': {'strategy': 'group_median', 'by': 'make'},
+        'year': {'strategy': 'median'},
+        'bank': {'strategy': 'mode'},
+        'flag': {'strategy': 'constant', 'value': 'Missing'},
+        'absent': {'strategy': 'mode'},
+    }
+    imputer = fit_imputer(df, spec)
+    assert imputer['value'] == {'value': 20.0, 'by': 'make', 'values': {'A': 15.0, 'B': 100.0}}
+    assert list(imputer) == ['value', 'year', 'bank', 'flag']
+
+    filled = apply_imputer(df, load_imputer(save_imputer(imputer, tmp_path / 'imputation.joblib')))
+    assert filled is df
+    # Group median, then the column median for a missing make and a make with no values
+    assert filled['value'].tolist() == [10.0, 20.0, 15.0, 100.0, 100.0, 20.0, 20.0]
+    assert filled['year'].dtype == 'Int16' and filled['year'].tolist()[2] == 2004
+    assert filled['bank'].tolist() == ['X', 'Y', 'Y', 'Y', 'X', 'Y', 'Y']
+    assert filled['flag'].tolist() == [True, 'Missing', False, True, True, 'Missing', False]
+
+    # New data gets the fitted statistics, including an unseen make
+    new = pd.DataFrame({'make': ['B', 'Z'], 'value': [np.nan, np.nan], 'bank': [None, 'X']})
+    assert apply_imputer(new, imputer)[['value', 'bank']].values.tolist() == [[100.0, 'Y'], [20.0, 'X']]
+
+
+def test_training_imputer_scores_new_rows(raw_insurance_frame):
+    train, new = raw_insurance_frame.iloc[:400], raw_insurance_frame.iloc[400:]
+    df, imputer = fit_clean_and_impute(apply_schema(train))
+    assert df.drop(columns=['NumberOfVehiclesInFleet']).isna().sum().sum() == 0
+    assert imputer['kilowatts']['value'] == df['kilowatts'].median()
+
+    # New rows are imputed with the training medians, not their own
+    raw_new = apply_schema(new)
+    expected = raw_new['mmcode'].fillna(imputer['mmcode']['value'])
+    np.testing.assert_allclose(clean_and_impute(raw_new.copy(), imputer)['mmcode'], expected)
+
+    X, encoder = build_feature_matrix(df, ['PolicyID', 'UnderwrittenCoverID', 'PostalCode', 'Model', 'make'])
+    has_claim = (df['TotalClaims'] > 0).to_numpy()
+    frequency = LogisticRegression(max_iter=500).fit(X, has_claim)
+    severity = LinearRegression().fit(X[has_claim], df.loc[has_claim, 'TotalClaims'])
+    pd.testing.assert_frame_equal(
+        price_portfolio(raw_new, encoder, frequency, severity, imputer=imputer),
+        price_portfolio(clean_and_impute(raw_new.copy(), imputer), encoder, frequency, severity),
+    )
@@ -0,0 +1,62 @@
+import matplotlib
+matplotlib.use("Agg")
+
+import numpy as np
+import shap
+from scipy import sparse
+from sklearn.ensemble import RandomForestRegressor
+from xgboost import XGBClassifier
+
+from src.core.artifacts import ArtifactStore
+from src.interpretability import compute_shap_values, explain_model, plot_shap_summary, stratified_sample
+
+
+def _data(n=300, p=8, seed=0):
+    rng = np.random.default_rng(seed)
+    X = sparse.random(n, p, density=0.5, random_state=seed, format='csr', dtype=np.float32)
+    y = X @ rng.normal(size=p)
+    return X, y, (y > np.quantile(y, 0.9)).astype(int)
+
+
+def test_stratified_sample_keeps_rare_class():
+    strata = np.r_[np.ones(50), np.zeros(950)]
+    rows = stratified_sample(strata, 100)
+    assert len(rows) == 100 and np.all(np.diff(rows) > 0)
+    assert strata[rows].sum() == 5
+    np.testing.assert_array_equal(stratified_sample(strata, 5000), np.arange(1000))
+
+
+def test_batched_values_match_single_pass():
+    X, y, y_cls = _data()
+    forest = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)
+    for mode in ("exact", "approx", "interventional"):
+        single = compute_shap_values(forest, X, mode, background_size=50, batch_size=1000)
+        batched = compute_shap_values(forest, X, mode, background_size=50, batch_size=70, n_jobs=2)
+        assert single.shape == X.shape
+        np.testing.assert_allclose(batched, single, rtol=1e-4, atol=1e-4)
+
+    # Exact values add up to the prediction minus the expected value
+    exact = compute_shap_values(forest, X, "exact")
+    expected_value = np.ravel(shap.TreeExplainer(forest).expected_value)[0]
+    np.testing.assert_allclose(exact.sum(axis=1) + expected_value, forest.predict(X), atol=1e-3)
+
+    classifier = XGBClassifier(n_estimators=20).fit(X, y_cls)
+    assert compute_shap_values(classifier, X, "exact").shape == X.shape
+
+
+def test_explanations_cached_per_model(tmp_path):
+    X, y, y_cls = _data()
+    classifier = XGBClassifier(n_estimators=20).fit(X, y_cls)
+    names = [f"f{i}" for i in range(X.shape[1])]
+    store = ArtifactStore(tmp_path / "store")
+
+    first = explain_model(classifier, X, names, strata=y_cls, n_samples=100, store=store, model_key="models-1")
+    assert len(first["rows"]) == 100 and y_cls[first["rows"]].sum() == 10
+    assert list(first["importance"].index[:1]) == [first["importance"].idxmax()]
+    assert len(list(store.root.glob("shap-*.joblib"))) == 1
+
+    again = explain_model(None, X, names, strata=y_cls, n_samples=100, store=store, model_key="models-1")
+    np.testing.assert_array_equal(again["shap_values"], first["shap_values"])
+
+    figure = plot_shap_summary(first["shap_values"], X[first["rows"]], names, output_path=tmp_path / "shap.png")
+    assert figure.exists()
@@ -0,0 +1,64 @@
+import numpy as np
+from scipy import sparse
+
+from src.evaluation import evaluate_classification, evaluate_regression
+from src.models import (
+    classification_models,
+    regression_models,
+    thread_budgets,
+    train_model_suites,
+)
+
+
+def _data(seed=0, n=400, p=12):
+    rng = np.random.default_rng(seed)
+    X = sparse.random(n, p, density=0.3, random_state=seed, format='csr', dtype=np.float32)
+    y_reg = X @ rng.normal(size=p) + rng.normal(scale=0.1, size=n)
+    y_cls = (y_reg > np.median(y_reg)).astype(int)
+    return X, y_reg, y_cls
+
+
+def test_thread_budgets_split_cores():
+    budgets = thread_budgets(list(regression_models().values()), 8)
+    assert budgets == [1, 3, 3]
+    assert thread_budgets(list(regression_models().values()), 1) == [1, 1, 1]
+    # HistGradientBoosting has no n_jobs but gets a share of the OpenMP threads
+    assert thread_budgets(list(regression_models("fast").values()), 8) == [1, 2, 2, 2]
+
+
+def test_parallel_suites_match_sequential_fit():
+    X, y_reg, y_cls = _data()
+    fitted, stats = train_model_suites({
+        "regression": (regression_models(), X, y_reg),
+        "classification": (classification_models(), X, y_cls),
+    }, n_jobs=2)
+
+    assert set(fitted["regression"]) == {"LinearRegression", "RandomForest", "XGBoost"}
+    assert set(fitted["classification"]) == {"LogisticRegression", "RandomForest", "XGBoost"}
+    for suite in stats.values():
+        for model_stats in suite.values():
+            assert model_stats["fit_time_s"] > 0
+
+    reference = regression_models()["RandomForest"].fit(X, y_reg)
+    np.testing.assert_allclose(fitted["regression"]["RandomForest"].predict(X), reference.predict(X))
+
+
+def test_fast_profile_early_stops_and_reports_cost():
+    X, y_reg, y_cls = _data(n=600)
+    fitted, stats = train_model_suites({
+        "regression": (regression_models("fast"), X, y_reg),
+        "classification": (classification_models("fast"), X, y_cls),
+    }, n_jobs=2)
+
+    assert "HistGradientBoosting" in fitted["regression"]
+    assert stats["regression"]["HistGradientBoosting"]["n_threads"] == 1
+    xgb = fitted["regression"]["XGBoost"]
+    assert xgb.get_params()["tree_method"] == "hist"
+    assert xgb.best_iteration < xgb.get_params()["n_estimators"] - 1
+    assert fitted["classification"]["RandomForest"].estimators_[0].get_depth() <= 12
+
+    reg_results = evaluate_regression(fitted["regression"], X, y_reg, stats["regression"])
+    cls_results = evaluate_classification(fitted["classification"], X, y_cls, stats["classification"])
+    for results in (reg_results, cls_results):
+        for res in results.values():
+            assert res["FitTime"] > 0 and res["ModelSizeMB"] > 0
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.linear_model import LinearRegression, LogisticRegression
+
+from src.cleaning import clean_and_impute, fill_missing_categories
+from src.data_loader import iter_processed, load_processed
+from src.evaluation import (
+    evaluate_classification,
+    evaluate_classification_batches,
+    evaluate_regression,
+    evaluate_regression_batches,
+)
+from src.optimization import price_portfolio
+from src.out_of_core import (holdout_mask, iter_training_batches, train_external_xgboost, train_out_of_core,
+                              training_imputer)
+from src.preprocessing import build_feature_matrix
+from src.utils.eda_cleaning_and_imputation_functions import preprocess_data
+
+HIGH_CARD_COLS = ['PolicyID', 'PolicyCode', 'PostalCode', 'Model', 'make']
+
+
+def test_batched_encoder_and_metrics_match_in_memory(tmp_path, raw_insurance_file):
+    path = tmp_path / "clean.parquet"
+    preprocess_data(raw_insurance_file, path)
+    df = clean_and_impute(load_processed(path))
+    X, encoder = build_feature_matrix(df, HIGH_CARD_COLS)
+
+    streamed = type(encoder)(exclude=encoder.exclude).fit_batches(
+        fill_missing_categories(batch) for batch in iter_processed(path, batch_size=97)
+    )
+    assert streamed.feature_names_ == encoder.feature_names_
+    assert streamed.numeric_fill_ == encoder.numeric_fill_
+
+    batches = list(iter_training_batches(encoder, "classification", "test", path, batch_size=97))
+    X_test = sparse.vstack([X for X, _ in batches])
+    y_test = np.concatenate([y for _, y in batches])
+    assert len(batches) > 1 and X_test.shape[1] == X.shape[1]
+    models = {"LogisticRegression": LogisticRegression(max_iter=500, class_weight="balanced").fit(X_test, y_test)}
+    in_memory = evaluate_classification(models, X_test, y_test)["LogisticRegression"]
+    batched = evaluate_classification_batches(models, batches)["LogisticRegression"]
+    assert batched["Accuracy"] == in_memory["Accuracy"] and np.isclose(batched["F1"], in_memory["F1"]) and batched["F1"] > 0
+
+    batches = list(iter_training_batches(encoder, "severity", "train", path, batch_size=97))
+    X_sev = sparse.vstack([X for X, _ in batches])
+    y_sev = np.concatenate([y for _, y in batches])
+    assert (y_sev > 0).all()
+    models = {"LinearRegression": LinearRegression().fit(X_sev, y_sev)}
+    in_memory = evaluate_regression(models, X_sev, y_sev)["LinearRegression"]
+    batched = evaluate_regression_batches(models, batches)["LinearRegression"]
+    assert np.isclose(batched["RMSE"], in_memory["RMSE"]) and np.isclose(batched["R2"], in_memory["R2"])
+
+
+def test_out_of_core_training(tmp_path, raw_insurance_file):
+    path = tmp_path / "clean.parquet"
+    df = preprocess_data(raw_insurance_file, path)
+    held_out = holdout_mask(df)
+    # Policies are never split between train and test
+    assert 0.2 < held_out.mean() < 0.4
+    assert df.groupby(held_out)['PolicyCode'].unique().map(set).pipe(lambda s: not s[True] & s[False])
+
+    encoder, reg_models, cls_models, fit_stats = train_out_of_core(path, HIGH_CARD_COLS, batch_size=150)
+    assert set(reg_models) == {"SGDRegressor", "XGBoost"}
+    assert set(cls_models) == {"SGDClassifier", "XGBoost"}
+    assert fit_stats["regression"]["XGBoost"]["fit_time_s"] > 0
+
+    X_test, y_test = next(iter_training_batches(encoder, "classification", "test", path))
+    for model in cls_models.values():
+        p_claim = model.predict_proba(X_test)[:, 1]
+        assert p_claim.shape == y_test.shape and ((p_claim >= 0) & (p_claim <= 1)).all()
+    severity = evaluate_regression_batches(reg_models, iter_training_batches(encoder, "severity", "test", path))
+    for res in severity.values():
+        assert np.isfinite(res["RMSE"]) and res["RMSE"] < 10 * df['TotalClaims'].max()
+
+    # The saved imputer reproduces the gap filling the models were trained with
+    policies = df.head(200)
+    pd.testing.assert_frame_equal(
+        price_portfolio(policies, encoder, cls_models["XGBoost"], reg_models["XGBoost"], imputer=training_imputer(encoder)),
+        price_portfolio(policies, encoder, cls_models["XGBoost"], reg_models["XGBoost"]),
+    )
+
+    # Partial params are merged over the defaults (max_bin included)
+    booster = train_external_xgboost(lambda: iter_training_batches(encoder, "severity", "train", path, 150),
+                                     "reg:squarederror", str(tmp_path), params={"max_depth": 2}, num_boost_round=3)
+    assert np.isfinite(booster.predict(X_test)).all()
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from src.cleaning import clean_and_impute
+from src.preprocessing import FeatureEncoder, build_feature_matrix, prepare_classification_data, prepare_severity_data
+from src.schema import apply_schema
+
+
+def _clean_frame(raw):
+    return clean_and_impute(apply_schema(raw.drop(columns=['PolicyID', 'UnderwrittenCoverID'])))
+
+
+def test_encoder_fixed_vocabulary(tmp_path, raw_insurance_frame):
+    df = _clean_frame(raw_insurance_frame)
+    X, encoder = build_feature_matrix(df, ['PostalCode', 'Model', 'make'])
+
+    assert X.format == 'csr'
+    assert X.shape == (len(df), encoder.n_features_)
+    assert 'TotalClaims' not in encoder.feature_names_
+    assert 'Province_Gauteng' in encoder.feature_names_
+    gauteng = encoder.feature_names_.index('Province_Gauteng')
+    np.testing.assert_array_equal(X[:, gauteng].toarray().ravel(), (df['Province'] == 'Gauteng').to_numpy())
+
+    # A reloaded encoder produces the same columns, also for a subset with unseen values
+    encoder.save(tmp_path / "encoder.joblib")
+    reloaded = FeatureEncoder.load(tmp_path / "encoder.joblib")
+    subset = df.iloc[:10].copy()
+    subset['Province'] = subset['Province'].cat.add_categories(['Atlantis'])
+    subset.loc[subset.index[0], 'Province'] = 'Atlantis'
+    X_sub = reloaded.transform(subset)
+    assert X_sub.shape[1] == X.shape[1]
+    np.testing.assert_array_equal(X_sub[1:].toarray(), X[1:10].toarray())
+    assert X_sub[0, gauteng] == 0
+
+
+def test_tasks_share_one_matrix(raw_insurance_frame):
+    df = _clean_frame(raw_insurance_frame)
+    X, encoder = build_feature_matrix(df, ['PostalCode', 'Model', 'make'])
+    (X_train_sev, X_test_sev, y_train_sev, y_test_sev), mask = prepare_severity_data(df, X)
+    X_train_cls, X_test_cls, y_train_cls, y_test_cls = prepare_classification_data(df, X)
+
+    assert X_train_sev.shape[1] == X_train_cls.shape[1] == encoder.n_features_
+    assert X_train_sev.shape[0] + X_test_sev.shape[0] == mask.sum()
+    assert (y_train_sev > 0).all()
+    assert set(y_train_cls.unique()) <= {0, 1}
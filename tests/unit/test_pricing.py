@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression, LogisticRegression
+
+from src.cleaning import clean_and_impute
+from src.optimization import compute_optimized_premium, price_portfolio
+from src.preprocessing import build_feature_matrix
+from src.schema import apply_schema
+
+
+@pytest.fixture
+def fitted(raw_insurance_frame):
+    df = clean_and_impute(apply_schema(raw_insurance_frame))
+    X, encoder = build_feature_matrix(df, ['PolicyID', 'UnderwrittenCoverID', 'PostalCode', 'Model', 'make'])
+    has_claim = (df['TotalClaims'] > 0).to_numpy()
+    frequency = LogisticRegression(max_iter=500).fit(X, has_claim)
+    severity = LinearRegression().fit(X[has_claim], df.loc[has_claim, 'TotalClaims'])
+    return df, X, encoder, frequency, severity
+
+
+def test_premium_components():
+    premium = compute_optimized_premium(np.array([0.1]), np.array([1000.0]), 1.2, expense_ratio=0.15, profit_margin=0.05)
+    np.testing.assert_allclose(premium, [0.1 * 1000 * 1.2 / 0.8])
+    np.testing.assert_allclose(compute_optimized_premium(0.5, 10.0), 6.0)
+    with pytest.raises(ValueError):
+        compute_optimized_premium(0.5, 10.0, expense_ratio=0.6, profit_margin=0.4)
+
+
+def test_batches_keep_rows_aligned(tmp_path, fitted):
+    df, X, encoder, frequency, severity = fitted
+    priced = price_portfolio(df, encoder, frequency, severity, batch_size=64, expense_ratio=0.1)
+
+    assert len(priced) == len(df)
+    np.testing.assert_array_equal(priced['PolicyID'], df['PolicyID'])
+    np.testing.assert_allclose(priced['ClaimProbability'], frequency.predict_proba(X)[:, 1], rtol=1e-6)
+    np.testing.assert_allclose(priced['ExpectedSeverity'], np.clip(severity.predict(X), 0, None), rtol=1e-6)
+
+    # Streaming to Parquet, from an iterable of frames, gives the same premiums
+    chunks = [df.iloc[:250], df.iloc[250:]]
+    n_rows = price_portfolio(chunks, encoder, frequency, severity, output_path=tmp_path / "premiums.parquet",
+                             batch_size=100, expense_ratio=0.1)
+    assert n_rows == len(df)
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / "premiums.parquet"), priced)
+
+
+def test_raw_missing_values_priced_like_training(fitted):
+    df, X, encoder, frequency, severity = fitted
+    # Missing categories map to the 'Missing' level seen at training time
+    raw = df.iloc[:5].copy()
+    raw['Gender'] = raw['Gender'].astype(object).where(raw.index != raw.index[0], None)
+    filled = raw.copy()
+    filled.loc[filled.index[0], 'Gender'] = 'Missing'
+    pd.testing.assert_frame_equal(
+        price_portfolio(raw, encoder, frequency, severity),
+        price_portfolio(filled, encoder, frequency, severity),
+    )
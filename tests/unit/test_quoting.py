@@ -0,0 +1,88 @@
+import http.client
+import json
+import threading
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LogisticRegression
+
+from src.cleaning import clean_and_impute, fill_missing_categories
+from src.data_loader import ENCODER_FILE, FREQUENCY_MODEL_FILE, SEVERITY_MODEL_FILE
+from src.optimization import price_portfolio
+from src.preprocessing import build_feature_matrix
+from src.schema import apply_schema
+from src.services.quoting import MicroBatcher, QuotingModel, make_server
+
+
+def _fit(raw):
+    df = clean_and_impute(apply_schema(raw))
+    X, encoder = build_feature_matrix(df, ['PolicyID', 'UnderwrittenCoverID', 'PostalCode', 'Model', 'make'])
+    has_claim = (df['TotalClaims'] > 0).to_numpy()
+    frequency = LogisticRegression(max_iter=500).fit(X, has_claim)
+    severity = RandomForestRegressor(n_estimators=10, random_state=0).fit(X[has_claim], df.loc[has_claim, 'TotalClaims'])
+    return df, encoder, frequency, severity
+
+
+def _records(df):
+    # Policies as a client would send them: plain JSON values, nulls for missing fields
+    return json.loads(df.drop(columns=['TotalClaims', 'LossRatio'], errors='ignore').to_json(orient='records'))
+
+
+def test_quotes_match_batch_pricing(raw_insurance_frame):
+    df, encoder, frequency, severity = _fit(raw_insurance_frame)
+    raw = apply_schema(raw_insurance_frame).iloc[:50]
+    records = _records(raw)
+
+    np.testing.assert_array_equal(encoder.transform_records(records).toarray(),
+                                  encoder.transform(fill_missing_categories(raw.copy())).toarray())
+
+    quotes = QuotingModel(encoder, frequency, severity, expense_ratio=0.1).quote(records)
+    expected = price_portfolio(raw, encoder, frequency, severity, expense_ratio=0.1)
+    np.testing.assert_allclose([q['OptimizedPremium'] for q in quotes], expected['OptimizedPremium'], rtol=1e-6)
+
+
+def test_concurrent_requests_share_one_predict_call():
+    calls = []
+    batcher = MicroBatcher(lambda records: calls.append(len(records)) or [r['x'] * 2 for r in records],
+                           max_batch_size=100, max_wait_ms=200)
+    futures = [batcher.submit([{'x': i}, {'x': -i}]) for i in range(5)]
+    assert [f.result(timeout=5) for f in futures] == [[2 * i, -2 * i] for i in range(5)]
+    assert calls == [10]
+
+    # A failing batch is retried request by request: only the bad request gets the error
+    batcher.predict = lambda records: [float(r['x']) * 2 for r in records]
+    futures = [batcher.submit([{'x': 1}]), batcher.submit([{'x': 'abc'}]), batcher.submit([{'x': 3}])]
+    assert futures[0].result(timeout=5) == [2.0] and futures[2].result(timeout=5) == [6.0]
+    assert isinstance(futures[1].exception(timeout=5), ValueError)
+    batcher.close()
+
+
+def test_http_service(tmp_path, raw_insurance_frame):
+    df, encoder, frequency, severity = _fit(raw_insurance_frame)
+    encoder.save(tmp_path / ENCODER_FILE)
+    joblib.dump(frequency, tmp_path / FREQUENCY_MODEL_FILE)
+    joblib.dump(severity, tmp_path / SEVERITY_MODEL_FILE)
+    model = QuotingModel.load(tmp_path)
+
+    server = make_server(model, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        conn = http.client.HTTPConnection(*server.server_address)
+        records = _records(apply_schema(raw_insurance_frame).iloc[:3])
+        for payload, n_quotes in [(records[0], 1), (records, 3), ({'policies': records}, 3)]:
+            conn.request('POST', '/quote', json.dumps(payload))
+            response = conn.getresponse()
+            assert response.status == 200
+            assert len(json.loads(response.read())['quotes']) == n_quotes
+
+        for payload in ['"not a policy"', json.dumps(dict(records[0], kilowatts='abc'))]:
+            conn.request('POST', '/quote', payload)
+            response = conn.getresponse()
+            response.read()
+            assert response.status == 400
+    finally:
+        server.shutdown()
+        server.server_close()
+        server.batcher.close()
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+from src.cleaning import clean_and_impute
+from src.schema import INSURANCE_SCHEMA, apply_schema, memory_report
+
+
+def test_apply_schema_compacts_raw_frame(raw_insurance_frame):
+    compact = apply_schema(raw_insurance_frame)
+    for col in ['Province', 'PostalCode', 'make', 'Bank', 'Gender']:
+        assert isinstance(compact[col].dtype, pd.CategoricalDtype)
+    assert compact['kilowatts'].dtype == np.float32
+    assert compact['RegistrationYear'].dtype == 'Int16'
+    assert compact['AlarmImmobiliser'].dtype == 'boolean'
+    assert compact['WrittenOff'].isna().sum() == raw_insurance_frame['WrittenOff'].isna().sum()
+
+    report = memory_report(raw_insurance_frame, compact)
+    assert report.loc['TOTAL', 'bytes_after'] < report.loc['TOTAL', 'bytes_before']
+    assert set(report.index) == set(raw_insurance_frame.columns) | {'TOTAL'}
+
+
+def test_clean_and_impute_under_compact_schema(raw_insurance_frame):
+    """clean_and_impute fills every gap without widening the compact dtypes."""
+    compact = apply_schema(raw_insurance_frame)
+    cleaned = clean_and_impute(compact)
+
+    assert cleaned.drop(columns=['NumberOfVehiclesInFleet']).isna().sum().sum() == 0
+    assert cleaned['kilowatts'].dtype == np.float32
+    assert cleaned['PolicyID'].dtype == INSURANCE_SCHEMA['PolicyID']
+    assert cleaned['CustomValueEstimate'].min() > 0
+    assert 'Missing' in cleaned['Bank'].cat.categories
+    assert set(cleaned['WrittenOff'].unique()) <= {True, False, 'Missing'}
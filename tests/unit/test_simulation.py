@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression, LogisticRegression
+
+from src.cleaning import fit_clean_and_impute
+from src.preprocessing import build_feature_matrix
+from src.schema import apply_schema
+from src.simulation import (_claim_positions, fit_severity_distribution, load_severity_distribution, risk_measures,
+                            save_severity_distribution, simulate_losses, simulate_portfolio)
+
+
+def test_claims_and_losses_match_the_model_moments(tmp_path):
+    rng = np.random.default_rng(0)
+    # Exact Bernoulli claims: each (policy, scenario) at most once, at the predicted rate
+    p_claim = np.array([0.0, 0.002, 0.3, 0.97, 1.0])
+    policies, scenarios = _claim_positions(p_claim, 50_000, rng)
+    assert len(np.unique(policies * 50_000 + scenarios)) == len(policies) and scenarios.max() < 50_000
+    np.testing.assert_allclose(np.bincount(policies, minlength=5) / 50_000, p_claim, atol=0.01)
+
+    # Dispersion around the severity predictions is recovered from the actual / predicted ratios
+    y_pred = rng.uniform(1_000, 50_000, 20_000)
+    gamma = fit_severity_distribution(rng.gamma(2.0, y_pred / 2.0), y_pred)
+    lognormal = fit_severity_distribution(y_pred * rng.lognormal(-0.5 ** 2 / 2, 0.5, 20_000), y_pred, "lognormal")
+    assert abs(gamma["shape"] - 2.0) < 0.1 and abs(lognormal["sigma"] - 0.5) < 0.02
+    assert load_severity_distribution(save_severity_distribution(gamma, tmp_path / "dist.json")) == gamma
+    for y_true in ([5_000.0, 0.0], [2_000.0, 4_000.0]):
+        with pytest.raises(ValueError, match="at least two claims"):
+            fit_severity_distribution(y_true, [1_000.0, 2_000.0])
+
+    # Simulated losses average the expected loss sum(p * E[severity]) of each segment
+    p_claim, severity = rng.uniform(0, 0.2, 300), rng.uniform(1_000, 20_000, 300)
+    segments = np.where(np.arange(300) < 100, "A", "B")
+    for distribution in (gamma, lognormal):
+        losses = simulate_losses(p_claim, severity, distribution, segments, n_scenarios=20_000, n_jobs=1)
+        expected = pd.Series(p_claim * severity).groupby(segments).sum()
+        assert list(losses.columns) == ["A", "B"] and len(losses) == 20_000
+        np.testing.assert_allclose(losses.mean(), expected, rtol=0.02)
+
+
+def test_seeded_blocks_and_portfolio_risk_measures(raw_insurance_frame):
+    rng = np.random.default_rng(1)
+    p_claim, severity = rng.uniform(0, 0.05, 1_000), rng.uniform(1_000, 20_000, 1_000)
+    args = p_claim, severity, {"family": "gamma", "shape": 0.8}, rng.choice(["A", "B", "C"], 1_000)
+    # Every block has its own seeded stream, so worker count and scheduling do not change the draws
+    serial = simulate_losses(*args, n_scenarios=5_000, block_size=1_000, n_jobs=1, random_state=7)
+    pd.testing.assert_frame_equal(serial, simulate_losses(*args, n_scenarios=5_000, block_size=1_000, n_jobs=2,
+                                                          random_state=7))
+    assert not serial.equals(simulate_losses(*args, n_scenarios=5_000, block_size=1_000, n_jobs=1, random_state=8))
+
+    measures = risk_measures(serial, levels=(0.9, 0.99))
+    assert list(measures.index) == ["A", "B", "C", "Total"]
+    np.testing.assert_allclose(measures.loc["Total", "Mean"], serial.sum(axis=1).mean())
+    assert (measures["VaR_0.9"] <= measures["VaR_0.99"]).all() and (measures["VaR_0.99"] <= measures["TVaR_0.99"]).all()
+    np.testing.assert_allclose(measures["VaR_0.99"], serial.assign(Total=serial.sum(axis=1)).quantile(0.99))
+
+    # End to end from policies: scored in batches, aggregated per Province
+    df, imputer = fit_clean_and_impute(apply_schema(raw_insurance_frame))
+    X, encoder = build_feature_matrix(df, ['PolicyID', 'UnderwrittenCoverID', 'PostalCode', 'Model', 'make'])
+    has_claim = (df['TotalClaims'] > 0).to_numpy()
+    frequency = LogisticRegression(max_iter=500).fit(X, has_claim)
+    severity_model = LinearRegression().fit(X[has_claim], df.loc[has_claim, 'TotalClaims'])
+    losses, measures = simulate_portfolio(df, encoder, frequency, severity_model, {"family": "lognormal", "sigma": 1.0},
+                                          n_scenarios=2_000, block_size=500, batch_size=150, n_jobs=1)
+    assert list(losses.columns) == sorted(df['Province'].astype(str).unique()) and len(losses) == 2_000
+    assert measures.index[-1] == "Total" and (measures["TVaR_0.995"] >= measures["VaR_0.995"]).all()
@@ -0,0 +1,109 @@
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.utils.eda_cleaning_and_imputation_functions import (
+    median_from_counts,
+    mode_from_counts,
+    preprocess_data,
+    preprocess_data_in_chunks,
+)
+
+
+def test_streaming_output_matches_in_memory(tmp_path, raw_insurance_file):
+    """Chunked cleaning writes exactly the same file as the in-memory pipeline."""
+    in_memory = tmp_path / "in_memory.csv"
+    streamed = tmp_path / "streamed.csv"
+
+    df = preprocess_data(raw_insurance_file, in_memory)
+    summary = preprocess_data_in_chunks(raw_insurance_file, streamed, chunksize=97)
+
+    assert streamed.read_text() == in_memory.read_text()
+    assert summary["rows"] == len(df)
+    assert summary["columns"] == df.shape[1]
+    assert summary["missing_values"] == int(df.isnull().sum().sum())
+    assert np.isclose(summary["mean_loss_ratio"], df["LossRatio"].mean())
+    assert np.isclose(summary["writtenoff_ratio"], df["WrittenOff"].eq(True).mean())
+
+
+def test_statistics_from_counts_match_pandas():
+    """Mode and median derived from value counts agree with Series.mode / Series.median."""
+    values = pd.Series([3.0, 1.0, 2.0, 2.0, np.nan, 5.0, 1.0])
+    counts = values.value_counts(dropna=False)
+    assert median_from_counts(counts) == values.median()
+    assert mode_from_counts(counts) == values.mode()[0]
+    assert np.isnan(median_from_counts(pd.Series([], dtype="int64")))
+
+
+def test_parquet_store_roundtrip(tmp_path, raw_insurance_file):
+    """Streaming and in-memory runs produce the same partitioned Parquet dataset."""
+    from src.data_loader import iter_processed, load_processed
+
+    in_memory = tmp_path / "in_memory.parquet"
+    streamed = tmp_path / "streamed.parquet"
+    df = preprocess_data(raw_insurance_file, in_memory)
+    preprocess_data_in_chunks(raw_insurance_file, streamed, chunksize=97)
+
+    loaded = load_processed(in_memory)
+    pd.testing.assert_frame_equal(load_processed(streamed), loaded)
+    assert sorted(loaded.columns) == sorted(df.columns)
+    assert isinstance(loaded['make'].dtype, pd.CategoricalDtype)
+
+    subset = load_processed(streamed, columns=['TotalClaims', 'Province'], provinces=['Gauteng'])
+    assert list(subset.columns) == ['TotalClaims', 'Province']
+    assert len(subset) == (df['Province'] == 'Gauteng').sum()
+    assert np.isclose(subset['TotalClaims'].sum(), df.loc[df['Province'] == 'Gauteng', 'TotalClaims'].sum())
+
+    batches = list(iter_processed(streamed, columns=['TotalClaims', 'make'], batch_size=50))
+    assert max(len(batch) for batch in batches) <= 50
+    assert sum(len(batch) for batch in batches) == len(df)
+    assert np.isclose(sum(batch['TotalClaims'].sum() for batch in batches), df['TotalClaims'].sum())
+
+
+def test_incremental_ingestion_only_cleans_new_months(tmp_path, raw_insurance_frame):
+    from src.data_loader import load_processed
+    from src.policy_aggregates import compute_policy_aggregates, load_policy_aggregates
+    from src.utils.eda_cleaning_and_imputation_functions import ingest_new_months
+
+    raw = raw_insurance_frame.sort_values('TransactionMonth', kind='stable').reset_index(drop=True)
+    march = raw['TransactionMonth'].str.startswith('2015-03')
+    raw_file, output = tmp_path / "raw.csv", tmp_path / "processed.parquet"
+    state, aggregates_file = tmp_path / "state.joblib", tmp_path / "aggregates.parquet"
+
+    # First run: same output as the streaming pipeline
+    raw[~march].to_csv(raw_file, sep="|", index=False)
+    first = ingest_new_months(raw_file, output, state, aggregates_file, chunksize=97)
+    preprocess_data_in_chunks(raw_file, tmp_path / "streamed.parquet", chunksize=97)
+    pd.testing.assert_frame_equal(load_processed(output), load_processed(tmp_path / "streamed.parquet"))
+    before = load_processed(output)
+
+    # A new month is appended: old rows are untouched, metrics come from the running totals
+    raw.to_csv(raw_file, sep="|", index=False)
+    metrics = ingest_new_months(raw_file, output, state, aggregates_file, chunksize=97)
+    df = load_processed(output)
+    assert len(df) == len(raw) and metrics['rows'] == len(raw) and first['rows'] == (~march).sum()
+    assert np.isclose(metrics['mean_loss_ratio'], df['LossRatio'].mean())
+    assert metrics['missing_values'] == int(df.isnull().sum().sum())
+    old_rows = df[~df['TransactionMonth'].astype(str).str.startswith('2015-03')]
+    pd.testing.assert_frame_equal(old_rows.reset_index(drop=True), before, check_categorical=False)
+
+    # Existing PolicyIDs keep their codes, new ones are appended; aggregates match a full recomputation
+    policy_ids = joblib.load(state)['counts']['policy_ids']
+    old_ids = np.unique(raw.loc[~march, 'PolicyID'])
+    np.testing.assert_array_equal(policy_ids[:len(old_ids)], old_ids)
+    np.testing.assert_array_equal(np.sort(policy_ids), np.unique(raw['PolicyID']))
+    pd.testing.assert_frame_equal(
+        load_policy_aggregates(aggregates_file),
+        compute_policy_aggregates(df['PolicyCode'], df['TotalClaims'], df['TotalPremium']),
+        check_dtype=False,
+    )
+
+    # Nothing new: nothing is rewritten
+    assert ingest_new_months(raw_file, output, state, aggregates_file, chunksize=97) == metrics
+    assert len(load_processed(output)) == len(raw)
+
+    # A state written by other cleaning code is discarded: every month is reprocessed from scratch
+    joblib.dump(dict(joblib.load(state), version='stale'), state)
+    assert ingest_new_months(raw_file, output, state, aggregates_file, chunksize=97)['rows'] == len(raw)
+    assert len(load_processed(output)) == len(raw)
+    np.testing.assert_array_equal(joblib.load(state)['counts']['policy_ids'], np.unique(raw['PolicyID']))
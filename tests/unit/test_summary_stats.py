@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+from src.summary_stats import (
+    build_summary,
+    group_stats,
+    loss_ratio_table,
+    merge_summaries,
+    summarize,
+    summary_metrics,
+)
+from src.utils.eda_cleaning_and_imputation_functions import preprocess_data
+from src.utils.eda_visualization_functions import loss_ratio_by
+from src.utils.hypothesis_testing import batch_t_tests, group_sufficient_stats
+
+
+def _sorted(stats):
+    stats = stats.assign(group=stats['group'].astype(str))
+    return stats.sort_values(['metric', 'group']).reset_index(drop=True)
+
+
+def test_merged_summaries_match_whole_frame(tmp_path, raw_insurance_file):
+    df = preprocess_data(raw_insurance_file, tmp_path / "clean.parquet")
+    whole = summarize(df)
+    chunks = [summarize(df.iloc[start:start + 97]) for start in range(0, len(df), 97)]
+    # Any grouping of the merges gives the same summary
+    left = merge_summaries(*chunks)
+    right = merge_summaries(merge_summaries(*chunks[3:]), None, merge_summaries(*chunks[:3]))
+    partitions = build_summary(tmp_path / "clean.parquet", tmp_path / "summary.joblib", n_jobs=2)
+    assert (tmp_path / "summary.joblib").exists()
+
+    assert summary_metrics(whole) == {
+        'rows': len(df), 'columns': df.shape[1], 'missing_values': int(df.isnull().sum().sum()),
+        'mean_loss_ratio': summary_metrics(whole)['mean_loss_ratio'],
+        'writtenoff_ratio': float(df['WrittenOff'].eq(True).mean()),
+    }
+    assert np.isclose(summary_metrics(whole)['mean_loss_ratio'], df['LossRatio'].mean())
+    expected = _sorted(group_stats(whole, 'make', ['LossRatio', 'Margin', 'ClaimOccurred']))
+    for summary in (left, right, partitions):
+        for key in ('rows', 'columns', 'missing_values', 'writtenoff_yes'):
+            assert summary[key] == whole[key]
+        pd.testing.assert_frame_equal(_sorted(group_stats(summary, 'make', ['LossRatio', 'Margin', 'ClaimOccurred'])),
+                                      expected, rtol=1e-9)
+
+
+def test_rollups_served_from_summary(tmp_path, raw_insurance_file):
+    df = preprocess_data(raw_insurance_file, tmp_path / "clean.parquet")
+    summary = merge_summaries(*[summarize(df.iloc[start:start + 150]) for start in range(0, len(df), 150)])
+    df['Margin'] = df['TotalPremium'] - df['TotalClaims']
+
+    stats = group_sufficient_stats(df, 'Province', ['Margin'])
+    pd.testing.assert_frame_equal(_sorted(group_stats(summary, 'Province', ['Margin'])), _sorted(stats),
+                                  check_dtype=False, rtol=1e-9)
+    scanned = batch_t_tests(df, ['Province'], ['Margin'])
+    served = batch_t_tests(None, ['Province'], ['Margin'], summary=summary)
+    # Group order may differ, so pairs are compared regardless of side
+    pair = lambda res: res[['group_a', 'group_b']].astype(str).apply(lambda row: tuple(sorted(row)), axis=1)
+    p_values = lambda res: res.set_index(pair(res))['p_value'].sort_index()
+    assert len(scanned) == len(served) == 6
+    np.testing.assert_allclose(p_values(served), p_values(scanned), rtol=1e-7)
+
+    # Large premiums with a small spread: the variance comes from centred sums, not sumsq - n * mean^2
+    rng = np.random.default_rng(0)
+    large = pd.DataFrame({'Province': rng.choice(['A', 'B', 'C'], 3_000), 'TotalClaims': 0.0,
+                          'TotalPremium': 1e9 + rng.normal(0, 1, 3_000) * np.repeat([1, 2, 3], 1_000)})
+    large_summary = merge_summaries(*[summarize(large.iloc[start:start + 250]) for start in range(0, 3_000, 250)])
+    pd.testing.assert_frame_equal(_sorted(group_stats(large_summary, 'Province', ['Margin'])),
+                                  _sorted(group_sufficient_stats(large.assign(Margin=large['TotalPremium']),
+                                                                 'Province', ['Margin'])),
+                                  check_dtype=False, rtol=1e-6)
+
+    table = loss_ratio_table(summary, 'Province')
+    claims = df.groupby('Province', observed=True)[['TotalClaims', 'TotalPremium']].sum()
+    np.testing.assert_allclose(table['LossRatio'], (claims['TotalClaims'] / claims['TotalPremium'])[table.index])
+    by_name = lambda series: series.set_axis(series.index.astype(str)).sort_index()
+    pd.testing.assert_series_equal(by_name(loss_ratio_by(df, 'make', summary=summary)),
+                                   by_name(loss_ratio_by(df, 'make')))
@@ -0,0 +1,67 @@
+import json
+import os
+import pstats
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core import tracing
+from src.core.tracing import configure, export_chrome_trace, read_trace, stage, trace_file, traced
+
+
+@traced
+def _double(df):
+    return pd.concat([df, df], ignore_index=True)
+
+
+@traced(name="outer")
+def _outer(df):
+    time.sleep(0.02)
+    return _double(df)
+
+
+@pytest.fixture
+def tracing_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv(tracing.RUN_ENV, f"test-{os.getpid()}")
+    yield tmp_path
+    configure()
+
+
+def test_disabled_tracing_writes_nothing(tracing_dir):
+    configure()
+    df = pd.DataFrame({"a": np.arange(10)})
+    assert len(_outer(df)) == 20 and trace_file() is None
+    assert list(tracing_dir.iterdir()) == []
+
+
+def test_stages_are_recorded_and_exported(tracing_dir):
+    configure(tracing_dir)
+    df = pd.DataFrame({"a": np.arange(1000, dtype="int64")})
+    _outer(df)
+    with stage("block"):
+        pass
+
+    events = {event["name"]: event for event in read_trace()}
+    assert set(events) == {"outer", "_double", "block"}
+    assert events["_double"]["parent"] == "outer" and events["outer"]["parent"] is None
+    assert events["_double"]["rows_in"] == 1000 and events["_double"]["rows_out"] == 2000
+    assert events["_double"]["bytes_out"] == 16_000
+    assert events["outer"]["wall_s"] >= 0.02 >= events["outer"]["cpu_s"]
+
+    chrome = json.loads(export_chrome_trace().read_text())
+    assert {event["name"] for event in chrome["traceEvents"]} == set(events)
+    assert all(event["ph"] == "X" and event["dur"] >= 0 for event in chrome["traceEvents"])
+
+
+@pytest.mark.parametrize("mode, suffix", [("cprofile", ".prof"), ("sample", ".folded")])
+def test_profiles_the_chosen_stage(tracing_dir, mode, suffix):
+    configure(tracing_dir, profile="_double", profile_mode=mode)
+    _outer(pd.DataFrame({"a": np.arange(200_000)}))
+    events = {event["name"]: event for event in read_trace()}
+    assert "profile" not in events["outer"]
+    path = tracing_dir / os.path.basename(events["_double"]["profile"])
+    assert path.suffix == suffix and path.exists()
+    if mode == "cprofile":
+        assert pstats.Stats(str(path)).total_calls > 0
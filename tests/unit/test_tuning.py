@@ -0,0 +1,51 @@
+import numpy as np
+from sklearn.linear_model import Ridge
+
+import src.models as models
+from src.tuning import best_params, halving_budgets, read_trials, save_best_params, successive_halving
+
+
+def _data(n_rows=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, 5)).astype(np.float32)
+    y = 500 + 200 * X[:, 0] - 100 * X[:, 1] + rng.normal(scale=50, size=n_rows)
+    return X, y
+
+
+def test_successive_halving_resumes_from_log(tmp_path):
+    assert halving_budgets(1600, 100, 3) == [100, 300, 900, 1600]
+
+    X, y = _data()
+    log_path = tmp_path / "severity_trials.jsonl"
+    kwargs = dict(n_candidates=3, min_rows=100, eta=3, models=["Ridge", "XGBoost"], n_jobs=2,
+                  log_path=log_path, data_key="synthetic")
+    leaderboard = successive_halving("severity", X, y, **kwargs)
+    assert (leaderboard["status"] == "ok").all()
+    # 3 configs per model on the first rung, then the best of each model on every larger one
+    assert leaderboard.groupby("model")["n_rows"].apply(list).map(sorted).to_dict() == {
+        "Ridge": [100, 100, 100, 300, 900, 1600], "XGBoost": [100, 100, 100, 300, 900, 1600]}
+    assert {"fit_time_s", "peak_memory_mb"} <= set(leaderboard.columns)
+
+    # An interrupted search (last trials missing, last line cut short) only reruns what is missing
+    lines = log_path.read_text().splitlines()
+    log_path.write_text("\n".join(lines[:-2]) + "\n" + lines[-2][:20] + "\n")
+    resumed = successive_halving("severity", X, y, **kwargs)
+    assert len(read_trials(log_path)) == len(lines)
+    assert resumed[["trial_id", "n_rows"]].equals(leaderboard[["trial_id", "n_rows"]])
+    np.testing.assert_allclose(resumed["score"], leaderboard["score"])
+
+
+def test_best_params_feed_tuned_profile(tmp_path, monkeypatch):
+    X, y = _data(600)
+    leaderboard = successive_halving("severity", X, y, n_candidates=3, min_rows=100, models=["Ridge"], n_jobs=1,
+                                     log_path=tmp_path / "trials.jsonl")
+    best = best_params(leaderboard)
+    top = leaderboard[leaderboard["n_rows"] == 480].iloc[0]
+    assert best == {"Ridge": top["params"]}
+
+    monkeypatch.setattr(models, "TUNED_PARAMS_PATH", tmp_path / "best_params.json")
+    assert models.regression_models("tuned").keys() == models.regression_models().keys()
+    save_best_params("severity", best, models.TUNED_PARAMS_PATH)
+    tuned = models.regression_models("tuned")["Ridge"]
+    assert isinstance(tuned, Ridge) and tuned.alpha == best["Ridge"]["alpha"]
+    assert "LinearRegression" in models.regression_models("tuned")
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from src.utils.eda_cleaning_and_imputation_functions import (
+    calculate_loss_ratio,
+    impute_gender,
+    infer_gender_from_title,
+)
+
+
+def _impute_gender_rowwise(df):
+    df['Gender'] = df.apply(infer_gender_from_title, axis=1)
+    return df
+
+
+def _calculate_loss_ratio_rowwise(df):
+    df['LossRatio'] = df.apply(
+        lambda row: 1 if row['TotalPremium'] == 0 else row['TotalClaims'] / row['TotalPremium'],
+        axis=1
+    )
+    return df
+
+
+def test_impute_gender_matches_rowwise():
+    """NaN titles, unmapped titles and present genders all match the row-wise version."""
+    df = pd.DataFrame({
+        'Title': ['Mr', 'Mrs', np.nan, 'Prof', 'Dr', 'Miss', 'Ms', 'Mr', np.nan],
+        'Gender': [np.nan, np.nan, np.nan, np.nan, np.nan, 'Male', np.nan, 'Female', 'Male'],
+    }, dtype=object)
+    expected = _impute_gender_rowwise(df.copy())['Gender']
+    result = impute_gender(df.copy())['Gender']
+    pd.testing.assert_series_equal(result, expected)
+
+
+def test_impute_gender_all_missing():
+    df = pd.DataFrame({'Title': ['Mr', 'Prof'], 'Gender': [np.nan, np.nan]})
+    result = impute_gender(df)['Gender']
+    assert result.iloc[0] == 'Male'
+    assert pd.isna(result.iloc[1])
+
+
+def test_loss_ratio_matches_rowwise():
+    """Zero, negative and missing premiums give the same loss ratio as the row-wise version."""
+    df = pd.DataFrame({
+        'TotalPremium': [100.0, 0.0, -50.0, 0.0, np.nan, 21.929824561403, -0.0],
+        'TotalClaims': [25.0, 0.0, 10.0, 500.0, 3.0, 0.0, 7.0],
+    })
+    expected = _calculate_loss_ratio_rowwise(df.copy())['LossRatio']
+    result = calculate_loss_ratio(df.copy())['LossRatio']
+    pd.testing.assert_series_equal(result, expected)